@@ -7,6 +7,7 @@ Library Manager for editing prompt libraries
 
 # Import API routes first to register them with PromptServer
 from . import library_manager_api
+from . import library_api
 
 from .comicverse_nodes import (
     NODE_CLASS_MAPPINGS as COMICVERSE_CLASS_MAPPINGS,
@@ -40,6 +41,10 @@ from .save_image_with_prompt_node import (
     NODE_CLASS_MAPPINGS as SAVE_IMAGE_WITH_PROMPT_CLASS_MAPPINGS,
     NODE_DISPLAY_NAME_MAPPINGS as SAVE_IMAGE_WITH_PROMPT_DISPLAY_MAPPINGS,
 )
+from .chapter_builder_node import (
+    NODE_CLASS_MAPPINGS as CHAPTER_BUILDER_CLASS_MAPPINGS,
+    NODE_DISPLAY_NAME_MAPPINGS as CHAPTER_BUILDER_DISPLAY_MAPPINGS,
+)
 
 NODE_CLASS_MAPPINGS = {
     **COMICVERSE_CLASS_MAPPINGS,
@@ -50,6 +55,7 @@ NODE_CLASS_MAPPINGS = {
     **LOAD_IMAGE_WITH_PROMPT_CLASS_MAPPINGS,
     **LOAD_IMAGE_FOLDER_CLASS_MAPPINGS,
     **SAVE_IMAGE_WITH_PROMPT_CLASS_MAPPINGS,
+    **CHAPTER_BUILDER_CLASS_MAPPINGS,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -61,6 +67,7 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     **LOAD_IMAGE_WITH_PROMPT_DISPLAY_MAPPINGS,
     **LOAD_IMAGE_FOLDER_DISPLAY_MAPPINGS,
     **SAVE_IMAGE_WITH_PROMPT_DISPLAY_MAPPINGS,
+    **CHAPTER_BUILDER_DISPLAY_MAPPINGS,
 }
 
 WEB_DIRECTORY = "./js"
@@ -0,0 +1,60 @@
+"""
+Benchmark: throughput and peak memory of the streaming chapter builder.
+
+Writes --panels random panel images to a temporary folder, builds the chapter
+and reports pages per second and the process' peak RSS after 1/4 of the pages
+and at the end; with streaming the two stay close whatever the chapter length.
+
+    python benchmarks/bench_chapter_builder.py --panels 400 --size 768
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from chapter_builder import build_chapter
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--panels", type=int, default=400)
+    parser.add_argument("--size", type=int, default=768, help="square panel edge in pixels")
+    parser.add_argument("--plan", default="4格经典, auto:3, 2竖版")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "panels"
+        folder.mkdir()
+        for i in range(args.panels):
+            pixels = rng.integers(0, 256, (args.size, args.size, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(folder / f"{i:05d}.png", compress_level=1)
+
+        start = time.perf_counter()
+        pages, quarter_rss = 0, None
+        for _ in build_chapter(folder, Path(tmp) / "out", args.plan):
+            pages += 1
+            if quarter_rss is None and pages * 4 * 3 >= args.panels:  # ~3 panels per page
+                quarter_rss = _peak_rss_mb()
+        elapsed = time.perf_counter() - start
+
+    print(f"{pages} pages from {args.panels} panels in {elapsed:.1f} s ({pages / elapsed:.1f} pages/s)")
+    print(f"peak RSS after ~1/4 of the chapter: {quarter_rss:.0f} MB, at the end: {_peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: payload size and encode time of one library grid page.
+
+Compares JSON entries with base64 data URLs (one string per thumbnail) against
+the binary page frame from library_frames.
+
+    python benchmarks/bench_library_frames.py --count 30 --size 1024
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from library_frames import decode_page_frame, encode_page_frame
+from library_render import render_variant, thumb_size
+
+
+def _json_page(entries, blobs):
+    items = [
+        dict(entry, src=f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}")
+        for entry, (data, mime) in zip(entries, blobs)
+    ]
+    return json.dumps({"node_id": "1", "total": len(items), "offset": 0, "items": items}).encode("utf-8")
+
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - start) / repeat, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1024, help="square image edge in pixels")
+    parser.add_argument("--count", type=int, default=30, help="thumbnails per page")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    entries, blobs = [], []
+    for i in range(args.count):
+        encoded = render_variant(torch.rand(1, args.size, args.size, 3), "thumb")
+        w, h = thumb_size(args.size, args.size)
+        entries.append({"id": f"{i:032x}", "w": w, "h": h,
+                        "width": args.size, "height": args.size, "near_duplicate": False})
+        blobs.append((encoded.data, encoded.mime))
+
+    t_json, payload = _time(lambda: _json_page(entries, blobs), args.repeat)
+    t_frame, frame = _time(lambda: encode_page_frame("1", args.count, 0, [], entries, blobs), args.repeat)
+    t_decode, _ = _time(lambda: decode_page_frame(frame), args.repeat)
+    print(f"json + base64: {len(payload) / 1024:8.1f} KiB  encode {t_json * 1e3:7.3f} ms")
+    print(f"binary frame : {len(frame) / 1024:8.1f} KiB  encode {t_frame * 1e3:7.3f} ms  decode {t_decode * 1e3:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: images/second for library de-duplication digests.
+
+Compares the previous PNG-encode-then-SHA256 path against hashing the raw
+pixel buffer (quantized uint8 and raw float32), and a re-queued batch whose
+digests come from the identity memo.
+
+    python benchmarks/bench_library_hashing.py --size 2048 --count 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from library_hashing import DIGEST_ALGORITHM, DigestMemo, batch_digests, image_digest, legacy_png_digest
+
+
+def _rate(fn, images, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for img in images:
+            fn(img)
+    elapsed = time.perf_counter() - start
+    return (len(images) * repeat) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2048, help="square image edge in pixels")
+    parser.add_argument("--count", type=int, default=8, help="images per round")
+    parser.add_argument("--repeat", type=int, default=2, help="rounds per method")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    images = [torch.rand(1, args.size, args.size, 3) for _ in range(args.count)]
+
+    print(f"{args.count} x {args.size}x{args.size} RGB, hasher={DIGEST_ALGORITHM}")
+    results = [
+        ("png + sha256 (legacy)", _rate(legacy_png_digest, images, args.repeat)),
+        ("raw uint8 buffer", _rate(image_digest, images, args.repeat)),
+        ("raw float32 buffer", _rate(lambda t: image_digest(t, quantize=False), images, args.repeat)),
+    ]
+    # the same batch tensor again, as ComfyUI passes cached upstream outputs
+    batch = torch.cat(images)
+    memo = DigestMemo()
+    batch_digests(batch, memo=memo)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        batch_digests(batch, memo=memo)
+    results.append(("memoized batch re-run", (args.count * args.repeat) / (time.perf_counter() - start)))
+    baseline = results[0][1]
+    for name, rate in results:
+        print(f"  {name:<24} {rate:8.2f} img/s  ({rate / baseline:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
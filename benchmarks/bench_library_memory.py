@@ -0,0 +1,107 @@
+"""
+Benchmark: memory held by a full asset library of 2048x2048 images.
+
+Compares keeping float32 [1,H,W,C] slices of the producer batches (the
+previous representation) with uint8 CompactImage storage. Reports the bytes
+of tensor storage kept alive and, on Linux, the process resident size.
+
+    python benchmarks/bench_library_memory.py --size 2048 --count 30 --batch 4
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from library_store import CompactImage
+
+
+def _trim_heap():
+    """Return freed allocator memory to the OS so RSS reflects what is still referenced."""
+    try:
+        import ctypes
+
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _rss_bytes():
+    gc.collect()
+    _trim_heap()
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _live_storage_bytes(tensors):
+    seen = {}
+    for t in tensors:
+        storage = t.untyped_storage()
+        seen[storage.data_ptr()] = storage.nbytes()
+    return sum(seen.values())
+
+
+def _build_library(args, compact):
+    library = []
+    for start in range(0, args.count, args.batch):
+        batch = torch.rand(min(args.batch, args.count - start), args.size, args.size, 3)
+        for i in range(batch.shape[0]):
+            b = batch[i:i + 1]
+            library.append(CompactImage.from_tensor(b) if compact else b)
+        del batch
+    return library
+
+
+def _measure(args, compact):
+    """Build the library and return (tensor bytes held, resident-size delta)."""
+    before = _rss_bytes()
+    library = _build_library(args, compact)
+    after = _rss_bytes()
+    tensors = [img.pixels for img in library] if compact else library
+    rss = (after - before) if before is not None and after is not None else None
+    return _live_storage_bytes(tensors), rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2048, help="square image edge in pixels")
+    parser.add_argument("--count", type=int, default=30, help="library size")
+    parser.add_argument("--batch", type=int, default=4, help="images per upstream batch")
+    parser.add_argument("--mode", choices=("float", "compact"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # child process: one representation per fresh interpreter so RSS is comparable
+        held, rss = _measure(args, args.mode == "compact")
+        print(json.dumps({"held": held, "rss": rss}))
+        return
+
+    mb = 1024 * 1024
+    print(f"library of {args.count} x {args.size}x{args.size} RGB (upstream batches of {args.batch})")
+    results = {}
+    for name, mode in (("float32 slices", "float"), ("uint8 compact", "compact")):
+        out = subprocess.run(
+            [sys.executable, __file__, "--size", str(args.size), "--count", str(args.count),
+             "--batch", str(args.batch), "--mode", mode],
+            check=True, capture_output=True, text=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        results[mode] = result
+        rss_text = f"{result['rss'] / mb:9.1f} MB resident" if result["rss"] is not None else "resident n/a"
+        print(f"  {name:<16} {result['held'] / mb:9.1f} MB tensor storage  {rss_text}")
+    print(f"  tensor storage reduction: {results['float']['held'] / results['compact']['held']:.1f}x")
+    if results["float"]["rss"] and results["compact"]["rss"]:
+        print(f"  resident size reduction:  {results['float']['rss'] / results['compact']['rss']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
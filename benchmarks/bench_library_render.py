@@ -0,0 +1,60 @@
+"""
+Benchmark: wall time of a full library preview sync (thumbnails + previews).
+
+Renders the thumbnail and preview of every library image serially, then through
+warm_thumbnails/submit_render on the shared render pool with empty caches.
+
+    python benchmarks/bench_library_render.py --size 2048 --count 30
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+import library_render
+from library_render import VARIANTS, render_variant, submit_render, warm_thumbnails
+
+
+def _serial(images):
+    start = time.perf_counter()
+    for image in images:
+        for variant in VARIANTS:
+            render_variant(image, variant)
+    return time.perf_counter() - start
+
+
+def _pooled(images):
+    # what the library routes do: thumbnails warmed up front, previews requested by id
+    digests = [f"bench{i:04d}" for i in range(len(images))]
+    thumbs, previews = {}, {}
+    start = time.perf_counter()
+    futures = warm_thumbnails(images, digests, range(len(images)), thumbs)
+    futures += [submit_render(digest, image, "preview", previews) for digest, image in zip(digests, images)]
+    for future in futures:
+        future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2048, help="square image edge in pixels")
+    parser.add_argument("--count", type=int, default=30, help="library size")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    images = [torch.rand(1, args.size, args.size, 3) for _ in range(args.count)]
+
+    serial = _serial(images)
+    pooled = _pooled(images)
+    print(f"full sync of {args.count} x {args.size}x{args.size} RGB")
+    print(f"  serial            {serial:7.2f} s")
+    print(f"  pool ({library_render.RENDER_WORKERS} workers)  {pooled:7.2f} s  ({serial / pooled:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: PromptRollingNode.roll against large prompt libraries.
+
+Times the first roll (payloads parsed and normalized) against repeated rolls
+of the same payloads (served from the parsed-library cache).
+
+    python benchmarks/bench_prompt_rolling.py --entries 50000 --groups 4 --libraries 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prompt_rolling_node
+from prompt_rolling_node import PromptRollingNode
+
+
+def _payload(library, groups, entries):
+    return json.dumps({
+        "groups": [
+            {"name": f"lib{library}_group{g}", "entries": [[f"prompt {library}.{g}.{i}", "detail"] for i in range(entries)]}
+            for g in range(groups)
+        ]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=50000, help="entries per group")
+    parser.add_argument("--groups", type=int, default=4, help="groups per library")
+    parser.add_argument("--libraries", type=int, default=2, help="connected library inputs")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    inputs = {f"library_{i + 1}": _payload(i, args.groups, args.entries) for i in range(args.libraries)}
+    size_mb = sum(len(raw) for raw in inputs.values()) / 1e6
+    node = PromptRollingNode()
+
+    for mode in ("random", "sequential"):
+        prompt_rolling_node._PARSED_LIBRARIES.clear()
+        start = time.perf_counter()
+        node.roll(mode=mode, unique_id="bench", **inputs)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            node.roll(mode=mode, unique_id="bench", **inputs)
+        warm = (time.perf_counter() - start) / args.repeat
+        print(f"{mode:10s} payload {size_mb:6.1f} MB  first roll {cold * 1000:8.1f} ms  "
+              f"cached roll {warm * 1000:7.3f} ms  ({cold / warm:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
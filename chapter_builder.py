@@ -0,0 +1,211 @@
+"""
+Streaming chapter builder.
+
+Lays a long sequence of panel images out on pages following a page plan and
+writes each page to disk as soon as it is composed. Every stage is a
+generator: panel files -> loaded panels -> page groups -> composed pages ->
+written files. Only the panels of the page being composed are held in
+memory, however long the chapter is; solved free-grid layouts are used once
+and never cached.
+
+The page plan is a comma/newline separated list, used in order and repeated
+from the start while panels remain:
+
+    4格经典     a layout template from templates/
+    auto:3      the free-grid solver with 3 panels (aspects from the images)
+
+Command line:
+
+    python chapter_builder.py panels/ out/ --plan "4格经典, auto:3" --size 1024x1448
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+
+try:
+    from .layout_compositor import PANEL_FITS, compose_page
+    from .layout_solver import solve_free_grid
+    from .layout_templates import load_templates
+except ImportError:  # loaded as a top-level module (tests, command line)
+    from layout_compositor import PANEL_FITS, compose_page
+    from layout_solver import solve_free_grid
+    from layout_templates import load_templates
+
+# same set as LoadImageFolderWithPrompt
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tiff"}
+
+
+class PlanEntry(NamedTuple):
+    template: Optional[str]  # template name, None for the free-grid solver
+    panels: int
+    config: Optional[str] = None  # template_config JSON, prebuilt for templates
+
+
+def list_panel_files(folder) -> List[Path]:
+    """Image files of ``folder`` in name order (the chapter's reading order)."""
+    folder = Path(folder)
+    if not folder.is_dir():
+        raise FileNotFoundError(f"Folder not found: {folder}")
+    return sorted(p for p in folder.iterdir() if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def iter_panels(paths: Iterable[Path]) -> Iterator[torch.Tensor]:
+    """Load panels one at a time as [1,H,W,C] float tensors (RGB, or RGBA when the file has alpha)."""
+    from PIL import Image, ImageOps
+
+    for path in paths:
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+            pixels = np.asarray(img.convert("RGBA" if has_alpha else "RGB"), dtype=np.float32) / 255.0
+        yield torch.from_numpy(pixels).unsqueeze(0)
+
+
+def parse_page_plan(plan: str, margin: int, bg_color: Sequence[int]) -> List[PlanEntry]:
+    """Validate a page plan up front, so a typo fails before any page is written."""
+    templates = load_templates()
+    entries: List[PlanEntry] = []
+    for token in re.split(r"[,\n]+", plan or ""):
+        token = token.strip()
+        if not token:
+            continue
+        match = re.fullmatch(r"auto\s*:\s*(\d+)", token, flags=re.IGNORECASE)
+        if match:
+            count = int(match.group(1))
+            if count < 1:
+                raise ValueError(f"Page plan entry '{token}' needs at least one panel.")
+            entries.append(PlanEntry(None, count))
+            continue
+        if token not in templates:
+            raise ValueError(f"Unknown template '{token}' in page plan. Available: {', '.join(templates)}, auto:N")
+        template = templates[token]
+        config = json.dumps({
+            "grid_count": template["grid_count"],
+            "grid_info": template["grid_info"],
+            "margin": margin,
+            "bg_color": list(bg_color),
+        })
+        entries.append(PlanEntry(token, template["grid_count"], config))
+    if not entries:
+        raise ValueError("The page plan is empty.")
+    return entries
+
+
+def iter_page_groups(
+    panels: Iterator[torch.Tensor],
+    plan: Sequence[PlanEntry],
+    width: int,
+    height: int,
+    margin: int,
+    bg_color: Sequence[int],
+) -> Iterator[Tuple[Union[str, Dict[str, Any]], List[torch.Tensor]]]:
+    """
+    Pull each page's panels from ``panels`` and pair them with their
+    template_config: the plan's JSON string for templates, a fresh dict for
+    solved free grids.
+    """
+    panels = iter(panels)
+    for entry in itertools.cycle(plan):
+        group = list(itertools.islice(panels, entry.panels))
+        if not group:
+            return
+        if entry.config is not None:
+            yield entry.config, group
+            continue
+        solved = solve_free_grid([img.shape[2] / img.shape[1] for img in group], width, height, margin)
+        yield {"grid_count": solved["grid_count"], "grid_info": solved["grid_info"],
+               "margin": margin, "bg_color": list(bg_color)}, group
+
+
+def next_page_number(out_dir, prefix: str) -> int:
+    """One past the highest ``{prefix}_NNNNN_.png`` in ``out_dir``, counted like ComfyUI's save nodes."""
+    pattern = re.compile(rf"{re.escape(prefix)}_(\d+)_\.png", flags=re.IGNORECASE)
+    out_dir = Path(out_dir)
+    numbers = [int(m.group(1)) for p in out_dir.iterdir() if (m := pattern.fullmatch(p.name))] if out_dir.is_dir() else []
+    return max(numbers, default=0) + 1
+
+
+def write_pages(
+    pages: Iterable[torch.Tensor], out_dir, prefix: str = "page", start: Optional[int] = None
+) -> Iterator[Path]:
+    """
+    Save each [1,H,W,3] page as ``{prefix}_{n:05d}_.png`` as soon as it arrives.
+    Numbering continues after the pages already in ``out_dir`` (or from
+    ``start``), so a rerun never overwrites an earlier chapter.
+    """
+    from PIL import Image
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if start is None:
+        start = next_page_number(out_dir, prefix)
+    for number, page in enumerate(pages, start):
+        pixels = (page[0].clamp(0, 1) * 255).round().to(torch.uint8).cpu().numpy()
+        path = out_dir / f"{prefix}_{number:05d}_.png"
+        Image.fromarray(pixels).save(path, compress_level=4)
+        yield path
+
+
+def build_chapter(
+    folder,
+    out_dir,
+    plan: str,
+    *,
+    width: int = 1024,
+    height: int = 1448,
+    margin: int = 5,
+    bg_color: Sequence[int] = (255, 255, 255),
+    fit: str = "fill",
+    prefix: str = "page",
+    start: Optional[int] = None,
+) -> Iterator[Path]:
+    """
+    Build a chapter from the images in ``folder``, yielding the path of each
+    page once it is on disk. The plan and the folder are checked right away;
+    panels are loaded, composed and written only as the result is iterated.
+    """
+    if fit not in PANEL_FITS:
+        raise ValueError(f"Unknown panel fit '{fit}'. Available: {', '.join(PANEL_FITS)}")
+    entries = parse_page_plan(plan, margin, bg_color)
+    panels = iter_panels(list_panel_files(folder))
+    groups = iter_page_groups(panels, entries, width, height, margin, bg_color)
+    # solved free grids differ page to page: keep them out of the layout caches
+    pages = (compose_page(group, config, width, height, fit, memoize=isinstance(config, str)) for config, group in groups)
+    return write_pages(pages, out_dir, prefix, start)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="folder of panel images, read in name order")
+    parser.add_argument("out_dir", help="where the pages are written")
+    parser.add_argument("--plan", default="4格经典", help="page plan, e.g. '4格经典, auto:3'")
+    parser.add_argument("--size", default="1024x1448", help="page WIDTHxHEIGHT in pixels")
+    parser.add_argument("--margin", type=int, default=5)
+    parser.add_argument("--bg", default="255,255,255", help="background colour R,G,B")
+    parser.add_argument("--fit", choices=PANEL_FITS, default="fill")
+    parser.add_argument("--prefix", default="page")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    bg_color = [int(v) for v in args.bg.split(",")]
+    count = 0
+    for path in build_chapter(args.folder, args.out_dir, args.plan, width=width, height=height,
+                              margin=args.margin, bg_color=bg_color, fit=args.fit, prefix=args.prefix):
+        count += 1
+        print(path)
+    print(f"{count} pages written to {args.out_dir}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
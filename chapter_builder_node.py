@@ -0,0 +1,132 @@
+"""
+Chapter builder node for ComicVerse custom nodes.
+
+Runs the streaming chapter builder (chapter_builder.py) on a folder of panel
+images and writes the finished pages to the ComfyUI output directory.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from .chapter_builder import build_chapter, list_panel_files
+    from .layout_compositor import PANEL_FITS
+except ImportError:  # loaded as a top-level module (tests)
+    from chapter_builder import build_chapter, list_panel_files
+    from layout_compositor import PANEL_FITS
+
+
+try:
+    import folder_paths  # ComfyUI
+except ImportError:  # outside ComfyUI (tests)
+    folder_paths = None
+
+
+def _output_root() -> Path:
+    if folder_paths is not None:
+        return Path(folder_paths.get_output_directory())
+    return Path(__file__).resolve().parent / "output"
+
+
+def _save_target(output_subfolder: str, filename_prefix: str, width: int, height: int) -> Tuple[Path, str, Optional[int]]:
+    """
+    (folder, filename prefix, first page number) for the pages. The folder must
+    resolve inside the output directory; absolute paths and ``..`` escapes are
+    rejected. Inside ComfyUI the name and counter come from get_save_image_path,
+    like SaveImageWithPrompt.
+    """
+    root = _output_root().resolve()
+    out_dir = (root / output_subfolder).resolve()
+    if out_dir != root and root not in out_dir.parents:
+        raise ValueError(f"output_subfolder must stay inside the output directory: {output_subfolder}")
+    if folder_paths is None:
+        return out_dir, filename_prefix, None  # write_pages counts the existing pages
+    subfolder = os.path.relpath(out_dir, root)
+    prefix = filename_prefix if subfolder == "." else os.path.join(subfolder, filename_prefix)
+    full_output_folder, filename, counter, _, _ = folder_paths.get_save_image_path(prefix, os.fspath(root), width, height)
+    return Path(full_output_folder), filename, counter
+
+
+class ChapterBuilderNode:
+    """
+    章节构建节点
+    按页面计划将文件夹中的面板图片逐页排版并写入磁盘（流式处理，内存占用与章节长度无关）
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Any]:
+        return {
+            "required": {
+                "folder_path": ("STRING", {"default": "", "multiline": False}),
+                "page_plan": ("STRING", {
+                    "default": "4格经典",
+                    "multiline": True,
+                    "tooltip": "Templates and auto:N entries, comma or newline separated; repeats until panels run out",
+                }),
+                "output_subfolder": ("STRING", {"default": "comicverse_chapter"}),
+                "filename_prefix": ("STRING", {"default": "page"}),
+                "page_width": ("INT", {"default": 1024, "min": 64, "max": 8192, "step": 8}),
+                "page_height": ("INT", {"default": 1448, "min": 64, "max": 8192, "step": 8}),
+                "grid_margin": ("INT", {"default": 5, "min": 1, "max": 20}),
+                "background_color_r": ("INT", {"default": 255, "min": 0, "max": 255}),
+                "background_color_g": ("INT", {"default": 255, "min": 0, "max": 255}),
+                "background_color_b": ("INT", {"default": 255, "min": 0, "max": 255}),
+                "panel_fit": (list(PANEL_FITS), {"default": "fill"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "INT")
+    RETURN_NAMES = ("output_folder", "page_count")
+    FUNCTION = "build"
+    CATEGORY = "ComicVerse/Layout"
+    OUTPUT_NODE = True
+
+    @classmethod
+    def IS_CHANGED(cls, folder_path: str = "", **kwargs):
+        """Re-run when panels are added, removed or replaced."""
+        try:
+            return "|".join(f"{p.name}:{p.stat().st_mtime_ns}" for p in list_panel_files(folder_path))
+        except OSError:
+            return float("nan")
+
+    def build(
+        self,
+        folder_path: str,
+        page_plan: str,
+        output_subfolder: str,
+        filename_prefix: str,
+        page_width: int,
+        page_height: int,
+        grid_margin: int,
+        background_color_r: int,
+        background_color_g: int,
+        background_color_b: int,
+        panel_fit: str = "fill",
+    ):
+        if not folder_path:
+            raise FileNotFoundError("Please provide a folder path.")
+        out_dir, prefix, start = _save_target(output_subfolder, filename_prefix, page_width, page_height)
+
+        pages = build_chapter(
+            folder_path, out_dir, page_plan,
+            width=page_width, height=page_height, margin=grid_margin,
+            bg_color=(background_color_r, background_color_g, background_color_b),
+            fit=panel_fit, prefix=prefix, start=start,
+        )
+        count = sum(1 for _ in pages)  # written one page at a time
+        if count == 0:
+            raise FileNotFoundError(f"No valid images found in folder: {folder_path}")
+        print(f"[ComicVerse] Chapter: {count} pages written to {out_dir}")
+        return (os.fspath(out_dir), count)
+
+
+NODE_CLASS_MAPPINGS = {
+    "ChapterBuilderNode": ChapterBuilderNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "ChapterBuilderNode": "Chapter Builder | ComicVerse",
+}
@@ -5,69 +5,209 @@ This module provides a minimal test node to verify repository loading in ComfyUI
 Place the repository folder under ComfyUI's `custom_nodes` directory to load.
 """
 
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import itertools
 import re
+import threading
 import torch
-from io import BytesIO
-import hashlib
 import json
-import base64
 
 try:
     from server import PromptServer  # ComfyUI server messaging
 except Exception:  # pragma: no cover
     PromptServer = None  # type: ignore
 
-
-# Persistent in-process cache for library images per node instance
-_LIBRARY_CACHE: dict[str, List[torch.Tensor]] = {}
+try:
+    from .layout_compositor import PANEL_FITS, compose_pages
+    from .layout_solver import solve_free_grid
+    from .layout_templates import load_templates, template_stamp
+    from .library_batch import FIT_MODES, blank_image, fit_batch
+    from .library_cache import EncodedImageCache, budget_from_env
+    from .library_eviction import EVICTION_POLICIES, AssetStats, make_policy
+    from .library_events import PreviewDispatcher
+    from .library_frames import encode_page_frame
+    from .library_hashing import batch_digests
+    from .library_render import describe_entries, submit_render, warm_thumbnails
+    from .library_similarity import BKTree, perceptual_hashes
+    from .library_store import CompactImage, DiskAssetStore, MappedImage, _get_store_dir
+except ImportError:  # loaded as a top-level module (tests)
+    from layout_compositor import PANEL_FITS, compose_pages
+    from layout_solver import solve_free_grid
+    from layout_templates import load_templates, template_stamp
+    from library_batch import FIT_MODES, blank_image, fit_batch
+    from library_cache import EncodedImageCache, budget_from_env
+    from library_eviction import EVICTION_POLICIES, AssetStats, make_policy
+    from library_events import PreviewDispatcher
+    from library_frames import encode_page_frame
+    from library_hashing import batch_digests
+    from library_render import describe_entries, submit_render, warm_thumbnails
+    from library_similarity import BKTree, perceptual_hashes
+    from library_store import CompactImage, DiskAssetStore, MappedImage, _get_store_dir
+
+
+# Persistent in-process cache for library images per node instance.
+# Entries are uint8 CompactImage ("memory" storage) or disk-backed MappedImage handles ("disk" storage).
+_LIBRARY_CACHE: dict[str, List[Any]] = {}
 _LIBRARY_HASHES: dict[str, List[str]] = {}
 _PENDING_DELETIONS: dict[str, List[int]] = {}  # Track pending deletions per node
+_DISK_STORES: dict[str, DiskAssetStore] = {}
+
+# Guards the library state above; node runs (execution thread) and the REST
+# routes in library_api (event loop, via worker threads) both mutate it
+_LIBRARY_LOCK = threading.RLock()
+
+# Eviction bookkeeping per node: digest -> tick of last selection (or insertion),
+# and the digests output by the previous run (pinned together with the selection)
+_LIBRARY_LAST_USED: dict[str, dict[str, int]] = {}
+_LAST_OUTPUT: dict[str, set] = {}
+_USE_TICK = itertools.count(1)
+
+# Current selection (asset ids) per node, as last resolved by a run or the select route
+_LIBRARY_SELECTION: dict[str, List[str]] = {}
+
+# Near-duplicate index per node: perceptual hashes in a BK-tree, and digest -> cluster representative digest
+_LIBRARY_SIMILARITY: dict[str, BKTree] = {}
+_LIBRARY_CLUSTERS: dict[str, dict[str, str]] = {}
+
+# Byte-budgeted LRU caches for encoded thumbnails and previews keyed by image hash.
+# The selected and last-output assets of each library are pinned (see _pin_encodings);
+# budgets can be overridden via environment (MB).
+_THUMB_CACHE = EncodedImageCache(budget_from_env("COMICVERSE_THUMB_CACHE_MB", 32), name="thumbs")
+_PREVIEW_CACHE = EncodedImageCache(budget_from_env("COMICVERSE_PREVIEW_CACHE_MB", 256), name="previews")
+
+
+def _send_event(event: str, payload: Dict[str, Any]) -> None:
+    PromptServer.instance.send_sync(event, payload)
+
+
+# Library previews are sent from a background thread, coalesced per node.
+_PREVIEW_EVENTS = PreviewDispatcher(_send_event, "comicverse.library.previews")
+
+# Asset ids are image digests (see library_hashing.batch_digests)
+_ASSET_ID_RE = re.compile(r"^[0-9a-fA-F]{16,128}$")
+
+def _as_tensor(image) -> torch.Tensor:
+    """Materialize a library entry as a [1,H,W,C] float tensor."""
+    if isinstance(image, (CompactImage, MappedImage)):
+        return image.to_tensor()
+    return image
+
+
+def _find_library_image(digest: str):
+    """Return the library image with content hash ``digest`` from any node, or None."""
+    with _LIBRARY_LOCK:
+        for key, hashes in _LIBRARY_HASHES.items():
+            if digest in hashes:
+                images = _LIBRARY_CACHE.get(key, [])
+                idx = hashes.index(digest)
+                if idx < len(images):
+                    return images[idx]
+    return None
 
-# Lightweight caches for encoded thumbnails and previews keyed by image hash
-_THUMB_CACHE: dict[str, str] = {}
-_PREVIEW_CACHE: dict[str, str] = {}
-_LAST_SENT_COUNT: dict[str, int] = {}
 
-def _encode_image_data_url(img, *, prefer_webp: bool, jpeg_ok: bool, quality: int = 80) -> tuple[str, str]:
+def _pin_encodings(key: str) -> None:
     """
-    Encode PIL.Image to a data URL. Prefer WebP when available; fall back to JPEG (if no alpha)
-    or PNG. Returns (data_url, mime).
+    Pin the encodings of the selection and the last output of the library of
+    ``key`` (call under _LIBRARY_LOCK). Only these few assets are pinned, so
+    the byte budgets still apply to libraries of thousands of images.
     """
-    mime = "image/png"
-    buffer = BytesIO()
-    mode = img.mode
-    has_alpha = mode in ("RGBA", "LA") or ("transparency" in img.info)
-    # Try WebP first if requested
-    if prefer_webp:
-        try:
-            img.save(buffer, format="WEBP", quality=quality, method=4)
-            mime = "image/webp"
-            data = buffer.getvalue()
-            return "data:" + mime + ";base64," + base64.b64encode(data).decode("ascii"), mime
-        except Exception:
-            buffer = BytesIO()
-            # fall through to JPEG/PNG
-    # Try JPEG if allowed and no alpha
-    if jpeg_ok and not has_alpha:
-        try:
-            # Ensure RGB for JPEG
-            rgb = img.convert("RGB") if img.mode != "RGB" else img
-            rgb.save(buffer, format="JPEG", quality=quality, optimize=True)
-            mime = "image/jpeg"
-            data = buffer.getvalue()
-            return "data:" + mime + ";base64," + base64.b64encode(data).decode("ascii"), mime
-        except Exception:
-            buffer = BytesIO()
-    # Fallback PNG (supports alpha, lossless)
-    try:
-        img.save(buffer, format="PNG")
-        mime = "image/png"
-        data = buffer.getvalue()
-        return "data:" + mime + ";base64," + base64.b64encode(data).decode("ascii"), mime
-    except Exception:
-        # As a last resort, return an empty 1x1 PNG data URL
-        return "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8/x8AAwMB/ee1GfUAAAAASUVORK5CYII=", "image/png"
+    keep = set(_LIBRARY_SELECTION.get(key, [])) | _LAST_OUTPUT.get(key, set())
+    _THUMB_CACHE.pin(key, keep)
+    _PREVIEW_CACHE.pin(key, keep)
+
+
+LIST_SORTS = ("recent", "selected")
+LIST_MAX_LIMIT = 200
+
+
+def _describe_assets(key: str, images: list, ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Thumbnail entries for ``images``/``ids`` of the library of ``key``. Only ids
+    and sizes are returned; the browser fetches the encoded images from
+    /comicverse/library/asset/{id}. Thumbnails are rendered in the background
+    so those fetches usually hit the cache.
+    """
+    indices = range(len(ids))
+    entries = describe_entries(images, ids, indices)
+    warm_thumbnails(images, ids, indices, _THUMB_CACHE)
+    clusters = _LIBRARY_CLUSTERS.get(key, {})
+    for digest, entry in zip(ids, entries):
+        if digest in clusters:
+            entry["cluster"] = clusters[digest][:12]
+            entry["near_duplicate"] = clusters[digest] != digest
+    return entries
+
+
+def _library_page(key: str, offset: int, limit: int, sort: str):
+    """(total, selection, images, ids) for one page of the library of ``key``. KeyError for unknown libraries."""
+    if sort not in LIST_SORTS:
+        raise ValueError(f"Unknown sort '{sort}'. Available: {', '.join(LIST_SORTS)}")
+    offset = max(0, int(offset))
+    limit = max(1, min(LIST_MAX_LIMIT, int(limit)))
+    with _LIBRARY_LOCK:
+        images, ids = _LIBRARY_CACHE[key], _LIBRARY_HASHES[key]
+        selection = list(_LIBRARY_SELECTION.get(key, []))
+        total = len(ids)
+        newest_first = range(total - 1, -1, -1)
+        if sort == "selected":
+            position = {d: i for i, d in enumerate(ids)}
+            first = [position[d] for d in dict.fromkeys(selection) if d in position]
+            chosen = set(first)
+            ordered = itertools.chain(first, (i for i in newest_first if i not in chosen))
+            indices = list(itertools.islice(ordered, offset, offset + limit))
+        else:
+            indices = list(newest_first[offset:offset + limit])
+        return total, selection, [images[i] for i in indices], [ids[i] for i in indices]
+
+
+def _list_library_assets(key: str, offset: int = 0, limit: int = 30, sort: str = "recent") -> Dict[str, Any]:
+    """
+    One page of the library of ``key`` for the frontend grid, newest first
+    (``recent``) or selected assets first, in selection order (``selected``).
+    KeyError for unknown libraries.
+    """
+    total, selection, page_images, page_ids = _library_page(key, offset, limit, sort)
+    return {
+        "node_id": key,
+        "total": total,
+        "offset": max(0, int(offset)),
+        "limit": max(1, min(LIST_MAX_LIMIT, int(limit))),
+        "sort": sort,
+        "items": _describe_assets(key, page_images, page_ids),
+        "selected": selection,
+    }
+
+
+def _list_library_frame(key: str, offset: int = 0, limit: int = 30, sort: str = "recent") -> bytes:
+    """Like _list_library_assets, as a binary frame with the encoded thumbnails inlined (see library_frames)."""
+    total, selection, page_images, page_ids = _library_page(key, offset, limit, sort)
+    entries = _describe_assets(key, page_images, page_ids)
+    renders = [submit_render(d, img, "thumb", _THUMB_CACHE) for img, d in zip(page_images, page_ids)]
+    blobs = [(encoded.data, encoded.mime) for encoded in (f.result() for f in renders)]
+    return encode_page_frame(key, total, max(0, int(offset)), selection, entries, blobs)
+
+
+def _queue_library_event(key: str, node_id: str, selection: List[str], *, executed: bool = False) -> None:
+    """
+    Queue a preview event for the library of ``key``. Events only carry the
+    asset count and the selection; the frontend grid drops its loaded pages and
+    pages thumbnails in again through _list_library_assets. ``executed`` marks
+    events from a node run, which has applied the pending deletions. A newer
+    event for the same node replaces this one if still queued.
+    """
+    if PromptServer is None:
+        return
+    with _LIBRARY_LOCK:
+        count = len(_LIBRARY_HASHES.get(key, []))
+    payload = {
+        "node_id": node_id,
+        "count": count,
+        "selected": list(selection),
+        "executed": executed,
+    }
+    _PREVIEW_EVENTS.submit(key, lambda: payload)
 
 
 class ComicAssetLibraryNode:
@@ -76,12 +216,22 @@ class ComicAssetLibraryNode:
         return {
             "required": {
                 "output_count": ("INT", {"default": 2, "min": 1, "max": 6}),
-                "selected_indices": ("STRING", {"default": "", "multiline": False, "placeholder": "选中顺序：如 2,0,1"}),
-                "pending_deletions": ("STRING", {"default": "", "multiline": False, "placeholder": "待删除索引（自动填充）"}),
+                "selected_indices": ("STRING", {"default": "", "multiline": False, "placeholder": "选中素材ID（按顺序，自动填充；也接受索引如 2,0,1）"}),
+                "pending_deletions": ("STRING", {"default": "", "multiline": False, "placeholder": "待删除素材ID（自动填充）"}),
             },
             "optional": {
                 "image_input_a": ("IMAGE", {}),
                 "image_input_b": ("IMAGE", {}),
+                "similarity_threshold": ("INT", {"default": 0, "min": 0, "max": 32, "tooltip": "Max perceptual-hash distance (bits of 64) for near-duplicates; 0 disables"}),
+                "near_duplicates": (["flag", "merge"], {"default": "flag", "tooltip": "flag: keep and group into clusters; merge: skip like exact duplicates"}),
+                "storage": (["memory", "disk"], {"default": "memory", "tooltip": "disk: persist the library as uint8 files (survives restarts, loads selected images on demand)"}),
+                "max_assets": ("INT", {"default": 30, "min": 1, "max": 10000, "tooltip": "Assets are evicted beyond this count"}),
+                "eviction": (list(EVICTION_POLICIES), {"default": "fifo", "tooltip": "fifo: drop oldest; memory_budget: drop least recently selected once over the byte budget. Selected and last output assets are never evicted"}),
+                "memory_budget_mb": ("INT", {"default": 1024, "min": 16, "max": 65536, "tooltip": "Byte budget for the memory_budget eviction policy (uint8 pixels)"}),
+                "output_mode": (["separate", "batch"], {"default": "separate", "tooltip": "batch: image_1 outputs all selected images as one [K,H,W,C] batch resized to a common size"}),
+                "batch_width": ("INT", {"default": 0, "min": 0, "max": 8192, "tooltip": "Batch width; 0 uses the first selected image"}),
+                "batch_height": ("INT", {"default": 0, "min": 0, "max": 8192, "tooltip": "Batch height; 0 uses the first selected image"}),
+                "batch_fit": (list(FIT_MODES), {"default": "letterbox", "tooltip": "letterbox keeps the aspect ratio (black bars); stretch fills the frame"}),
             },
             "hidden": {
                 "unique_id": ("UNIQUE_ID", {}),
@@ -93,24 +243,75 @@ class ComicAssetLibraryNode:
     FUNCTION = "run"
     CATEGORY = "ComicVerse/Library"
 
-    def _parse_indices(self, selected_indices: str, max_len: int):
-        if not selected_indices:
-            return None
-        tokens = re.split(r"[\s,]+", selected_indices.strip())
-        indices = []
-        for t in tokens:
+    @staticmethod
+    def _resolve_assets(tokens: str, lib_hashes: List[str], field: str = "selected_indices", strict: bool = True) -> List[str]:
+        """
+        Parse a comma-separated list of asset ids (image digests) in order.
+        Plain integers are positional indices into ``lib_hashes`` (workflows
+        saved before asset ids) and are resolved to ids right away.
+        """
+        if not tokens:
+            return []
+        ids = []
+        for t in re.split(r"[\s,]+", tokens.strip()):
             if t == "":
                 continue
+            if _ASSET_ID_RE.match(t):
+                ids.append(t.lower())
+                continue
             try:
                 idx = int(t)
             except ValueError:
-                raise ValueError(f"Invalid index '{t}' in selected_indices. Use comma-separated integers.")
-            if idx < 0 or idx >= max_len:
-                raise ValueError(f"Index {idx} out of range [0, {max_len-1}].")
-            indices.append(idx)
-        return indices
+                if not strict:
+                    continue
+                raise ValueError(f"Invalid asset id '{t}' in {field}. Use comma-separated asset ids or indices.")
+            if idx < 0 or idx >= len(lib_hashes):
+                if not strict:
+                    continue
+                raise ValueError(f"Index {idx} out of range [0, {len(lib_hashes)-1}].")
+            ids.append(lib_hashes[idx])
+        return ids
+
+    @staticmethod
+    def _similarity_index(key: str, lib_list: List[torch.Tensor], lib_hashes: List[str]) -> BKTree:
+        """Return the node's BK-tree, hashing any assets that were added while detection was off."""
+        tree = _LIBRARY_SIMILARITY.setdefault(key, BKTree())
+        clusters = _LIBRARY_CLUSTERS.setdefault(key, {})
+        for b, digest in zip(lib_list, lib_hashes):
+            if digest not in tree:
+                tree.add(perceptual_hashes(_as_tensor(b))[0], digest)
+                clusters.setdefault(digest, digest)
+        return tree
 
-    def run(self, output_count: int, selected_indices: str = "", image_input_a=None, image_input_b=None, unique_id: str = "", pending_deletions: str = "", **kwargs):
+    @staticmethod
+    def _forget_assets(key: str, digests: List[str]) -> None:
+        """Drop the per-asset bookkeeping of removed ``digests`` (deleted or evicted)."""
+        if not digests:
+            return
+        removed = set(digests)
+        tree = _LIBRARY_SIMILARITY.get(key)
+        if tree is not None:
+            for digest in digests:
+                tree.discard(digest)
+        clusters = _LIBRARY_CLUSTERS.get(key)
+        if clusters is not None:
+            for digest in digests:
+                clusters.pop(digest, None)
+            # members of a removed representative's cluster move to its oldest
+            # surviving member, which stops being flagged as a near duplicate
+            successors: Dict[str, str] = {}
+            for digest, representative in clusters.items():
+                if representative in removed:
+                    clusters[digest] = successors.setdefault(representative, digest)
+        last_used = _LIBRARY_LAST_USED.get(key)
+        if last_used is not None:
+            for digest in digests:
+                last_used.pop(digest, None)
+
+    def run(self, output_count: int, selected_indices: str = "", image_input_a=None, image_input_b=None, unique_id: str = "", pending_deletions: str = "",
+            similarity_threshold: int = 0, near_duplicates: str = "flag", storage: str = "memory", max_assets: int = 30,
+            eviction: str = "fifo", memory_budget_mb: int = 1024, output_mode: str = "separate", batch_width: int = 0,
+            batch_height: int = 0, batch_fit: str = "letterbox", **kwargs):
         # Collect connected IMAGE inputs (two ports), each may be a batch [B,H,W,C]
         image_batches = []
         if image_input_a is not None:
@@ -122,7 +323,10 @@ class ComicAssetLibraryNode:
             raise ValueError("请至少连接1个 IMAGE 输入到漫画素材库节点 (ComicAssetLibraryNode)。")
 
         # Validate basic tensor shapes, flatten to single-image batches (allow different H,W)
+        detect_similar = int(similarity_threshold) > 0
         current_list = []
+        current_digests: List[str] = []
+        current_origin: List[Tuple[int, int]] = []  # (batch, position in batch) per image
         for idx, tensor in enumerate(image_batches):
             if tensor is None:
                 continue
@@ -131,113 +335,119 @@ class ComicAssetLibraryNode:
             # Flatten each batch into single-image tensors [1,H,W,C]
             for i in range(tensor.shape[0]):
                 current_list.append(tensor[i:i+1])
+                current_origin.append((idx, i))
+            # digests over the raw pixel buffers; memoized for re-queued, unchanged upstream tensors
+            current_digests.extend(batch_digests(tensor))
 
         # Get or initialize cache per node unique_id
         key = unique_id or "global"
-        lib_list = _LIBRARY_CACHE.get(key, [])
-        lib_hashes = _LIBRARY_HASHES.get(key, [])
-        
-        # Track actual deletion indices for later index adjustment and delta payloads
-        requested_deletions: List[int] = []
-        actual_deletions: List[int] = []
-        
-        # Record pre-deletion count BEFORE any modifications
-        pre_deletion_count = len(lib_list)
+        with _LIBRARY_LOCK:
+            store = None
+            if storage == "disk":
+                store = _DISK_STORES.get(key)
+                if store is None:
+                    store = _DISK_STORES[key] = DiskAssetStore(_get_store_dir(), key)
+                    if key not in _LIBRARY_CACHE:
+                        # warm start: restore the library persisted before a restart
+                        _LIBRARY_CACHE[key], _LIBRARY_HASHES[key] = store.load()
+            lib_list = _LIBRARY_CACHE.get(key, [])
+            lib_hashes = _LIBRARY_HASHES.get(key, [])
+            store_dirty = False
+            if store is not None and any(not isinstance(b, MappedImage) for b in lib_list):
+                # switched from memory storage: move the in-memory assets to disk
+                lib_list[:] = [store.put(d, b) for b, d in zip(lib_list, lib_hashes)]
+                store_dirty = True
         
-        # Process pending deletions first (before adding new images)
-        if pending_deletions:
-            requested_deletions = [int(i.strip()) for i in pending_deletions.split(",") if i.strip().isdigit()]
-            # Delete in reverse order to avoid index shifting issues
-            for idx in sorted(requested_deletions, reverse=True):
-                if 0 <= idx < len(lib_list):
-                    lib_list.pop(idx)
-                    lib_hashes.pop(idx)
-                    actual_deletions.append(idx)
-            # We stored actual deletions in descending order; normalize to ascending for later logic
-            actual_deletions.sort()
-        
-        # Record count after deletion but before adding new images
-        post_deletion_count = len(lib_list)
-        
-        # Adjust selected_indices after deletions: selected indices are based on pre-deletion list
-        # Need to map them to post-deletion list positions
-        # Do this BEFORE adding new images to avoid confusion
-        if actual_deletions and selected_indices:
-            deletion_indices_set = set(actual_deletions)
-            # Parse selection indices assuming they refer to pre-deletion list
-            selected_before = self._parse_indices(selected_indices, pre_deletion_count)
-            if selected_before:
-                adjusted_selected = []
-                for sel_idx in selected_before:
-                    # Skip if this index was deleted
-                    if sel_idx in deletion_indices_set:
+            # Selections and deletions name assets by id, so they stay valid however
+            # the library changes underneath them; no index fixups are needed.
+            # Legacy indices refer to the library as the frontend saw it, followed by
+            # the images appended in this run.
+            frontend_hashes = list(lib_hashes)
+            appended_hashes: List[str] = []
+            deletion_ids = set(self._resolve_assets(pending_deletions, frontend_hashes, "pending_deletions", strict=False))
+            removed_ids: List[str] = []
+
+            # Process pending deletions first (before adding new images)
+            if deletion_ids:
+                kept = [(b, d) for b, d in zip(lib_list, lib_hashes) if d not in deletion_ids]
+                removed_ids = [d for d in lib_hashes if d in deletion_ids]
+                lib_list[:] = [b for b, _ in kept]
+                lib_hashes[:] = [d for _, d in kept]
+                self._forget_assets(key, removed_ids)
+                if store is not None:
+                    for digest in removed_ids:
+                        store.remove(digest)
+
+            post_deletion_count = len(lib_list)
+
+            tree = self._similarity_index(key, lib_list, lib_hashes) if detect_similar else None
+            clusters = _LIBRARY_CLUSTERS.setdefault(key, {})
+            last_used = _LIBRARY_LAST_USED.setdefault(key, {})
+            known_hashes = set(lib_hashes)
+            batch_phashes: Dict[int, List[int]] = {}
+            for n, b in enumerate(current_list):
+                digest = current_digests[n]
+                if digest in known_hashes:
+                    continue
+                if tree is not None:
+                    batch_idx, pos = current_origin[n]
+                    if batch_idx not in batch_phashes:
+                        # one vectorized pass per input batch, only for batches with new images
+                        batch_phashes[batch_idx] = perceptual_hashes(image_batches[batch_idx])
+                    phash = batch_phashes[batch_idx][pos]
+                    match = tree.nearest(phash, int(similarity_threshold))
+                    if match is not None and near_duplicates == "merge":
                         continue
-                    # Calculate adjustment: for each deletion index < sel_idx, reduce by 1
-                    adjustment = sum(1 for d in actual_deletions if d < sel_idx)
-                    new_idx = sel_idx - adjustment
-                    if 0 <= new_idx < post_deletion_count:
-                        adjusted_selected.append(new_idx)
-                # Update selected_indices with adjusted indices
-                selected_indices = ",".join(map(str, adjusted_selected)) if adjusted_selected else ""
-        
-        # Hard cap to avoid unbounded memory
-        max_cache = 30
-        popped_count = 0
-        for b in current_list:
-            # compute hash to de-duplicate
-            h, w, c = b.shape[1:]
-            img_uint8 = (b[0].clamp(0, 1) * 255).byte().cpu().numpy()
-            from PIL import Image
-            img = Image.fromarray(img_uint8, mode='RGBA' if c == 4 else 'RGB')
-            bio = BytesIO()
-            img.save(bio, format='PNG')
-            digest = hashlib.sha256(bio.getvalue()).hexdigest()
-            if digest in lib_hashes:
-                continue
-            lib_list.append(b)
-            lib_hashes.append(digest)
-            if len(lib_list) > max_cache:
-                lib_list.pop(0)
-                lib_hashes.pop(0)
-                popped_count += 1
-        
-        # Adjust selected_indices for cache eviction (FIFO)
-        if popped_count > 0 and selected_indices:
-            # Parse current indices (which might have been adjusted by pending deletions)
-            # Note: We use a large max_len here because we are tracking indices relative to the state 
-            # BEFORE the pops in this loop, but AFTER pending deletions. 
-            # Actually, it's easier to parse based on the list size at the start of this loop?
-            # No, the indices are valid for the list as it was *before* we started popping in this loop.
-            # But we are adding and popping interleaved.
-            # Wait, the logic: "indices relative to the start of the list".
-            # If we pop 0, everyone shifts down by 1.
-            # So simply subtracting popped_count from the index is correct, 
-            # assuming the index referred to the position *before* these specific pops.
-            # Yes, selected_indices passed into this block refers to the list state after pending deletions.
-            
-            # We need to parse it first.
-            # We can use a dummy max_len because we just want the integers.
-            current_indices = self._parse_indices(selected_indices, 999999) or []
-            adjusted_indices = []
-            for idx in current_indices:
-                new_idx = idx - popped_count
-                if new_idx >= 0:
-                    adjusted_indices.append(new_idx)
-            selected_indices = ",".join(map(str, adjusted_indices)) if adjusted_indices else ""
-
-        _LIBRARY_CACHE[key] = lib_list
-        _LIBRARY_HASHES[key] = lib_hashes
-
-        # Determine selection order relative to the library
-        order = self._parse_indices(selected_indices, len(lib_list))
-        if order is None or len(order) == 0:
-            ordered = []
-        else:
-            ordered = [lib_list[i] for i in order]
+                    tree.add(phash, digest)
+                    clusters[digest] = clusters.get(match[1], match[1]) if match is not None else digest
+                lib_list.append(store.put(digest, b) if store is not None else CompactImage.from_tensor(b))
+                lib_hashes.append(digest)
+                known_hashes.add(digest)
+                appended_hashes.append(digest)
+                last_used[digest] = next(_USE_TICK)
+
+            selected_ids = [
+                d for d in self._resolve_assets(selected_indices, frontend_hashes + appended_hashes)
+                if d not in deletion_ids
+            ]
 
-        # Respect output_count and hard-cap to 6 (only if we have items to select)
-        k = max(1, min(6, int(output_count)))
-        selected = ordered[:k] if len(ordered) >= k else ordered
+            # Evict with the chosen policy to avoid unbounded memory. Selected and
+            # last-output assets are pinned.
+            policy = make_policy(eviction, max_items=max_assets, max_bytes=int(memory_budget_mb) * 1024 * 1024)
+            keep_ids = set(selected_ids) | _LAST_OUTPUT.get(key, set())
+            pinned = {i for i, d in enumerate(lib_hashes) if d in keep_ids}
+            evicted_indices = policy.select(
+                [AssetStats(nbytes=b.nbytes, last_used=last_used.get(d, 0)) for b, d in zip(lib_list, lib_hashes)],
+                pinned,
+            )
+            evicted_ids = []
+            for idx in reversed(evicted_indices):
+                lib_list.pop(idx)
+                evicted = lib_hashes.pop(idx)
+                if store is not None:
+                    store.remove(evicted)
+                evicted_ids.append(evicted)
+            self._forget_assets(key, evicted_ids)
+            removed_ids.extend(evicted_ids)
+
+            _LIBRARY_CACHE[key] = lib_list
+            _LIBRARY_HASHES[key] = lib_hashes
+            if store is not None and (store_dirty or removed_ids or len(lib_list) != post_deletion_count):
+                store.save_manifest(lib_list, lib_hashes)
+
+            # Resolve the selection by id; ids no longer in the library are dropped
+            by_id = dict(zip(lib_hashes, lib_list))
+            order = [d for d in selected_ids if d in by_id]
+
+            # Respect output_count and hard-cap to 6 (only if we have items to select).
+            # Only the selected assets are materialized (disk-backed ones are loaded here).
+            k = max(1, min(6, int(output_count)))
+            selected = [_as_tensor(by_id[d]) for d in order[:k]]
+            _LAST_OUTPUT[key] = set(order[:k])
+            _LIBRARY_SELECTION[key] = order
+            _pin_encodings(key)
+            for d in order[:k]:
+                last_used[d] = next(_USE_TICK)
 
         # Pad with black images if fewer than k
         outputs: list = []
@@ -252,177 +462,124 @@ class ComicAssetLibraryNode:
                 ref_shape = current_list[0].shape[1:]
             else:
                 ref_shape = (512, 512, 3)
+        elif output_mode == "batch":
+            # one [K,H,W,C] batch on image_1, resized in a single vectorized pass
+            height = int(batch_height) or selected[0].shape[1]
+            width = int(batch_width) or selected[0].shape[2]
+            selected = [fit_batch(selected, (height, width), batch_fit)]
+            ref_shape = selected[0].shape[1:]
         else:
             ref_shape = selected[0].shape[1:]
         
         def _blank():
             h, w, c = ref_shape
-            # Use first tensor's device/dtype if available, else defaults
+            # Cached, shared zero tensor on the first input's device/dtype if available
             if len(current_list) > 0:
                 ref_tensor = current_list[0]
-                return torch.zeros((1, h, w, c), dtype=ref_tensor.dtype, device=ref_tensor.device)
+                return blank_image((1, h, w, c), dtype=ref_tensor.dtype, device=ref_tensor.device)
             else:
-                return torch.zeros((1, h, w, c))
+                return blank_image((1, h, w, c))
 
         # Build up to 6 outputs
         for i in range(6):
             if i < len(selected):
                 outputs.append(selected[i])
-            elif i < k:
+            elif i < k or (output_mode == "batch" and i > 0):
                 outputs.append(_blank())
             else:
                 # beyond requested count: still return a tensor (reuse last) to satisfy output shape
                 outputs.append(outputs[-1])
 
-        selected_count = int(min(len(ordered), k))
+        selected_count = int(min(len(order), k))
 
         # Push thumbnails to frontend for interactive preview and selection
-        try:
-            if PromptServer is not None:
-                key = unique_id or "global"
-                prev_count = _LAST_SENT_COUNT.get(key, 0)
-                new_count = len(lib_list)
-
-                # If first time, or counts don't make sense (overflow eviction, etc.), send full
-                full_sync_needed = (prev_count == 0) or (popped_count > 0)
-                if not full_sync_needed:
-                    if new_count < prev_count and not actual_deletions:
-                        # count shrunk but we have no explicit deletion info -> fall back to full
-                        full_sync_needed = True
-
-                if full_sync_needed:
-                    thumbs = []
-                    max_send = min(120, new_count)
-                    max_preview = min(30, new_count)
-                    for i in range(max_send):
-                        b = lib_list[i]
-                        h, w, c = b.shape[1:]
-                        img_uint8 = (b[0].clamp(0, 1) * 255).byte().cpu().numpy()
-                        from PIL import Image
-                        img = Image.fromarray(img_uint8, mode='RGBA' if c == 4 else 'RGB')
-                        digest = lib_hashes[i] if i < len(lib_hashes) else None
-
-                        thumb_w = 96
-                        scale = thumb_w / float(w)
-                        thumb_h = max(1, int(h * scale))
-                        if digest and digest in _THUMB_CACHE:
-                            thumb_data_url = _THUMB_CACHE[digest]
-                        else:
-                            thumb_img = img.resize((thumb_w, thumb_h), Image.BILINEAR)
-                            data_url, _ = _encode_image_data_url(thumb_img, prefer_webp=True, jpeg_ok=(c == 3), quality=80)
-                            thumb_data_url = data_url
-                            if digest:
-                                _THUMB_CACHE[digest] = thumb_data_url
-
-                        entry = {"w": thumb_w, "h": thumb_h, "data": thumb_data_url}
-                        if i < max_preview:
-                            if digest and digest in _PREVIEW_CACHE:
-                                entry["preview"] = _PREVIEW_CACHE[digest]
-                            else:
-                                max_preview_dim = 1024
-                                if w > h:
-                                    preview_w = min(max_preview_dim, w)
-                                    preview_h = max(1, int(h * preview_w / w))
-                                else:
-                                    preview_h = min(max_preview_dim, h)
-                                    preview_w = max(1, int(w * preview_h / h))
-                                preview_img = img.resize((preview_w, preview_h), Image.BILINEAR)
-                                data_url, _ = _encode_image_data_url(preview_img, prefer_webp=True, jpeg_ok=(c == 3), quality=80)
-                                entry["preview"] = data_url
-                                if digest:
-                                    _PREVIEW_CACHE[digest] = data_url
-                        thumbs.append(entry)
-
-                    # guard caches
-                    if len(_THUMB_CACHE) > 500:
-                        _THUMB_CACHE.clear()
-                    if len(_PREVIEW_CACHE) > 500:
-                        _PREVIEW_CACHE.clear()
-
-                    Payload = {
-                        "node_id": unique_id,
-                        "mode": "full",
-                        "thumbs": thumbs,
-                        "count": new_count,
-                        "selected": self._parse_indices(selected_indices, len(lib_list)) or [],
-                    }
-                    PromptServer.instance.send_sync("comicverse.library.previews", Payload)
-                    _LAST_SENT_COUNT[key] = new_count
-                else:
-                    # delta mode: send deletions and appends
-                    deletes_count = len(actual_deletions)
-                    adds_count = max(0, new_count - (prev_count - deletes_count))
-                    # additions are assumed appended at the end of lib_list
-                    adds: List[Dict[str, Any]] = []
-                    if adds_count > 0:
-                        start = max(0, new_count - adds_count)
-                        end = new_count
-                        max_preview = min(30, new_count)
-                        for i in range(start, end):
-                            b = lib_list[i]
-                            h, w, c = b.shape[1:]
-                            img_uint8 = (b[0].clamp(0, 1) * 255).byte().cpu().numpy()
-                            from PIL import Image
-                            img = Image.fromarray(img_uint8, mode='RGBA' if c == 4 else 'RGB')
-                            digest = lib_hashes[i] if i < len(lib_hashes) else None
-
-                            thumb_w = 96
-                            scale = thumb_w / float(w)
-                            thumb_h = max(1, int(h * scale))
-                            if digest and digest in _THUMB_CACHE:
-                                thumb_data_url = _THUMB_CACHE[digest]
-                            else:
-                                thumb_img = img.resize((thumb_w, thumb_h), Image.BILINEAR)
-                                data_url, _ = _encode_image_data_url(thumb_img, prefer_webp=True, jpeg_ok=(c == 3), quality=80)
-                                thumb_data_url = data_url
-                                if digest:
-                                    _THUMB_CACHE[digest] = thumb_data_url
-
-                            entry = {"w": thumb_w, "h": thumb_h, "data": thumb_data_url}
-                            if i < max_preview:
-                                if digest and digest in _PREVIEW_CACHE:
-                                    entry["preview"] = _PREVIEW_CACHE[digest]
-                                else:
-                                    max_preview_dim = 1024
-                                    if w > h:
-                                        preview_w = min(max_preview_dim, w)
-                                        preview_h = max(1, int(h * preview_w / w))
-                                    else:
-                                        preview_h = min(max_preview_dim, h)
-                                        preview_w = max(1, int(w * preview_h / h))
-                                    preview_img = img.resize((preview_w, preview_h), Image.BILINEAR)
-                                    data_url, _ = _encode_image_data_url(preview_img, prefer_webp=True, jpeg_ok=(c == 3), quality=80)
-                                    entry["preview"] = data_url
-                                    if digest:
-                                        _PREVIEW_CACHE[digest] = data_url
-                            adds.append(entry)
-
-                    Payload = {
-                        "node_id": unique_id,
-                        "mode": "delta",
-                        "removes": sorted([i for i in actual_deletions if 0 <= i < prev_count], reverse=True),
-                        "adds": adds,
-                        "count": new_count,
-                        "selected": self._parse_indices(selected_indices, len(lib_list)) or [],
-                    }
-                    PromptServer.instance.send_sync("comicverse.library.previews", Payload)
-                    _LAST_SENT_COUNT[key] = new_count
-        except Exception:
-            pass
+        _queue_library_event(key, unique_id, order, executed=True)
 
         return (*outputs, selected_count)
 
 
+# Library mutations for the REST routes in library_api. They change the
+# in-process library directly and push a preview event; the next execution of the node
+# reads the updated state (the frontend mirrors the selection into its widget).
+
+def _set_library_order(key: str, lib_list: list, lib_hashes: List[str], new_hashes: List[str]) -> None:
+    by_id = dict(zip(lib_hashes, lib_list))
+    lib_list[:] = [by_id[d] for d in new_hashes]
+    lib_hashes[:] = new_hashes
+    store = _DISK_STORES.get(key)
+    if store is not None:
+        store.save_manifest(lib_list, lib_hashes)
+
+
+def _delete_library_assets(key: str, ids: Optional[List[str]]) -> List[str]:
+    """
+    Remove ``ids`` (all assets when None) from the library of ``key``; returns
+    the ids actually removed. KeyError for unknown libraries.
+    """
+    with _LIBRARY_LOCK:
+        lib_list, lib_hashes = _LIBRARY_CACHE[key], _LIBRARY_HASHES[key]
+        doomed = set(lib_hashes if ids is None else ids)
+        removed = [d for d in lib_hashes if d in doomed]
+        if removed:
+            _set_library_order(key, lib_list, lib_hashes, [d for d in lib_hashes if d not in doomed])
+            store = _DISK_STORES.get(key)
+            ComicAssetLibraryNode._forget_assets(key, removed)
+            if store is not None:
+                for digest in removed:
+                    store.remove(digest)
+            _LAST_OUTPUT.get(key, set()).difference_update(removed)
+        selection = [d for d in _LIBRARY_SELECTION.get(key, []) if d not in doomed]
+        _LIBRARY_SELECTION[key] = selection
+        _pin_encodings(key)
+    _queue_library_event(key, key, selection)
+    return removed
+
+
+def _select_library_assets(key: str, ids: List[str]) -> List[str]:
+    """Set the selection (in order) of the library of ``key``; unknown ids are dropped. KeyError for unknown libraries."""
+    with _LIBRARY_LOCK:
+        known = set(_LIBRARY_HASHES[key])
+        selection = [d for d in ids if d in known][:6]
+        _LIBRARY_SELECTION[key] = selection
+        _pin_encodings(key)
+        last_used = _LIBRARY_LAST_USED.setdefault(key, {})
+        for digest in selection:
+            last_used[digest] = next(_USE_TICK)
+    _queue_library_event(key, key, selection)
+    return selection
+
+
+def _reorder_library_assets(key: str, ids: List[str]) -> List[str]:
+    """
+    Move ``ids`` to the front of the library of ``key`` in the given order; the
+    other assets keep their relative order after them. Returns the new order.
+    KeyError for unknown libraries.
+    """
+    with _LIBRARY_LOCK:
+        lib_list, lib_hashes = _LIBRARY_CACHE[key], _LIBRARY_HASHES[key]
+        known = set(lib_hashes)
+        front = list(dict.fromkeys(d for d in ids if d in known))
+        moved = set(front)
+        new_hashes = front + [d for d in lib_hashes if d not in moved]
+        if new_hashes != lib_hashes:
+            _set_library_order(key, lib_list, lib_hashes, new_hashes)
+        order = list(lib_hashes)
+        selection = list(_LIBRARY_SELECTION.get(key, []))
+    _queue_library_event(key, key, selection)
+    return order
+
+
 class LayoutTemplateSelectorNode:
     """
     Node 2: 排版模板选择节点
-    提供预设排版模板，配置基础布局参数（边距、背景色），输出模板结构数据
+    提供 templates/ 目录中的排版模板，配置基础布局参数（边距、背景色），输出模板结构数据
     """
     @classmethod
     def INPUT_TYPES(cls) -> Dict[str, Any]:
+        template_names = list(load_templates()) or ["(no templates found)"]
         return {
             "required": {
-                "template_type": (["2横版", "2竖版", "4格经典", "3格斜切", "自由网格"],),
+                "template_type": (template_names,),
                 "grid_margin": ("INT", {"default": 5, "min": 1, "max": 20}),
                 "background_color_r": ("INT", {"default": 255, "min": 0, "max": 255}),
                 "background_color_g": ("INT", {"default": 255, "min": 0, "max": 255}),
@@ -435,72 +592,203 @@ class LayoutTemplateSelectorNode:
     FUNCTION = "run"
     CATEGORY = "ComicVerse/Layout"
 
-    _TEMPLATES = {
-        "2横版": {
-            "grid_count": 2,
-            "grid_info": [
-                {"x": 0, "y": 0, "w": 0.5, "h": 1.0},
-                {"x": 0.5, "y": 0, "w": 0.5, "h": 1.0},
-            ]
-        },
-        "2竖版": {
-            "grid_count": 2,
-            "grid_info": [
-                {"x": 0, "y": 0, "w": 1.0, "h": 0.5},
-                {"x": 0, "y": 0.5, "w": 1.0, "h": 0.5},
-            ]
-        },
-        "4格经典": {
-            "grid_count": 4,
-            "grid_info": [
-                {"x": 0, "y": 0, "w": 0.5, "h": 0.5},
-                {"x": 0.5, "y": 0, "w": 0.5, "h": 0.5},
-                {"x": 0, "y": 0.5, "w": 0.5, "h": 0.5},
-                {"x": 0.5, "y": 0.5, "w": 0.5, "h": 0.5},
-            ]
-        },
-        "3格斜切": {
-            "grid_count": 3,
-            "grid_info": [
-                {"x": 0, "y": 0, "w": 0.33, "h": 0.5},
-                {"x": 0.33, "y": 0, "w": 0.33, "h": 0.5},
-                {"x": 0.66, "y": 0, "w": 0.34, "h": 1.0},
-            ]
-        },
-        "自由网格": {
-            "grid_count": 1,
-            "grid_info": [
-                {"x": 0, "y": 0, "w": 1.0, "h": 1.0},
-            ]
-        }
-    }
+    @classmethod
+    def IS_CHANGED(cls, template_type: str, **kwargs):
+        """Re-run when the template file was edited."""
+        load_templates()
+        stamp = template_stamp(template_type)
+        return float("nan") if stamp is None else stamp
 
     def run(self, template_type: str, grid_margin: int, background_color_r: int, background_color_g: int, background_color_b: int):
-        if template_type not in self._TEMPLATES:
+        templates = load_templates()
+        if template_type not in templates:
             raise ValueError(f"Unknown template type: {template_type}")
 
-        template_data = self._TEMPLATES[template_type].copy()
+        template = templates[template_type]
+        template_data = {
+            "grid_count": template["grid_count"],
+            "grid_info": [dict(cell) for cell in template["grid_info"]],
+        }
         template_data["margin"] = grid_margin
         template_data["bg_color"] = (background_color_r, background_color_g, background_color_b)
 
-        # Validate grid_count matches grid_info length
-        if template_data["grid_count"] != len(template_data["grid_info"]):
-            raise ValueError(
-                f"Template '{template_type}' grid_count ({template_data['grid_count']}) "
-                f"mismatch with grid_info length ({len(template_data['grid_info'])})"
-            )
-
         # Return JSON-encoded string for downstream nodes
         return (json.dumps(template_data),)
 
 
+def _parse_aspect_ratios(text: str) -> List[float]:
+    """"16:9, 1.5, 3/4" -> [1.777.., 1.5, 0.75]"""
+    ratios = []
+    for token in re.split(r"[,;\s]+", text or ""):
+        if not token:
+            continue
+        parts = re.split(r"[:/xX]", token)
+        try:
+            value = float(parts[0]) / float(parts[1]) if len(parts) == 2 else float(token)
+        except (ValueError, ZeroDivisionError):
+            raise ValueError(f"无效的宽高比 '{token}'，请使用如 16:9、3/4 或 1.5 的格式。") from None
+        if not value > 0:
+            raise ValueError(f"无效的宽高比 '{token}'，宽高比必须为正数。")
+        ratios.append(value)
+    return ratios
+
+
+class FreeGridLayoutNode:
+    """
+    自由网格排版节点
+    根据面板宽高比、页面尺寸与边距自动求解分栏布局（行或列的切分），输出与模板相同格式的 template_config
+    """
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Any]:
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "page_width": ("INT", {"default": 1024, "min": 64, "max": 8192, "step": 8}),
+                "page_height": ("INT", {"default": 1448, "min": 64, "max": 8192, "step": 8}),
+                "grid_margin": ("INT", {"default": 5, "min": 1, "max": 20}),
+                "background_color_r": ("INT", {"default": 255, "min": 0, "max": 255}),
+                "background_color_g": ("INT", {"default": 255, "min": 0, "max": 255}),
+                "background_color_b": ("INT", {"default": 255, "min": 0, "max": 255}),
+            },
+            "optional": {
+                "aspect_ratios": ("STRING", {
+                    "default": "",
+                    "tooltip": "Per-panel aspect ratios, e.g. '16:9, 1, 3/4'. Empty: one panel per input image.",
+                }),
+                "max_panels_per_tier": ("INT", {"default": 4, "min": 1, "max": 8}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "FLOAT")
+    RETURN_NAMES = ("template_config", "crop_loss")
+    FUNCTION = "run"
+    CATEGORY = "ComicVerse/Layout"
+
+    def run(
+        self,
+        images: torch.Tensor,
+        page_width: int,
+        page_height: int,
+        grid_margin: int,
+        background_color_r: int,
+        background_color_g: int,
+        background_color_b: int,
+        aspect_ratios: str = "",
+        max_panels_per_tier: int = 4,
+    ):
+        aspects = _parse_aspect_ratios(aspect_ratios)
+        if not aspects:
+            _, h, w, _ = images.shape
+            aspects = [w / h] * int(images.shape[0])
+        try:
+            solved = solve_free_grid(aspects, page_width, page_height, grid_margin, max_per_tier=max_panels_per_tier)
+        except ValueError as exc:
+            raise ValueError(f"自由网格排版失败：{exc}") from None
+
+        template_data = {
+            "grid_count": solved["grid_count"],
+            "grid_info": solved["grid_info"],
+            "margin": grid_margin,
+            "bg_color": (background_color_r, background_color_g, background_color_b),
+        }
+        return (json.dumps(template_data), float(solved["crop_loss"]))
+
+
+class ComicPageCompositorNode:
+    """
+    Node 3: 页面合成节点
+    按 template_config 将 IMAGE 批次排入漫画页面（每页 grid_count 格），整批页面一次性合成
+    """
+    @classmethod
+    def INPUT_TYPES(cls) -> Dict[str, Any]:
+        return {
+            "required": {
+                "template_config": ("STRING", {"forceInput": True}),
+                "images": ("IMAGE",),
+                "page_width": ("INT", {"default": 1024, "min": 64, "max": 8192, "step": 8}),
+                "page_height": ("INT", {"default": 1448, "min": 64, "max": 8192, "step": 8}),
+                "panel_fit": (list(PANEL_FITS), {"default": "fill"}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "INT")
+    RETURN_NAMES = ("pages", "page_count")
+    FUNCTION = "run"
+    CATEGORY = "ComicVerse/Layout"
+
+    def run(self, template_config: str, images: torch.Tensor, page_width: int, page_height: int, panel_fit: str = "fill"):
+        try:
+            pages = compose_pages(images, template_config, page_width, page_height, panel_fit)
+        except ValueError as exc:
+            raise ValueError(f"页面合成失败：{exc}") from None
+        return (pages, int(pages.shape[0]))
+
+
 def _format_float(value: float) -> str:
     """Format float to exactly one decimal place."""
     return f"{value:.1f}"
 
 
+def _weighted_fragment(prompt: str, value: float) -> str:
+    """``(prompt:value)`` with value clamped to [0, 2]; empty for a zero weight."""
+    value = min(max(value, 0.0), 2.0)
+    if value == 0.0:
+        return ""
+    return f"({prompt}:{_format_float(value)})"
+
+
+# Compiled outputs of PromptStrengthSlider keyed by a digest of (strengths_json, sweep),
+# as (output, variants); bounded LRU
+_COMPILED_PROMPTS: "OrderedDict[str, Tuple[str, Tuple[str, ...]]]" = OrderedDict()
+_COMPILED_PROMPTS_LOCK = threading.Lock()
+_MAX_COMPILED_PROMPTS = 64
+
+SWEEP_MAX_VARIANTS = 10000
+_SWEEP_LINE_RE = re.compile(r"^(?P<prompt>.+?)\s*[=:]\s*(?P<spec>[-+0-9.\s]+(?::[-+0-9.\s]+){0,2})$")
+
+
+def _sweep_values(spec: str) -> List[float]:
+    """``start:end:step`` (end inclusive), ``start:end`` (step 0.1) or a single value."""
+    parts = [float(part) for part in spec.split(":")]
+    if len(parts) == 1:
+        return parts
+    start, end = parts[0], parts[1]
+    step = parts[2] if len(parts) == 3 else 0.1
+    if step <= 0:
+        raise ValueError(f"步长必须大于 0：{spec}")
+    if end < start:
+        raise ValueError(f"结束值不能小于起始值：{spec}")
+    count = int((end - start) / step + 1e-6) + 1
+    if count > SWEEP_MAX_VARIANTS:
+        raise ValueError(f"取值过多：{spec}")
+    return [start + i * step for i in range(count)]
+
+
+def _parse_sweep(sweep: str, prompts: List[str]) -> Dict[str, List[str]]:
+    """Map prompt -> distinct weighted fragments to sweep over, in order."""
+    known = set(prompts)
+    ranges: Dict[str, List[str]] = {}
+    for raw_line in sweep.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _SWEEP_LINE_RE.match(line)
+        if not match:
+            raise ValueError(f"无法解析扫描设置：{line}（格式：提示词=起始:结束:步长）")
+        prompt = match.group("prompt").strip()
+        if prompt not in known:
+            raise ValueError(f"扫描设置中的提示词不存在：{prompt}")
+        try:
+            values = _sweep_values(match.group("spec").replace(" ", ""))
+        except ValueError as exc:
+            raise ValueError(f"无法解析扫描设置：{line}（{exc}）") from None
+        # one-decimal formatting can map neighbouring values to the same fragment
+        ranges[prompt] = list(dict.fromkeys(_weighted_fragment(prompt, v) for v in values))
+    return ranges
+
+
 class PromptStrengthSlider:
-    """Assigns strengths to prompts and emits a formatted string."""
+    """Assigns strengths to prompts and emits a formatted string, or a sweep of variants."""
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -514,13 +802,25 @@ class PromptStrengthSlider:
                     },
                 ),
             },
+            "optional": {
+                "sweep": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": True,
+                        "tooltip": "One line per prompt to sweep: prompt=start:end:step (e.g. cat=0.5:1.5:0.25). "
+                                   "variants lists every combination; other prompts keep their slider strength.",
+                    },
+                ),
+            },
             "hidden": {
                 "strengths_json": "STRING",
             },
         }
 
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("output",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("output", "variants")
+    OUTPUT_IS_LIST = (False, True)
     FUNCTION = "apply_strengths"
     CATEGORY = "ComicVerse/Prompt"
 
@@ -528,26 +828,44 @@ class PromptStrengthSlider:
         self,
         prompts: str = "",
         strengths_json: str = "",
+        sweep: str = "",
     ):
+        sweep = sweep or ""
+        key = hashlib.blake2b(
+            f"{strengths_json}\x00{sweep}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+        with _COMPILED_PROMPTS_LOCK:
+            compiled = _COMPILED_PROMPTS.get(key)
+            if compiled is not None:
+                _COMPILED_PROMPTS.move_to_end(key)
+        if compiled is None:
+            compiled = self._compile(strengths_json, sweep)
+            with _COMPILED_PROMPTS_LOCK:
+                _COMPILED_PROMPTS[key] = compiled
+                while len(_COMPILED_PROMPTS) > _MAX_COMPILED_PROMPTS:
+                    _COMPILED_PROMPTS.popitem(last=False)
+        output, variants = compiled
+        return (output, list(variants))
+
+    def _compile(self, strengths_json: str, sweep: str) -> Tuple[str, Tuple[str, ...]]:
         prompts_list, strengths = self._extract_prompts_and_strengths(strengths_json)
-
-        normalized: Dict[str, float] = {}
-        formatted_pairs = []
-        for prompt in prompts_list:
-            value = strengths.get(prompt, 1.0)
-            if value < 0.0:
-                value = 0.0
-            if value > 2.0:
-                value = 2.0
-            normalized[prompt] = value
-            
-            if value == 0.0:
-                continue
-
-            formatted_pairs.append(f"({prompt}:{_format_float(value)})")
-
-        formatted = ",".join(formatted_pairs)
-        return (formatted,)
+        fragments = [_weighted_fragment(prompt, strengths.get(prompt, 1.0)) for prompt in prompts_list]
+        formatted = ",".join(fragment for fragment in fragments if fragment)
+        if not sweep.strip():
+            return formatted, (formatted,)
+
+        ranges = _parse_sweep(sweep, prompts_list)
+        axes = [ranges.get(prompt, [fragment]) for prompt, fragment in zip(prompts_list, fragments)]
+        total = 1
+        for axis in axes:
+            total *= len(axis)
+        if total > SWEEP_MAX_VARIANTS:
+            raise ValueError(f"扫描组合数 {total} 超过上限 {SWEEP_MAX_VARIANTS}")
+        variants = tuple(
+            ",".join(fragment for fragment in combination if fragment)
+            for combination in itertools.product(*axes)
+        )
+        return formatted, variants
 
     @staticmethod
     def _extract_prompts_and_strengths(raw_json: str):
@@ -591,12 +909,16 @@ class PromptStrengthSlider:
 NODE_CLASS_MAPPINGS = {
     "ComicAssetLibraryNode": ComicAssetLibraryNode,
     "LayoutTemplateSelectorNode": LayoutTemplateSelectorNode,
+    "FreeGridLayoutNode": FreeGridLayoutNode,
+    "ComicPageCompositorNode": ComicPageCompositorNode,
     "PromptStrengthSlider": PromptStrengthSlider,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "ComicAssetLibraryNode": "Comic Assets Library | ComicVerse",
     "LayoutTemplateSelectorNode": "Layout Template Selector | ComicVerse",
+    "FreeGridLayoutNode": "Free Grid Layout | ComicVerse",
+    "ComicPageCompositorNode": "Comic Page Compositor | ComicVerse",
     "PromptStrengthSlider": "Prompt Weight Slider | ComicVerse",
 }
 
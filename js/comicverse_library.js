@@ -1,5 +1,184 @@
 import { app } from "../../scripts/app.js";
 
+// Library images are served by content hash; the browser caches them (immutable + ETag)
+const assetURL = (id, size) => app.api.apiURL(`/comicverse/library/asset/${id}?size=${size}`);
+const libraryURL = (node, action) => app.api.apiURL(`/comicverse/library/${encodeURIComponent(String(node.id))}/${action}`);
+
+// The grid is virtualized: only pages overlapping the visible window are fetched from
+// /comicverse/library/{node_id}/list, and at most MAX_PAGES of them are kept.
+const PAGE_SIZE = 30;
+const MAX_PAGES = 4;
+const SORTS = ["recent", "selected"];
+
+// Pages are fetched as one binary frame with the thumbnails inlined (see library_frames.py);
+// JSON entries plus one image request per thumbnail remain as the fallback.
+const FRAME_TYPE = "application/x-comicverse-frame";
+const MIME_BY_CODE = { 1: "image/webp", 2: "image/jpeg", 3: "image/png" };
+
+const decodePageFrame = (buffer) => {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    const text = new TextDecoder();
+    if (text.decode(bytes.subarray(0, 4)) !== "CVLB" || view.getUint8(4) !== 1) {
+        throw new Error("Not a ComicVerse library frame");
+    }
+    let pos = 8;
+    const readStr = (wide) => {
+        const length = wide ? view.getUint16(pos, true) : view.getUint8(pos);
+        pos += wide ? 2 : 1;
+        const value = text.decode(bytes.subarray(pos, pos + length));
+        pos += length;
+        return value;
+    };
+    const node_id = readStr(true);
+    const total = view.getUint32(pos, true);
+    const offset = view.getUint32(pos + 4, true);
+    pos += 8;
+    const selected = [];
+    for (let n = view.getUint8(pos++); n > 0; n--) selected.push(readStr(false));
+    const count = view.getUint16(pos, true);
+    pos += 2;
+    const items = [];
+    for (let i = 0; i < count; i++) {
+        const id = readStr(false);
+        items.push({
+            id,
+            w: view.getUint16(pos, true),
+            h: view.getUint16(pos + 2, true),
+            width: view.getUint32(pos + 4, true),
+            height: view.getUint32(pos + 8, true),
+            near_duplicate: (view.getUint8(pos + 12) & 1) === 1,
+            mime: MIME_BY_CODE[view.getUint8(pos + 13)] || "image/png",
+            length: view.getUint32(pos + 14, true),
+        });
+        pos += 18;
+    }
+    for (const item of items) {
+        item.blobURL = URL.createObjectURL(new Blob([bytes.subarray(pos, pos + item.length)], { type: item.mime }));
+        pos += item.length;
+    }
+    return { node_id, total, offset, selected, items };
+};
+
+const revokePage = (thumbs) => {
+    (thumbs || []).forEach((img) => {
+        if (img.originalData?.blobURL) URL.revokeObjectURL(img.originalData.blobURL);
+    });
+};
+
+// Delete / select / reorder assets in the node's server-side library without queueing the prompt.
+// The server answers with a preview event; resolves false when it has no library for this node yet.
+const libraryAction = async (node, action, ids, extra = {}) => {
+    try {
+        const response = await fetch(libraryURL(node, action), {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ ids, ...extra }),
+        });
+        return response.ok;
+    } catch (e) {
+        return false;
+    }
+};
+
+const makeThumb = (node, t) => {
+    const img = new Image();
+    img.onload = () => node.setDirtyCanvas(true, false);
+    img.src = t.blobURL || assetURL(t.id, "thumb");
+    img.originalData = t;
+    return img;
+};
+
+// Drop cached pages (after any library change); visible ones are fetched again on the next draw
+const invalidatePages = (node) => {
+    node.comicversePages?.forEach(revokePage);
+    node.comicversePages = new Map();
+    node.comicverseFetching = new Set();
+    node.comicverseGeneration = (node.comicverseGeneration || 0) + 1;
+    node.setDirtyCanvas(true, true);
+};
+
+const fetchPage = async (node, page) => {
+    if (node.comicverseFetching.has(page)) return;
+    node.comicverseFetching.add(page);
+    const generation = node.comicverseGeneration;
+    try {
+        const query = new URLSearchParams({ offset: page * PAGE_SIZE, limit: PAGE_SIZE, sort: node.comicverseSort });
+        let data = null;
+        if (node.comicverseBinaryFrames !== false) {
+            const response = await fetch(`${libraryURL(node, "list")}?${query}&format=binary`);
+            if (!response.ok) return;
+            if (response.headers.get("Content-Type")?.startsWith(FRAME_TYPE)) {
+                data = decodePageFrame(await response.arrayBuffer());
+            } else {
+                node.comicverseBinaryFrames = false; // older server: stay on JSON
+            }
+        }
+        if (!data) {
+            const response = await fetch(`${libraryURL(node, "list")}?${query}`);
+            if (!response.ok) return;
+            data = await response.json();
+        }
+        if (generation !== node.comicverseGeneration) { // library changed meanwhile
+            revokePage((data.items || []).map(t => ({ originalData: t })));
+            return;
+        }
+        node.comicverseTotal = data.total;
+        node.comicversePages.set(page, (data.items || []).map(t => makeThumb(node, t)));
+        // Keep only the most recently fetched pages
+        while (node.comicversePages.size > MAX_PAGES) {
+            const oldest = node.comicversePages.keys().next().value;
+            revokePage(node.comicversePages.get(oldest));
+            node.comicversePages.delete(oldest);
+        }
+        node.setDirtyCanvas(true, false);
+    } catch (e) {
+        // leave the cells as placeholders; the next draw retries
+    } finally {
+        if (generation === node.comicverseGeneration) node.comicverseFetching.delete(page);
+    }
+};
+
+// Thumbnails for library positions [start, start + count); null while their page is loading
+const visibleThumbs = (node, start, count) => {
+    const end = Math.min(node.comicverseTotal || 0, start + count);
+    const thumbs = [];
+    for (let i = start; i < end; i++) {
+        const page = Math.floor(i / PAGE_SIZE);
+        const items = node.comicversePages.get(page);
+        if (!items) fetchPage(node, page);
+        thumbs.push(items ? (items[i % PAGE_SIZE] || null) : null);
+    }
+    return thumbs;
+};
+
+const gridLayout = (node) => {
+    const padding = 6;
+    const cell = 84;
+    const cols = 3; // limit to 3 columns
+    // Calculate actual widgets bottom position using last_y
+    const widgets = node.widgets || [];
+    const lastWidget = widgets[widgets.length - 1];
+    const widgetsH = lastWidget ? (lastWidget.last_y || 0) + 26 : 100;
+    const footer = 18;
+    const y0 = widgetsH + padding;
+    const height = (node.size?.[1] || 0) - y0 - footer;
+    const rows = Math.max(2, Math.floor(height / (cell + padding)));
+    return { padding, cell, cols, rows, x0: padding, y0, footer };
+};
+
+// Keep the first visible position row-aligned and within the library
+const clampScroll = (node, scroll) => {
+    const { cols, rows } = gridLayout(node);
+    const last = Math.max(0, Math.ceil((node.comicverseTotal || 0) / cols) * cols - rows * cols);
+    node.comicverseScroll = Math.max(0, Math.min(last, Math.floor(scroll / cols) * cols));
+};
+
+const scrollBy = (node, delta) => {
+    clampScroll(node, (node.comicverseScroll || 0) + delta);
+    node.setDirtyCanvas(true, true);
+};
+
 app.registerExtension({
     name: "comicverse.library",
     async beforeRegisterNodeDef(nodeType, nodeData, app) {
@@ -12,7 +191,11 @@ app.registerExtension({
             const node = this;
             if (node.comfyClass !== "ComicAssetLibraryNode") return r;
 
-            node.comicverseThumbs = [];
+            node.comicverseTotal = 0;
+            node.comicverseScroll = 0;
+            node.comicverseSort = SORTS[0];
+            invalidatePages(node);
+            // Selection and pending deletions hold asset ids (content hashes), not positions
             node.comicverseSelected = [];
             node.comicversePendingDeletions = [];
             node.comicversePreviewOverlay = null;
@@ -42,10 +225,9 @@ app.registerExtension({
                 `;
 
                 const imgEl = document.createElement('img');
-                // Use preview image if available, otherwise fallback to thumbnail
-                if (img.originalData && img.originalData.preview) {
-                    // Use high-res preview image
-                    imgEl.src = img.originalData.preview;
+                // Fetch the high-res preview lazily, otherwise fallback to thumbnail
+                if (img.originalData && img.originalData.id) {
+                    imgEl.src = assetURL(img.originalData.id, "preview");
                 } else {
                     // Fallback to thumbnail if no preview available
                     imgEl.src = img.src;
@@ -99,19 +281,31 @@ app.registerExtension({
                 node.setDirtyCanvas(true, true);
             });
 
-            // Add Delete All button
-            node.addWidget("button", "Delete All", null, () => {
-                // Mark all images for deletion
-                const thumbs = node.comicverseThumbs || [];
-                node.comicversePendingDeletions = thumbs.map((_, i) => i);
+            // Add Delete All button (deletes the whole server-side library, not just the visible page)
+            node.addWidget("button", "Delete All", null, async () => {
                 node.comicverseSelected = [];
                 const w = node.widgets?.find(w => w.name === "selected_indices");
                 if (w) w.value = "";
-                const wDel = node.widgets?.find(w => w.name === "pending_deletions");
-                if (wDel) wDel.value = node.comicversePendingDeletions.join(",");
+                await libraryAction(node, "delete", [], { all: true });
                 node.setDirtyCanvas(true, true);
             });
 
+            // Paging and sort order of the virtualized grid
+            node.addWidget("button", "◀ Prev page", null, () => {
+                const { cols, rows } = gridLayout(node);
+                scrollBy(node, -rows * cols);
+            });
+            node.addWidget("button", "Next page ▶", null, () => {
+                const { cols, rows } = gridLayout(node);
+                scrollBy(node, rows * cols);
+            });
+            const sortWidget = node.addWidget("button", `Sort: ${node.comicverseSort}`, null, () => {
+                node.comicverseSort = SORTS[(SORTS.indexOf(node.comicverseSort) + 1) % SORTS.length];
+                sortWidget.name = `Sort: ${node.comicverseSort}`;
+                node.comicverseScroll = 0;
+                invalidatePages(node);
+            });
+
             setTimeout(() => {
                 const outWidget = node.widgets?.find(w => w.name === "output_count");
                 const desired = Math.max(1, Math.min(6, Number(outWidget?.value || 2)));
@@ -124,17 +318,11 @@ app.registerExtension({
             return r;
         };
 
-        // Hijack resize event to enforce minimum size
+        // Hijack resize event to enforce minimum size (the grid shows as many rows as fit)
         nodeType.prototype.onResize = function (newSize) {
             if (this.comfyClass === "ComicAssetLibraryNode") {
-                const padding = 6;
-                const cell = 84;
-                const cols = 3;
-                const widgets = this.widgets || [];
-                const lastWidget = widgets[widgets.length - 1];
-                const widgetsH = lastWidget ? (lastWidget.last_y || 0) + 26 : 100;
-                const rows = Math.ceil((this.comicverseThumbs || []).length / cols);
-                const desiredH = widgetsH + padding + rows * (cell + padding) + padding;
+                const { padding, cell, cols, y0, footer } = gridLayout(this);
+                const desiredH = y0 + 2 * (cell + padding) + footer;
                 const minW = padding + cols * (cell + padding) - padding;
                 if (!newSize) newSize = this.size || [minW, desiredH];
                 newSize[0] = Math.max(newSize[0] || minW, minW);
@@ -147,52 +335,41 @@ app.registerExtension({
             if (origOnDrawForeground) origOnDrawForeground.apply(this, arguments);
             const node = this;
             if (node.comfyClass !== "ComicAssetLibraryNode") return;
+            if (!node.comicverseTotal) return;
 
-            const thumbs = node.comicverseThumbs || [];
-            if (!thumbs.length) return;
-
-            const padding = 6;
-            const cell = 84;
-            const cols = 3; // limit to 3 columns
-            // Calculate actual widgets bottom position using last_y
-            const widgets = node.widgets || [];
-            const lastWidget = widgets[widgets.length - 1];
-            const widgetsH = lastWidget ? (lastWidget.last_y || 0) + 26 : 100;
-            const x0 = padding;
-            const y0 = widgetsH + padding;
-
-            const rows = Math.ceil(thumbs.length / cols);
-            const desiredH = y0 + rows * (cell + padding) + padding;
+            const { padding, cell, cols, rows, x0, y0, footer } = gridLayout(node);
             const minW = padding + cols * (cell + padding) - padding;
-
-            // Set size directly with real-time widget count
-            if (!node.size) node.size = [minW, desiredH];
+            const minH = y0 + 2 * (cell + padding) + footer;
+            if (!node.size) node.size = [minW, minH];
             else {
-                node.size[1] = Math.max(node.size[1], desiredH);
+                node.size[1] = Math.max(node.size[1], minH);
                 node.size[0] = Math.max(node.size[0], minW);
             }
 
+            // Only the visible window is materialized
+            clampScroll(node, node.comicverseScroll || 0); // after deletions / resizes
+            const start = node.comicverseScroll;
+            const thumbs = visibleThumbs(node, start, rows * cols);
+
             // Reset button stores
+            node.comicverseCells = [];
             node.comicverseDeleteBtns = [];
             node.comicverseZoomBtns = [];
 
-            // Iterate visually (0 to N-1) but draw data in reverse (N-1 to 0)
             for (let i = 0; i < thumbs.length; i++) {
-                // Visual position (i)
                 const row = Math.floor(i / cols);
                 const col = i % cols;
                 const x = x0 + col * (cell + padding);
                 const y = y0 + row * (cell + padding);
-
-                // Data index (reversed)
-                // If we have 5 items (0..4), visual 0 maps to data 4, visual 1 maps to data 3...
-                const dataIdx = thumbs.length - 1 - i;
-                const img = thumbs[dataIdx];
+                const img = thumbs[i];
+                const assetId = img?.originalData?.id;
 
                 ctx.fillStyle = "#222";
                 ctx.fillRect(x, y, cell, cell);
+                node.comicverseCells.push({ x, y, w: cell, h: cell, id: assetId });
+                if (!img) continue; // page still loading
 
-                if (img?.width && img?.height) {
+                if (img.complete && img.width && img.height) {
                     const scale = Math.min((cell - 8) / img.width, (cell - 8) / img.height);
                     const w = img.width * scale;
                     const h = img.height * scale;
@@ -201,8 +378,19 @@ app.registerExtension({
                     ctx.drawImage(img, ix, iy, w, h);
                 }
 
+                // Near-duplicate marker (orange corner) for images flagged by the similarity index
+                if (img.originalData?.near_duplicate) {
+                    ctx.fillStyle = "rgba(255, 150, 0, 0.9)";
+                    ctx.beginPath();
+                    ctx.moveTo(x, y);
+                    ctx.lineTo(x + 14, y);
+                    ctx.lineTo(x, y + 14);
+                    ctx.closePath();
+                    ctx.fill();
+                }
+
                 // Draw "pending deletion" overlay first
-                if (node.comicversePendingDeletions?.includes(dataIdx)) {
+                if (node.comicversePendingDeletions?.includes(assetId)) {
                     ctx.fillStyle = "rgba(180, 0, 0, 0.4)";  // Dark red overlay
                     ctx.fillRect(x, y, cell, cell);
                     ctx.strokeStyle = "rgba(180, 0, 0, 0.9)";  // Dark red cross
@@ -247,17 +435,24 @@ app.registerExtension({
                 ctx.lineTo(centerX + 6, centerY + 6);
                 ctx.stroke();
 
-                if (node.comicverseSelected?.includes(dataIdx)) {
+                if (node.comicverseSelected?.includes(assetId)) {
                     ctx.strokeStyle = "#3fa7ff";
                     ctx.lineWidth = 2;
                     ctx.strokeRect(x + 1, y + 1, cell - 2, cell - 2);
                 }
 
-                // Store button bounds for click detection, using REAL data index
-                // Note: We use push because we are iterating sequentially visually
-                node.comicverseDeleteBtns.push({ x: btnX, y: btnY, w: btnSize, h: btnSize, index: dataIdx });
-                node.comicverseZoomBtns.push({ x: zoomBtnX, y: zoomBtnY, w: zoomBtnSize, h: zoomBtnSize, index: dataIdx });
+                // Store button bounds for click detection
+                node.comicverseDeleteBtns.push({ x: btnX, y: btnY, w: btnSize, h: btnSize, id: assetId });
+                node.comicverseZoomBtns.push({ x: zoomBtnX, y: zoomBtnY, w: zoomBtnSize, h: zoomBtnSize, img });
             }
+
+            // Position in the library
+            const shownRows = Math.max(1, Math.ceil(thumbs.length / cols));
+            ctx.fillStyle = "#aaa";
+            ctx.font = "11px sans-serif";
+            ctx.textAlign = "left";
+            ctx.fillText(`${start + 1}-${start + thumbs.length} / ${node.comicverseTotal}`, x0, y0 + shownRows * (cell + padding) + 12);
+
             // Reset ctx styles to not affect ComfyUI widgets
             ctx.lineWidth = 1;
             ctx.strokeStyle = "";
@@ -268,134 +463,89 @@ app.registerExtension({
             if (origOnMouseDown) origOnMouseDown.apply(this, arguments);
             const node = this;
             if (node.comfyClass !== "ComicAssetLibraryNode") return;
+            if (!node.comicverseCells?.length) return;
 
-            const thumbs = node.comicverseThumbs || [];
-            if (!thumbs.length) return;
-
-            const padding = 6;
-            const cell = 84;
-            const cols = 3; // limit to 3 columns
-            const widgets = node.widgets || [];
-            const lastWidget = widgets[widgets.length - 1];
-            const widgetsH = lastWidget ? (lastWidget.last_y || 0) + 26 : 100;
-            const x0 = padding;
-            const y0 = widgetsH + padding;
+            const hit = (b) => pos[0] >= b.x && pos[0] <= b.x + b.w && pos[1] >= b.y && pos[1] <= b.y + b.h;
 
             // Check if clicking on delete button first
-            if (node.comicverseDeleteBtns) {
-                for (let btn of node.comicverseDeleteBtns) {
-                    if (pos[0] >= btn.x && pos[0] <= btn.x + btn.w &&
-                        pos[1] >= btn.y && pos[1] <= btn.y + btn.h) {
-                        // Delete button clicked - toggle pending deletion mark
-                        const idx = node.comicversePendingDeletions.indexOf(btn.index);
-                        if (idx === -1) {
-                            node.comicversePendingDeletions.push(btn.index);
-                        } else {
-                            node.comicversePendingDeletions.splice(idx, 1);
-                        }
-                        const wDel = node.widgets?.find(w => w.name === "pending_deletions");
-                        if (wDel) {
-                            wDel.value = node.comicversePendingDeletions.join(",");
-                        }
-                        node.setDirtyCanvas(true, true);
-                        return; // Prevent thumbnail selection
+            for (let btn of node.comicverseDeleteBtns || []) {
+                if (!hit(btn)) continue;
+                // Delete button clicked - delete on the server, or toggle the pending deletion mark
+                if (!btn.id) return;
+                const togglePending = () => {
+                    const idx = node.comicversePendingDeletions.indexOf(btn.id);
+                    if (idx === -1) {
+                        node.comicversePendingDeletions.push(btn.id);
+                    } else {
+                        node.comicversePendingDeletions.splice(idx, 1);
+                    }
+                    const wDel = node.widgets?.find(w => w.name === "pending_deletions");
+                    if (wDel) {
+                        wDel.value = node.comicversePendingDeletions.join(",");
                     }
+                    node.setDirtyCanvas(true, true);
+                };
+                if (node.comicversePendingDeletions.includes(btn.id)) {
+                    togglePending();
+                } else {
+                    libraryAction(node, "delete", [btn.id]).then((ok) => { if (!ok) togglePending(); });
                 }
+                return; // Prevent thumbnail selection
             }
 
             // Check if clicking on zoom/preview button
-            if (node.comicverseZoomBtns) {
-                for (let btn of node.comicverseZoomBtns) {
-                    if (pos[0] >= btn.x && pos[0] <= btn.x + btn.w &&
-                        pos[1] >= btn.y && pos[1] <= btn.y + btn.h) {
-                        // Zoom button clicked - show preview overlay
-                        const thumbs = node.comicverseThumbs || [];
-                        if (thumbs[btn.index]) {
-                            node._showImagePreview(thumbs[btn.index], btn.index);
-                        }
-                        return; // Prevent thumbnail selection
-                    }
-                }
+            for (let btn of node.comicverseZoomBtns || []) {
+                if (!hit(btn)) continue;
+                // Zoom button clicked - show preview overlay
+                node._showImagePreview(btn.img);
+                return; // Prevent thumbnail selection
             }
 
-            const x = pos[0] - x0;
-            const y = pos[1] - y0;
-            if (x < 0 || y < 0) return;
-            const col = Math.floor(x / (cell + padding));
-            const row = Math.floor(y / (cell + padding));
-            if (col < 0 || row < 0) return;
-
-            // Visual index
-            const visualIdx = row * cols + col;
+            const cellHit = node.comicverseCells.find(hit);
+            const assetId = cellHit?.id;
+            if (!assetId) return;
 
-            if (visualIdx >= 0 && visualIdx < thumbs.length) {
-                // Map visual index to data index (reversed)
-                const dataIdx = thumbs.length - 1 - visualIdx;
+            const sel = node.comicverseSelected || [];
+            const i = sel.indexOf(assetId);
 
-                const sel = node.comicverseSelected || [];
-                const i = sel.indexOf(dataIdx);
-
-                // Get dynamic limit from output_count widget
-                const outWidget = node.widgets?.find(w => w.name === "output_count");
-                const limit = Math.max(1, Math.min(6, Number(outWidget?.value || 2)));
+            // Get dynamic limit from output_count widget
+            const outWidget = node.widgets?.find(w => w.name === "output_count");
+            const limit = Math.max(1, Math.min(6, Number(outWidget?.value || 2)));
 
-                if (i >= 0) {
-                    // Deselecting is always allowed
-                    sel.splice(i, 1);
-                } else {
-                    // Selecting: enforce limit with FIFO (replace oldest)
-                    while (sel.length >= limit) {
-                        sel.shift(); // Remove the first (oldest) item
-                    }
-                    sel.push(dataIdx);
+            if (i >= 0) {
+                // Deselecting is always allowed
+                sel.splice(i, 1);
+            } else {
+                // Selecting: enforce limit with FIFO (replace oldest)
+                while (sel.length >= limit) {
+                    sel.shift(); // Remove the first (oldest) item
                 }
-
-                node.comicverseSelected = sel;
-                const w = node.widgets?.find(w => w.name === "selected_indices");
-                if (w) w.value = sel.join(",");
-                node.setDirtyCanvas(true, true);
+                sel.push(assetId);
             }
+
+            node.comicverseSelected = sel;
+            const w = node.widgets?.find(w => w.name === "selected_indices");
+            if (w) w.value = sel.join(",");
+            node.setDirtyCanvas(true, true);
+            // Keep the server-side selection (used for eviction pinning and sorting) in sync
+            libraryAction(node, "select", sel.slice());
         };
     },
     async setup(app) {
         app.api.addEventListener("comicverse.library.previews", (event) => {
-            const { mode, thumbs, adds, removes, selected } = event.detail || {};
+            const { node_id, count, selected, executed } = event.detail || {};
             const graph = app.graph;
             if (!graph) return;
             const nodes = graph._nodes?.filter(n => n.comfyClass === "ComicAssetLibraryNode") || [];
             nodes.forEach((target) => {
-                const applyAdd = (t) => {
-                    const img = new Image();
-                    img.src = t.data;
-                    img.originalData = t;
-                    (target.comicverseThumbs || (target.comicverseThumbs = [])).push(img);
-                };
+                // Events name their node; "global" libraries (no unique_id) apply to all
+                if (node_id && node_id !== "global" && String(target.id) !== String(node_id)) return;
 
-                if (mode === "delta") {
-                    // Apply removals first (descending indices)
-                    const toRemove = Array.isArray(removes) ? removes.slice().sort((a, b) => b - a) : [];
-                    toRemove.forEach((idx) => {
-                        if (Array.isArray(target.comicverseThumbs) && idx >= 0 && idx < target.comicverseThumbs.length) {
-                            target.comicverseThumbs.splice(idx, 1);
-                        }
-                    });
-                    // Apply additions (append)
-                    (adds || []).forEach(applyAdd);
-                } else {
-                    // Full replace
-                    const incoming = (thumbs || []).map((t) => {
-                        const img = new Image();
-                        img.src = t.data;
-                        img.originalData = t;
-                        return img;
-                    });
-                    target.comicverseThumbs = incoming;
-                }
-                // Hard cap to avoid unbounded growth
-                if (target.comicverseThumbs.length > 30) {
-                    target.comicverseThumbs.splice(0, target.comicverseThumbs.length - 30);
-                }
-                // Use backend-adjusted selected indices (backend already adjusted for deletions)
+                // Events only carry counts and ids; visible pages are fetched again on the next draw
+                target.comicverseTotal = Number(count) || 0;
+                invalidatePages(target);
+
+                // Use the backend's resolved selection (asset ids still in the library)
                 if (Array.isArray(selected)) {
                     target.comicverseSelected = selected.slice(0, 6);
                 } else {
@@ -404,14 +554,15 @@ app.registerExtension({
                 const w = target.widgets?.find(w => w.name === "selected_indices");
                 if (w) w.value = (target.comicverseSelected || []).join(",");
 
-                // Clear pending deletions after workflow execution
-                target.comicversePendingDeletions = [];
-                const wDel = target.widgets?.find(w => w.name === "pending_deletions");
-                if (wDel) wDel.value = "";
+                // Pending deletions are applied by an execution only; select/delete/reorder
+                // route events must keep the ones marked while the library was offline
+                if (executed) {
+                    target.comicversePendingDeletions = [];
+                    const wDel = target.widgets?.find(w => w.name === "pending_deletions");
+                    if (wDel) wDel.value = "";
+                }
             });
             app.graph?.setDirtyCanvas(true, true);
         });
     },
 });
-
-
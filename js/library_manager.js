@@ -63,10 +63,16 @@ const state = {
     isSaving: false,
 };
 
+// Weighted rows ({"text": ..., "p": 3}) are edited as "关键词 ×3"
+const WEIGHT_SUFFIX = /\s*×\s*(\d+(?:\.\d+)?)\s*$/;
+
 function formatEntryForInput(entry) {
     if (Array.isArray(entry)) {
         return entry.join("，");
     }
+    if (entry && typeof entry === "object") {
+        return `${formatEntryForInput(entry.text)} ×${entry.p ?? 1}`;
+    }
     return String(entry ?? "");
 }
 
@@ -74,6 +80,12 @@ function parseInputLine(line) {
     if (!line) {
         return null;
     }
+    let weight = null;
+    const weightMatch = line.match(WEIGHT_SUFFIX);
+    if (weightMatch) {
+        weight = Number(weightMatch[1]);
+        line = line.slice(0, weightMatch.index);
+    }
     const normalized = line.replace(/,/g, "，").trim();
     if (!normalized) {
         return null;
@@ -82,10 +94,11 @@ function parseInputLine(line) {
     if (parts.length === 0) {
         return null;
     }
-    if (parts.length === 1) {
-        return parts[0];
+    const text = parts.length === 1 ? parts[0] : parts;
+    if (weight !== null && weight !== 1) {
+        return { text, p: weight };
     }
-    return parts;
+    return text;
 }
 
 function setStatus(message, tone = "info") {
@@ -165,11 +178,7 @@ function handleEntryCommit(index, rawValue, inputEl) {
         state.currentEntries.splice(index, 1);
         renderEditor();
     } else {
-        const same =
-            Array.isArray(parsed) && Array.isArray(existing)
-                ? parsed.length === existing.length &&
-                parsed.every((value, idx) => value === existing[idx])
-                : !Array.isArray(parsed) && !Array.isArray(existing) && parsed === existing;
+        const same = JSON.stringify(parsed) === JSON.stringify(existing);
         if (same) {
             return;
         }
@@ -345,7 +354,7 @@ function renderEditor() {
         input.type = "text";
         input.className = "cv-lm__entry-input";
         input.value = formatEntryForInput(entry);
-        input.placeholder = "关键词按「，」分隔";
+        input.placeholder = "关键词按「，」分隔，末尾「×3」设置抽取权重";
 
         input.addEventListener("keydown", (event) => {
             if (event.key === "Enter" && !event.shiftKey) {
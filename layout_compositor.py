@@ -0,0 +1,157 @@
+"""
+Page compositor for Layout Template Selector templates.
+
+``compose_pages`` renders an IMAGE batch into finished comic pages: panels are
+filled in template order, ``grid_count`` images per page. Work is vectorized
+over pages: the compiled layout (see layout_templates) supplies each panel's
+rect and sampling grid, then each panel slot is resampled for every page with
+a single ``grid_sample`` call and written, or alpha-composited, onto the
+background-filled pages. ``compose_page`` builds one page from images of mixed
+sizes, sampling only the panel each image fills.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Sequence, Union
+
+import torch
+import torch.nn.functional as F
+
+try:
+    from .layout_templates import PANEL_FITS, compile_layout, validate_cells
+except ImportError:  # loaded as a top-level module (tests)
+    from layout_templates import PANEL_FITS, compile_layout, validate_cells
+
+# Parsed template_config strings; callers treat the returned dicts as read-only
+_PARSED_CONFIGS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_PARSED_LOCK = threading.Lock()
+_MAX_PARSED = 32
+
+
+def parse_template(template: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Decode and validate a ``template_config`` (JSON string or dict); strings are memoized."""
+    if not isinstance(template, str):
+        return _validate_config(template)
+    with _PARSED_LOCK:
+        parsed = _PARSED_CONFIGS.get(template)
+        if parsed is not None:
+            _PARSED_CONFIGS.move_to_end(template)
+            return parsed
+    try:
+        data = json.loads(template)
+    except ValueError as exc:
+        raise ValueError(f"template_config is not valid JSON: {exc}") from None
+    parsed = _validate_config(data)
+    with _PARSED_LOCK:
+        _PARSED_CONFIGS[template] = parsed
+        while len(_PARSED_CONFIGS) > _MAX_PARSED:
+            _PARSED_CONFIGS.popitem(last=False)
+    return parsed
+
+
+def _validate_config(data: Any) -> Dict[str, Any]:
+    if not isinstance(data, dict):
+        raise ValueError("template_config must be a JSON object.")
+    return dict(data, grid_info=validate_cells(data.get("grid_info"), source="template_config"))
+
+
+def _page_setup(template: Union[str, Dict[str, Any]], width: int, height: int, fit: str, device, memoize: bool = True):
+    if fit not in PANEL_FITS:
+        raise ValueError(f"Unknown panel fit '{fit}'. Available: {', '.join(PANEL_FITS)}")
+    template = parse_template(template)
+    margin = max(0, int(template.get("margin", 0)))
+    layout = compile_layout(template["grid_info"], int(width), int(height), margin, memoize=memoize)
+    bg = torch.tensor([float(v) / 255.0 for v in template.get("bg_color", (255, 255, 255))][:3],
+                      dtype=torch.float32, device=device)
+    return layout, bg
+
+
+def _prepare_sources(images: torch.Tensor, layout, fit: str) -> torch.Tensor:
+    """[B,H,W,C] -> float [B,C,h,w], pre-shrunk (antialiased) when all panels are much smaller."""
+    _, src_h, src_w, _ = images.shape
+    chw = images.to(torch.float32).permute(0, 3, 1, 2)
+    size = layout.source_size(src_h, src_w, fit)
+    if size != (src_h, src_w):
+        # so the bilinear grid_sample of _draw_panel does not alias
+        chw = F.interpolate(chw, size=size, mode="bilinear", align_corners=False, antialias=True)
+    return chw
+
+
+def _draw_panel(out: torch.Tensor, panel, sources: torch.Tensor) -> None:
+    """Resample ``sources`` ([n,C,h,w]) into ``panel`` on the first n pages of ``out``."""
+    n = sources.shape[0]
+    x0, y0, x1, y1 = panel.rect
+    pixels = F.grid_sample(sources, panel.grid.expand(n, -1, -1, -1),
+                           mode="bilinear", padding_mode="border", align_corners=False).permute(0, 2, 3, 1)
+    target = out[:n, y0:y1, x0:x1]
+    alpha = pixels[..., 3:] if sources.shape[1] == 4 else None
+    if panel.mask is not None:
+        alpha = panel.mask if alpha is None else alpha * panel.mask
+    if alpha is None:
+        target.copy_(pixels)
+    else:
+        target.mul_(1 - alpha).add_(pixels[..., :3] * alpha)
+
+
+def compose_pages(
+    images: torch.Tensor,
+    template: Union[str, Dict[str, Any]],
+    width: int,
+    height: int,
+    fit: str = "fill",
+) -> torch.Tensor:
+    """
+    Lay ``images`` ([B,H,W,C]) out on ``ceil(B / grid_count)`` pages of
+    ``width`` x ``height`` and return them as [P,height,width,3]. Panels past
+    the last image stay background-coloured; alpha is composited onto it.
+    """
+    if images.dim() == 3:
+        images = images.unsqueeze(0)
+    if images.shape[0] == 0:
+        raise ValueError("compose_pages needs at least one image.")
+    layout, bg = _page_setup(template, width, height, fit, images.device)
+    per_page = len(layout.rects)
+    chw = _prepare_sources(images, layout, fit)
+    pages = -(-images.shape[0] // per_page)
+
+    out = torch.empty((pages, layout.height, layout.width, 3), dtype=torch.float32, device=images.device)
+    out[:] = bg
+    for panel in layout.sampling(chw.shape[2], chw.shape[3], fit, images.device):
+        sources = chw[panel.slot::per_page]  # this slot of every page that has an image for it
+        if sources.shape[0]:
+            _draw_panel(out, panel, sources)
+    return out
+
+
+def compose_page(
+    images: Sequence[torch.Tensor],
+    template: Union[str, Dict[str, Any]],
+    width: int,
+    height: int,
+    fit: str = "fill",
+    *,
+    memoize: bool = True,
+) -> torch.Tensor:
+    """
+    One page from up to ``grid_count`` images of any sizes ([H,W,C] or
+    [1,H,W,C] each, slot order), as [1,height,width,3]. Each image gets the
+    sampling grid of its own panel only. ``memoize=False`` keeps a one-off
+    layout (e.g. a solved free grid) out of the compiled cache; pass such
+    templates as dicts, which parse_template does not memoize either.
+    """
+    images = [img if img.dim() == 4 else img.unsqueeze(0) for img in images]
+    device = images[0].device if images else torch.device("cpu")
+    layout, bg = _page_setup(template, width, height, fit, device, memoize)
+    if len(images) > len(layout.rects):
+        raise ValueError(f"compose_page got {len(images)} images for {len(layout.rects)} panels.")
+    out = torch.empty((1, layout.height, layout.width, 3), dtype=torch.float32, device=device)
+    out[:] = bg
+    for slot, image in enumerate(images):
+        chw = _prepare_sources(image, layout, fit)
+        panel = layout.panel_sampling(slot, chw.shape[2], chw.shape[3], fit, device)
+        if panel is not None:
+            _draw_panel(out, panel, chw)
+    return out
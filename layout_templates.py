@@ -0,0 +1,376 @@
+"""
+Page layout templates: file-based registry and compiled pixel layouts.
+
+Templates live in ``templates/*.json`` next to this module, one per file::
+
+    {"name": "4格经典", "order": 3, "grid_info": [{"x": 0, "y": 0, "w": 0.5, "h": 0.5}, ...]}
+
+Cells are fractions of the page. A cell may instead give a convex
+``"polygon": [[x, y], ...]`` (slanted panels); its x/y/w/h become the polygon's
+bounding box. Files are validated once and cached by (mtime, size), so a
+rescan only re-reads templates that changed on disk.
+
+``compile_layout`` turns a template's cells into integer pixel rectangles and
+panel masks for one page size and margin; polygon panels get anti-aliased
+coverage masks, rasterized in one vectorized pass per panel. Compiled layouts are memoized by
+(cells, width, height, margin) and also memoize their per-source-size
+sampling grids, so repeated page renders do no geometry work. One-off layouts
+(solved free grids) are compiled with ``memoize=False`` and sampled one panel
+at a time with ``panel_sampling``, which caches nothing.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# fill: scale to cover the panel and crop the overflow (centered)
+# fit: scale to fit inside the panel, the rest is background
+# stretch: scale both axes to the panel
+PANEL_FITS = ("fill", "fit", "stretch")
+
+Rect = Tuple[int, int, int, int]  # x0, y0, x1, y1 (exclusive ends)
+
+# Parsed template files keyed by absolute path: (mtime_ns, size, template)
+_TEMPLATE_FILE_CACHE: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+
+_COMPILED: "OrderedDict[Tuple[Any, ...], CompiledLayout]" = OrderedDict()
+_COMPILED_LOCK = threading.Lock()
+_MAX_COMPILED = 32
+_MAX_SAMPLINGS = 8  # per compiled layout: (source size, fit, device) combinations
+
+
+def _get_template_dir() -> Path:
+    return Path(__file__).resolve().parent / "templates"
+
+
+def _validate_polygon(points: Any, *, where: str) -> List[List[float]]:
+    """A convex polygon of >= 3 page-fraction vertices, as floats."""
+    if not isinstance(points, list) or len(points) < 3 or any(
+        not isinstance(p, (list, tuple)) or len(p) != 2
+        or any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in p)
+        for p in points
+    ):
+        raise ValueError(f"{where}: 'polygon' must be a list of at least 3 [x, y] points.")
+    poly = [[float(x), float(y)] for x, y in points]
+    if any(not (-1e-6 <= v <= 1 + 1e-6) for p in poly for v in p):
+        raise ValueError(f"{where}: polygon points must lie inside the page (fractions 0..1).")
+    turns = []
+    for i in range(len(poly)):
+        (ax, ay), (bx, by), (cx, cy) = poly[i - 2], poly[i - 1], poly[i]
+        turns.append((bx - ax) * (cy - by) - (by - ay) * (cx - bx))
+    if not (all(t >= -1e-12 for t in turns) or all(t <= 1e-12 for t in turns)) or _signed_area(poly) == 0:
+        raise ValueError(f"{where}: polygon must be convex with a non-zero area.")
+    return poly
+
+
+def _signed_area(poly: Sequence[Sequence[float]]) -> float:
+    return 0.5 * sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(poly, list(poly[1:]) + [poly[0]]))
+
+
+def validate_cells(cells: Any, *, source: str) -> List[Dict[str, Any]]:
+    """Check a ``grid_info`` list and return it with float coordinates."""
+    if not isinstance(cells, list) or not cells:
+        raise ValueError(f"{source}: 'grid_info' must be a non-empty list.")
+    normalized = []
+    for idx, cell in enumerate(cells):
+        if isinstance(cell, dict) and "polygon" in cell:
+            poly = _validate_polygon(cell["polygon"], where=f"{source}: grid_info[{idx}]")
+            xs, ys = [p[0] for p in poly], [p[1] for p in poly]
+            x, y = max(0.0, min(xs)), max(0.0, min(ys))
+            normalized.append({"x": x, "y": y, "w": min(1.0, max(xs)) - x, "h": min(1.0, max(ys)) - y, "polygon": poly})
+            continue
+        if not isinstance(cell, dict) or any(
+            isinstance(cell.get(k), bool) or not isinstance(cell.get(k), (int, float)) for k in ("x", "y", "w", "h")
+        ):
+            raise ValueError(f"{source}: grid_info[{idx}] needs numeric x, y, w, h (got {cell!r}).")
+        x, y, w, h = (float(cell[k]) for k in ("x", "y", "w", "h"))
+        if w <= 0 or h <= 0 or x < 0 or y < 0 or x + w > 1 + 1e-6 or y + h > 1 + 1e-6:
+            raise ValueError(f"{source}: grid_info[{idx}] must lie inside the page (fractions 0..1).")
+        normalized.append({"x": x, "y": y, "w": w, "h": h})
+    return normalized
+
+
+def validate_template(data: Any, *, source: str) -> Dict[str, Any]:
+    """Validate one template file's content and return the normalized template."""
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: a template must be a JSON object.")
+    name = data.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError(f"{source}: 'name' must be a non-empty string.")
+    cells = validate_cells(data.get("grid_info"), source=source)
+    order = data.get("order", 0)
+    return {
+        "name": name.strip(),
+        "order": order if isinstance(order, (int, float)) else 0,
+        "grid_count": len(cells),
+        "grid_info": cells,
+    }
+
+
+def _load_template_file(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    cache_key = str(path)
+    cached = _TEMPLATE_FILE_CACHE.get(cache_key)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    try:
+        template = validate_template(json.loads(path.read_text(encoding="utf-8")), source=path.name)
+    except (OSError, ValueError) as exc:
+        logger.warning("[ComicVerse] Skipping layout template %s: %s", path, exc)
+        _TEMPLATE_FILE_CACHE.pop(cache_key, None)
+        return None
+    _TEMPLATE_FILE_CACHE[cache_key] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
+
+
+def load_templates(directory: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Return the valid templates of ``directory`` (default ``templates/``) by name,
+    ordered by their ``order`` field. Invalid files are logged and skipped.
+    """
+    directory = Path(directory) if directory is not None else _get_template_dir()
+    paths = sorted(directory.glob("*.json")) if directory.is_dir() else []
+    live = {str(p) for p in paths}
+    for stale in [k for k in _TEMPLATE_FILE_CACHE if Path(k).parent == directory and k not in live]:
+        del _TEMPLATE_FILE_CACHE[stale]
+
+    loaded = [(t, p) for p in paths for t in [_load_template_file(p)] if t is not None]
+    loaded.sort(key=lambda item: (item[0]["order"], item[1].name))
+    templates: Dict[str, Dict[str, Any]] = {}
+    for template, path in loaded:
+        if template["name"] in templates:
+            logger.warning("[ComicVerse] Duplicate layout template name '%s' in %s, ignored", template["name"], path)
+            continue
+        templates[template["name"]] = template
+    return templates
+
+
+def template_stamp(name: str, directory: Optional[Path] = None) -> Optional[int]:
+    """mtime (ns) of the file defining template ``name``, or None when unknown."""
+    directory = Path(directory) if directory is not None else _get_template_dir()
+    for path, (mtime_ns, _, template) in _TEMPLATE_FILE_CACHE.items():
+        if template["name"] == name and Path(path).parent == directory:
+            return mtime_ns
+    return None
+
+
+def panel_rects(cells: Sequence[Dict[str, float]], width: int, height: int, margin: int) -> List[Rect]:
+    """
+    Fractional cells -> integer pixel rects (x0, y0, x1, y1), exclusive ends.
+
+    Cells tile the page inset by ``margin`` / 2 and are inset by ``margin`` / 2
+    themselves, so the gutters between panels and the page border are all
+    ``margin`` pixels wide.
+    """
+    half = margin / 2.0
+    inner_w, inner_h = width - margin, height - margin
+    rects = []
+    for cell in cells:
+        x0 = round(half + cell["x"] * inner_w + half)
+        y0 = round(half + cell["y"] * inner_h + half)
+        x1 = round(half + (cell["x"] + cell["w"]) * inner_w - half)
+        y1 = round(half + (cell["y"] + cell["h"]) * inner_h - half)
+        x0, y0 = max(0, min(width, x0)), max(0, min(height, y0))
+        rects.append((x0, y0, max(x0, min(width, x1)), max(y0, min(height, y1))))
+    return rects
+
+
+def polygon_mask(polygon: Sequence[Sequence[float]], rect: Rect, width: int, height: int, margin: int) -> torch.Tensor:
+    """
+    Anti-aliased [h,w] coverage of a page-fraction ``polygon`` over pixel ``rect``.
+
+    Vertices map to pixels like cell corners in ``panel_rects``, and the polygon
+    is inset by ``margin`` / 2, so neighbouring slanted panels get ``margin``-wide
+    gutters. Coverage is the signed distance of each pixel center to the inset
+    edges (min over edges, convex polygon), clamped to a one-pixel ramp.
+    """
+    half = margin / 2.0
+    inner_w, inner_h = width - margin, height - margin
+    pts = torch.tensor([[half + x * inner_w, half + y * inner_h] for x, y in polygon], dtype=torch.float64)
+    if _signed_area(polygon) < 0:
+        pts = pts.flip(0)  # positive shoelace area (y down): the normal (-dy, dx) points inside
+    start = pts
+    edge = pts.roll(-1, 0) - pts
+    length = edge.norm(dim=1).clamp(min=1e-9)
+    normal = torch.stack([-edge[:, 1], edge[:, 0]], dim=1) / length.unsqueeze(1)  # [E,2], pointing inside
+
+    x0, y0, x1, y1 = rect
+    xs = torch.arange(x0, x1, dtype=torch.float64) + 0.5
+    ys = torch.arange(y0, y1, dtype=torch.float64) + 0.5
+    # signed distance of every pixel center to every edge line: [E,h,w]
+    dist = (
+        (xs.view(1, 1, -1) - start[:, 0].view(-1, 1, 1)) * normal[:, 0].view(-1, 1, 1)
+        + (ys.view(1, -1, 1) - start[:, 1].view(-1, 1, 1)) * normal[:, 1].view(-1, 1, 1)
+    )
+    inside = dist.amin(dim=0) - half
+    return (inside + 0.5).clamp(0, 1).to(torch.float32)
+
+
+def _fit_rect(rect: Rect, src_h: int, src_w: int) -> Rect:
+    """The centered sub-rect of ``rect`` that the whole source fills at its own aspect ratio."""
+    x0, y0, x1, y1 = rect
+    pw, ph = x1 - x0, y1 - y0
+    scale = max(src_w / max(pw, 1), src_h / max(ph, 1))
+    cw = min(pw, max(1, round(src_w / scale)))
+    ch = min(ph, max(1, round(src_h / scale)))
+    x0 += (pw - cw) // 2
+    y0 += (ph - ch) // 2
+    return x0, y0, x0 + cw, y0 + ch
+
+
+def _panel_scale(rect: Rect, src_h: int, src_w: int, fit: str) -> Tuple[float, float]:
+    """Source pixels per page pixel along x and y ("fit" rects are already letterboxed: stretch)."""
+    x0, y0, x1, y1 = rect
+    ratio_x = src_w / max(x1 - x0, 1)
+    ratio_y = src_h / max(y1 - y0, 1)
+    if fit == "fill":
+        scale = min(ratio_x, ratio_y)  # cover the panel, crop the overflow
+        return scale, scale
+    return ratio_x, ratio_y
+
+
+def _panel_grid(rect: Rect, scale_x: float, scale_y: float, src_h: int, src_w: int, device) -> torch.Tensor:
+    """[1,h,w,2] grid_sample grid that centers the source in ``rect`` at the given scales."""
+    x0, y0, x1, y1 = rect
+    # page pixel center -> source pixel center, then to normalized coords (align_corners=False)
+    xs = (torch.arange(x1 - x0, dtype=torch.float32, device=device) + 0.5 - (x1 - x0) / 2) * scale_x + src_w / 2
+    ys = (torch.arange(y1 - y0, dtype=torch.float32, device=device) + 0.5 - (y1 - y0) / 2) * scale_y + src_h / 2
+    gx = (xs * (2.0 / src_w) - 1).view(1, -1).expand(len(ys), -1)
+    gy = (ys * (2.0 / src_h) - 1).view(-1, 1).expand(-1, len(xs))
+    return torch.stack([gx, gy], dim=-1).unsqueeze(0)
+
+
+@dataclass(frozen=True)
+class PanelSampling:
+    """Where one panel slot lands on the page and how to sample its source."""
+
+    slot: int  # index into the template's cells
+    rect: Rect
+    scale: Tuple[float, float]
+    grid: torch.Tensor  # [1,h,w,2]
+    mask: Optional[torch.Tensor]  # [h,w,1] coverage, None = the whole rect
+
+
+@dataclass(frozen=True)
+class CompiledLayout:
+    """
+    A template at one page size: integer panel rects plus per-panel coverage
+    masks over those rects (None for plain rectangles, which cover their rect).
+    """
+
+    width: int
+    height: int
+    margin: int
+    rects: Tuple[Rect, ...]
+    masks: Tuple[Optional[torch.Tensor], ...]
+    _samplings: "OrderedDict[Tuple[Any, ...], Tuple[PanelSampling, ...]]" = field(
+        default_factory=OrderedDict, compare=False, repr=False
+    )
+
+    def target_rects(self, src_h: int, src_w: int, fit: str) -> List[Rect]:
+        """Panel rects the sources are drawn into (letterboxed sub-rects for ``fit``)."""
+        if fit == "fit":
+            return [_fit_rect(rect, src_h, src_w) for rect in self.rects]
+        return list(self.rects)
+
+    def source_size(self, src_h: int, src_w: int, fit: str) -> Tuple[int, int]:
+        """
+        Size to pre-shrink sources to (antialiased) before sampling: along each
+        axis on which every panel is at least 2x smaller than the source, so
+        bilinear sampling does not alias.
+        """
+        scales = [_panel_scale(t, src_h, src_w, fit) for t in self.target_rects(src_h, src_w, fit)]
+        factor_x = min((sx for sx, _ in scales), default=1.0)
+        factor_y = min((sy for _, sy in scales), default=1.0)
+        return (
+            max(1, round(src_h / factor_y)) if factor_y >= 2 else src_h,
+            max(1, round(src_w / factor_x)) if factor_x >= 2 else src_w,
+        )
+
+    def _sample_panel(self, slot: int, target: Rect, src_h: int, src_w: int, fit: str, device) -> Optional[PanelSampling]:
+        x0, y0, x1, y1 = target
+        if x1 <= x0 or y1 <= y0:
+            return None
+        rect, mask = self.rects[slot], self.masks[slot]
+        scale = _panel_scale(target, src_h, src_w, fit)
+        if mask is not None:
+            mask = mask[y0 - rect[1]:y1 - rect[1], x0 - rect[0]:x1 - rect[0]].to(device).unsqueeze(-1)
+        return PanelSampling(slot, target, scale, _panel_grid(target, *scale, src_h, src_w, device), mask)
+
+    def panel_sampling(self, slot: int, src_h: int, src_w: int, fit: str, device=None) -> Optional[PanelSampling]:
+        """Sampling grid of panel ``slot`` alone, not memoized (None for an empty panel)."""
+        if fit not in PANEL_FITS:
+            raise ValueError(f"Unknown panel fit '{fit}'. Available: {', '.join(PANEL_FITS)}")
+        device = torch.device(device) if device is not None else torch.device("cpu")
+        rect = self.rects[slot]
+        target = _fit_rect(rect, src_h, src_w) if fit == "fit" else rect
+        return self._sample_panel(slot, target, src_h, src_w, fit, device)
+
+    def sampling(self, src_h: int, src_w: int, fit: str, device=None) -> Tuple[PanelSampling, ...]:
+        """Per-panel sampling grids for sources of ``src_h`` x ``src_w``, memoized."""
+        if fit not in PANEL_FITS:
+            raise ValueError(f"Unknown panel fit '{fit}'. Available: {', '.join(PANEL_FITS)}")
+        device = torch.device(device) if device is not None else torch.device("cpu")
+        key = (src_h, src_w, fit, str(device))
+        with _COMPILED_LOCK:
+            cached = self._samplings.get(key)
+            if cached is not None:
+                self._samplings.move_to_end(key)
+                return cached
+        targets = self.target_rects(src_h, src_w, fit)
+        panels = (self._sample_panel(slot, target, src_h, src_w, fit, device) for slot, target in enumerate(targets))
+        result = tuple(panel for panel in panels if panel is not None)
+        with _COMPILED_LOCK:
+            self._samplings[key] = result
+            while len(self._samplings) > _MAX_SAMPLINGS:
+                self._samplings.popitem(last=False)
+        return result
+
+
+def _build_layout(cells: Sequence[Dict[str, float]], width: int, height: int, margin: int) -> CompiledLayout:
+    rects = tuple(panel_rects(cells, width, height, margin))
+    masks = tuple(
+        polygon_mask(cell["polygon"], rect, width, height, margin) if cell.get("polygon") else None
+        for cell, rect in zip(cells, rects)
+    )
+    return CompiledLayout(width, height, margin, rects, masks)
+
+
+def compile_layout(
+    cells: Sequence[Dict[str, float]], width: int, height: int, margin: int, *, memoize: bool = True
+) -> CompiledLayout:
+    """
+    Pixel layout of ``cells`` on a ``width`` x ``height`` page, memoized unless
+    ``memoize`` is False (layouts that are used once).
+    """
+    width, height, margin = int(width), int(height), max(0, int(margin))
+    if not memoize:
+        return _build_layout(cells, width, height, margin)
+    key = (
+        tuple((c["x"], c["y"], c["w"], c["h"], tuple(map(tuple, c.get("polygon") or ()))) for c in cells),
+        width, height, margin,
+    )
+    with _COMPILED_LOCK:
+        layout = _COMPILED.get(key)
+        if layout is not None:
+            _COMPILED.move_to_end(key)
+            return layout
+    layout = _build_layout(cells, width, height, margin)
+    with _COMPILED_LOCK:
+        layout = _COMPILED.setdefault(key, layout)
+        while len(_COMPILED) > _MAX_COMPILED:
+            _COMPILED.popitem(last=False)
+    return layout
@@ -0,0 +1,198 @@
+"""
+Comic Assets Library API for ComicVerse custom nodes.
+
+Provides REST API endpoints for the asset library's server-side state:
+- Encoded thumbnails/previews by content hash (long-lived, ETag validated)
+- Encoded preview cache and preview event statistics
+- Paged listing of a node's library (offset/limit, newest or selected first),
+  as JSON or as one binary frame with the thumbnails inlined
+- Delete, select and reorder assets of a node's library without re-executing
+  the graph (a preview event is pushed; the next execution reads the new state)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+
+from aiohttp import web
+
+try:
+    from server import PromptServer
+except ImportError:  # pragma: no cover
+    PromptServer = None  # type: ignore
+
+
+from .comicverse_nodes import (
+    LIST_SORTS,
+    _PREVIEW_CACHE,
+    _PREVIEW_EVENTS,
+    _THUMB_CACHE,
+    _delete_library_assets,
+    _find_library_image,
+    _list_library_assets,
+    _list_library_frame,
+    _reorder_library_assets,
+    _select_library_assets,
+)
+from .library_frames import CONTENT_TYPE as _FRAME_CONTENT_TYPE
+from .library_render import VARIANTS, submit_render
+
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{16,128}$")
+# Encoded bytes for a digest never change, so browsers may keep them forever.
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+async def _mutate_library(request: web.Request, mutate, result_key: str, action: str) -> web.Response:
+    """
+    Run ``mutate(node_id, ids)`` for a JSON body ``{"ids": [...]}`` off the event
+    loop. ``{"all": true}`` passes ``ids=None`` (supported by delete).
+    """
+    try:
+        node_id = request.match_info.get("node_id", "")
+        data = await request.json()
+        if not isinstance(data, dict):
+            data = {}
+        ids = data.get("ids")
+        if data.get("all") is True and mutate is _delete_library_assets:
+            ids = None
+        elif not isinstance(ids, list) or not all(isinstance(d, str) and _DIGEST_RE.match(d.lower()) for d in ids):
+            return web.json_response(
+                {"error": "'ids' must be a list of asset hashes"},
+                status=400
+            )
+        else:
+            ids = [d.lower() for d in ids]
+
+        try:
+            # the library lock may be held by a running node; never block the loop on it
+            result = await asyncio.to_thread(mutate, node_id, ids)
+        except KeyError:
+            return web.json_response(
+                {"error": f"Library for node '{node_id}' not found"},
+                status=404
+            )
+
+        return web.json_response({"success": True, result_key: result})
+
+    except Exception as e:
+        return web.json_response(
+            {"error": f"Failed to {action} assets: {str(e)}"},
+            status=500
+        )
+
+
+# Register API routes if PromptServer is available
+if PromptServer is not None:
+    routes = PromptServer.instance.routes
+
+    @routes.get("/comicverse/library/asset/{digest}")
+    async def library_asset(request: web.Request) -> web.Response:
+        """Serve the encoded thumbnail (?size=thumb) or preview (default) of a library image."""
+        try:
+            digest = request.match_info.get("digest", "").lower()
+            size = request.query.get("size", "preview")
+            if not _DIGEST_RE.match(digest) or size not in VARIANTS:
+                return web.json_response(
+                    {"error": "Invalid asset hash or size"},
+                    status=400
+                )
+
+            etag = f'"{digest}-{size}"'
+            headers = {"ETag": etag, "Cache-Control": _IMMUTABLE}
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers=headers)
+
+            cache = _THUMB_CACHE if size == "thumb" else _PREVIEW_CACHE
+            # resolve the source even when the encoding is cached: the entry can be
+            # evicted before submit_render looks it up, and gone assets are a 404
+            image = await asyncio.to_thread(_find_library_image, digest)
+            if image is None:
+                return web.json_response(
+                    {"error": f"Asset '{digest}' not found"},
+                    status=404
+                )
+
+            encoded = await asyncio.wrap_future(submit_render(digest, image, size, cache))
+            return web.Response(body=encoded.data, content_type=encoded.mime, headers=headers)
+
+        except Exception as e:
+            return web.json_response(
+                {"error": f"Failed to load asset: {str(e)}"},
+                status=500
+            )
+
+    @routes.get("/comicverse/library/{node_id}/list")
+    async def library_list(request: web.Request) -> web.Response:
+        """One page of a node's library: ?offset=0&limit=30&sort=recent|selected[&format=binary]."""
+        try:
+            node_id = request.match_info.get("node_id", "")
+            try:
+                offset = int(request.query.get("offset", 0))
+                limit = int(request.query.get("limit", 30))
+            except ValueError:
+                return web.json_response(
+                    {"error": "offset and limit must be integers"},
+                    status=400
+                )
+            sort = request.query.get("sort", "recent")
+            if sort not in LIST_SORTS:
+                return web.json_response(
+                    {"error": f"Invalid sort '{sort}'"},
+                    status=400
+                )
+
+            binary = request.query.get("format", "json") == "binary"
+            try:
+                if binary:
+                    # renders any missing thumbnails, so keep it off the event loop
+                    frame = await asyncio.to_thread(_list_library_frame, node_id, offset, limit, sort)
+                else:
+                    page = await asyncio.to_thread(_list_library_assets, node_id, offset, limit, sort)
+            except KeyError:
+                return web.json_response(
+                    {"error": f"Library for node '{node_id}' not found"},
+                    status=404
+                )
+
+            if binary:
+                return web.Response(body=frame, content_type=_FRAME_CONTENT_TYPE)
+            return web.json_response(page)
+
+        except Exception as e:
+            return web.json_response(
+                {"error": f"Failed to list assets: {str(e)}"},
+                status=500
+            )
+
+    @routes.post("/comicverse/library/{node_id}/delete")
+    async def library_delete(request: web.Request) -> web.Response:
+        """Delete assets by id from a node's library."""
+        return await _mutate_library(request, _delete_library_assets, "removed", "delete")
+
+    @routes.post("/comicverse/library/{node_id}/select")
+    async def library_select(request: web.Request) -> web.Response:
+        """Replace a node's selection with the given asset ids (in output order)."""
+        return await _mutate_library(request, _select_library_assets, "selected", "select")
+
+    @routes.post("/comicverse/library/{node_id}/reorder")
+    async def library_reorder(request: web.Request) -> web.Response:
+        """Move the given asset ids to the front of a node's library, in order."""
+        return await _mutate_library(request, _reorder_library_assets, "order", "reorder")
+
+    @routes.get("/comicverse/library/cache_stats")
+    async def library_cache_stats(request: web.Request) -> web.Response:
+        """Hit/miss/eviction counters and byte usage of the caches, plus preview event counters."""
+        try:
+            return web.json_response({
+                "thumbs": _THUMB_CACHE.stats(),
+                "previews": _PREVIEW_CACHE.stats(),
+                "events": _PREVIEW_EVENTS.stats(),
+            })
+
+        except Exception as e:
+            return web.json_response(
+                {"error": f"Failed to read cache stats: {str(e)}"},
+                status=500
+            )
@@ -0,0 +1,111 @@
+"""
+Batched output helpers for the Comic Assets Library.
+
+``fit_batch`` turns the selected assets (any sizes, 3 or 4 channels) into one
+[K,H,W,C] tensor. Images of different sizes are placed on a shared padded
+canvas and resampled with a single ``grid_sample`` call, each with its own
+affine grid, which letterboxes or stretches every image in one vectorized
+pass. ``blank_image`` hands out cached zero tensors for unused output slots.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+import torch
+import torch.nn.functional as F
+
+FIT_MODES = ("letterbox", "stretch")
+
+_BLANKS: Dict[Tuple[Tuple[int, ...], torch.dtype, str], torch.Tensor] = {}
+_MAX_BLANKS = 16
+
+
+def blank_image(shape: Sequence[int], dtype: torch.dtype = torch.float32, device=None) -> torch.Tensor:
+    """
+    Return a cached black image of ``shape``. The tensor is shared between
+    calls; callers must treat it as read-only, like any other node output.
+    """
+    device = torch.device(device) if device is not None else torch.device("cpu")
+    key = (tuple(int(v) for v in shape), dtype, str(device))
+    blank = _BLANKS.get(key)
+    if blank is None:
+        if len(_BLANKS) >= _MAX_BLANKS:
+            _BLANKS.pop(next(iter(_BLANKS)))
+        blank = _BLANKS[key] = torch.zeros(key[0], dtype=dtype, device=device)
+    return blank
+
+
+def _match_channels(images: List[torch.Tensor], channels: int) -> List[torch.Tensor]:
+    out = []
+    for img in images:
+        if img.shape[-1] < channels:
+            alpha = torch.ones((*img.shape[:-1], channels - img.shape[-1]), dtype=img.dtype, device=img.device)
+            img = torch.cat([img, alpha], dim=-1)
+        out.append(img)
+    return out
+
+
+def fit_batch(images: Sequence[torch.Tensor], size: Tuple[int, int], fit: str = "letterbox") -> torch.Tensor:
+    """
+    Resize ``images`` ([1,H,W,C] or [H,W,C] each) to ``size`` = (height, width)
+    and stack them into [K,height,width,C]. ``letterbox`` keeps the aspect ratio
+    and pads with black; ``stretch`` fills the frame. Images missing an alpha
+    channel get an opaque one when any image has it.
+    """
+    if fit not in FIT_MODES:
+        raise ValueError(f"Unknown fit mode '{fit}'. Available: {', '.join(FIT_MODES)}")
+    if not images:
+        raise ValueError("fit_batch needs at least one image.")
+    out_h, out_w = int(size[0]), int(size[1])
+    imgs = [img[0] if img.dim() == 4 else img for img in images]
+    channels = max(img.shape[-1] for img in imgs)
+    imgs = _match_channels(imgs, channels)
+    ref = imgs[0]
+    dtype = ref.dtype if ref.dtype.is_floating_point else torch.float32
+    imgs = [img.to(device=ref.device, dtype=dtype) for img in imgs]
+
+    if all(tuple(img.shape[:2]) == (out_h, out_w) for img in imgs):
+        return torch.stack(imgs)
+
+    # Shared canvas, each image top-left aligned; edges are replicated into the
+    # padding so bilinear sampling at content borders does not bleed black in.
+    max_h = max(img.shape[0] for img in imgs)
+    max_w = max(img.shape[1] for img in imgs)
+    canvas = torch.empty((len(imgs), channels, max_h, max_w), dtype=dtype, device=ref.device)
+    sizes = torch.empty((len(imgs), 2), dtype=dtype, device=ref.device)
+    for i, img in enumerate(imgs):
+        h, w = img.shape[:2]
+        chw = img.permute(2, 0, 1)
+        canvas[i, :, :h, :w] = chw
+        canvas[i, :, :h, w:] = chw[:, :, -1:]
+        canvas[i, :, h:, :] = canvas[i, :, h - 1:h, :]
+        sizes[i, 0], sizes[i, 1] = h, w
+
+    h_i, w_i = sizes[:, 0], sizes[:, 1]
+    if fit == "letterbox":
+        scale = torch.minimum(out_h / h_i, out_w / w_i)
+        scale_y = scale_x = scale
+    else:
+        scale_y, scale_x = out_h / h_i, out_w / w_i
+
+    # Output normalized coords -> canvas normalized coords (align_corners=False):
+    # x_n = x_o * W / (s_x * W_canvas) + w_i / W_canvas - 1, likewise for y
+    theta = torch.zeros((len(imgs), 2, 3), dtype=dtype, device=ref.device)
+    theta[:, 0, 0] = out_w / (scale_x * max_w)
+    theta[:, 0, 2] = w_i / max_w - 1
+    theta[:, 1, 1] = out_h / (scale_y * max_h)
+    theta[:, 1, 2] = h_i / max_h - 1
+    grid = F.affine_grid(theta, [len(imgs), channels, out_h, out_w], align_corners=False)
+    out = F.grid_sample(canvas, grid, mode="bilinear", padding_mode="border", align_corners=False)
+
+    if fit == "letterbox":
+        # black bars outside each image's content box
+        half_w = (w_i * scale_x / out_w).view(-1, 1, 1)
+        half_h = (h_i * scale_y / out_h).view(-1, 1, 1)
+        xs = torch.linspace(-1 + 1 / out_w, 1 - 1 / out_w, out_w, dtype=dtype, device=ref.device).view(1, 1, -1)
+        ys = torch.linspace(-1 + 1 / out_h, 1 - 1 / out_h, out_h, dtype=dtype, device=ref.device).view(1, -1, 1)
+        inside = (xs.abs() <= half_w + 1e-6) & (ys.abs() <= half_h + 1e-6)
+        out = out * inside.unsqueeze(1).to(dtype)
+
+    return out.permute(0, 2, 3, 1).contiguous()
@@ -0,0 +1,148 @@
+"""
+Byte-budgeted LRU cache for encoded library thumbnails and previews.
+
+Entries are keyed by image digest. The cache evicts least-recently-used
+entries once the stored bytes exceed the budget, except for pinned keys
+(the selected and last-output images of each node's library), and keeps hit/miss/eviction
+counters for sizing.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Set
+
+
+def budget_from_env(name: str, default_mb: int) -> int:
+    """Read a cache budget in MB from the environment, returned in bytes."""
+    try:
+        return int(float(os.environ.get(name, default_mb)) * 1024 * 1024)
+    except ValueError:
+        return default_mb * 1024 * 1024
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    data = getattr(value, "data", None)
+    if isinstance(data, (bytes, bytearray)):
+        # EncodedImage and similar (bytes, metadata) records
+        return len(data)
+    return sys.getsizeof(value)
+
+
+class EncodedImageCache:
+    """Thread-safe LRU mapping of digest -> encoded image, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int, name: str = "") -> None:
+        self.name = name
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._pins: Dict[str, Set[Hashable]] = {}
+        self._pinned: Set[Hashable] = set()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        size = _sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes[key]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._bytes -= self._sizes.pop(key)
+            return self._entries.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def set_budget(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def pin(self, owner: str, keys: Iterable[Hashable]) -> None:
+        """Replace the set of keys pinned by ``owner`` (e.g. a node's current library)."""
+        with self._lock:
+            self._pins[owner] = set(keys)
+            self._pinned = set().union(*self._pins.values())
+            self._evict()
+
+    def unpin(self, owner: str) -> None:
+        with self._lock:
+            if self._pins.pop(owner, None) is not None:
+                self._pinned = set().union(*self._pins.values())
+                self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "pinned": len(self._pinned & self._entries.keys()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _evict(self) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        # Walk from least to most recently used, skipping pinned keys.
+        for key in list(self._entries.keys()):
+            if self._bytes <= self.max_bytes:
+                break
+            if key in self._pinned:
+                continue
+            self._bytes -= self._sizes.pop(key)
+            del self._entries[key]
+            self.evictions += 1
+
@@ -0,0 +1,94 @@
+"""
+Background dispatcher for Comic Assets Library websocket events.
+
+The node hands over a payload builder and returns its tensors right away; a
+single worker thread builds and sends the payload. Updates for the same node
+that queue up before the worker gets to them are coalesced: only the latest
+builder runs, so back-to-back runs send the newest library state once. Every
+payload describes the complete current state, so dropping superseded ones loses
+nothing.
+
+Failures are logged and counted instead of being swallowed; the next update for
+the node sends the full state again.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PayloadBuilder = Callable[[], Optional[Dict[str, Any]]]
+
+
+class PreviewDispatcher:
+    """Coalescing, non-blocking sender of ``event`` payloads keyed by node."""
+
+    def __init__(
+        self,
+        send: Callable[[str, Dict[str, Any]], None],
+        event: str,
+    ) -> None:
+        self._send = send
+        self.event = event
+        self._pending: Dict[str, PayloadBuilder] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def submit(self, key: str, build: PayloadBuilder) -> None:
+        """Queue ``build`` for ``key``, replacing a builder for the same key that has not run yet."""
+        with self._cond:
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = build
+            self.submitted += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="comicverse-events", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far was sent (or failed). Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "submitted": self.submitted,
+                "sent": self.sent,
+                "coalesced": self.coalesced,
+                "failed": self.failed,
+                "pending": len(self._pending),
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                key, build = next(iter(self._pending.items()))
+                del self._pending[key]
+                self._busy = True
+            try:
+                payload = build()
+                if payload is not None:
+                    self._send(self.event, payload)
+                    with self._cond:
+                        self.sent += 1
+            except Exception:
+                with self._cond:
+                    self.failed += 1
+                    failed = self.failed
+                logger.warning("[ComicVerse] Failed to send %s for node %s (%d failures so far)",
+                               self.event, key, failed, exc_info=True)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,93 @@
+"""
+Eviction policies for the Comic Assets Library.
+
+A policy looks at the library after new images were added and returns the
+indices to drop. It never returns pinned indices (selected and recently output
+assets). The node removes the dropped assets by index and reports them by
+content-hash id, like deletions; selections are ids and need no remapping.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Set
+
+
+@dataclass
+class AssetStats:
+    """What a policy may know about one library asset."""
+
+    nbytes: int
+    last_used: int  # monotonic tick of the last selection (or insertion)
+
+
+class EvictionPolicy:
+    """Base policy: keep everything."""
+
+    def select(self, assets: Sequence[AssetStats], pinned: Set[int]) -> List[int]:
+        """Return ascending library indices to evict."""
+        return []
+
+
+class CountLimitPolicy(EvictionPolicy):
+    """Keep at most ``max_items`` assets, dropping the oldest unpinned ones first (FIFO)."""
+
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max(1, int(max_items))
+
+    def select(self, assets: Sequence[AssetStats], pinned: Set[int]) -> List[int]:
+        excess = len(assets) - self.max_items
+        evicted: List[int] = []
+        for idx in range(len(assets)):
+            if excess <= 0:
+                break
+            if idx in pinned:
+                continue
+            evicted.append(idx)
+            excess -= 1
+        return evicted
+
+
+class ByteBudgetPolicy(EvictionPolicy):
+    """
+    Keep the library within ``max_bytes`` (and ``max_items``), evicting the least
+    recently selected unpinned assets first.
+    """
+
+    def __init__(self, max_bytes: int, max_items: int) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_items = max(1, int(max_items))
+
+    def select(self, assets: Sequence[AssetStats], pinned: Set[int]) -> List[int]:
+        total = sum(a.nbytes for a in assets)
+        count = len(assets)
+        if total <= self.max_bytes and count <= self.max_items:
+            return []
+        candidates = sorted(
+            (idx for idx in range(count) if idx not in pinned),
+            key=lambda idx: (assets[idx].last_used, idx),
+        )
+        evicted: List[int] = []
+        for idx in candidates:
+            if total <= self.max_bytes and count <= self.max_items:
+                break
+            evicted.append(idx)
+            total -= assets[idx].nbytes
+            count -= 1
+        evicted.sort()
+        return evicted
+
+
+# name -> factory(max_items, max_bytes); extend to add policies selectable from the node
+EVICTION_POLICIES: Dict[str, Callable[[int, int], EvictionPolicy]] = {
+    "fifo": lambda max_items, max_bytes: CountLimitPolicy(max_items),
+    "memory_budget": lambda max_items, max_bytes: ByteBudgetPolicy(max_bytes, max_items),
+}
+
+
+def make_policy(name: str, *, max_items: int, max_bytes: int) -> EvictionPolicy:
+    try:
+        factory = EVICTION_POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown eviction policy '{name}'. Available: {', '.join(EVICTION_POLICIES)}") from None
+    return factory(max_items, max_bytes)
@@ -0,0 +1,115 @@
+"""
+Binary frames for Comic Assets Library thumbnail pages.
+
+A page of the library grid can be fetched as one binary frame instead of JSON
+entries plus one image request per thumbnail. The frame is a compact header
+followed by the raw WebP/JPEG/PNG bytes, which the browser turns into Blob
+URLs without any base64 or JSON work.
+
+Layout (little-endian):
+
+    magic "CVLB" | version u8 | op u8 | reserved u16
+    node_id: u16 length + utf-8
+    total u32 | offset u32
+    selected: u8 count, each u8 length + ascii id
+    entries: u16 count, each
+        u8 id length + ascii id
+        u16 w | u16 h | u32 width | u32 height   (thumbnail and original size)
+        u8 flags (bit 0: near duplicate) | u8 mime code | u32 data length
+    data: the encoded images, concatenated in entry order
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict, List, Sequence, Tuple
+
+MAGIC = b"CVLB"
+VERSION = 1
+OP_PAGE = 1
+CONTENT_TYPE = "application/x-comicverse-frame"
+
+MIME_CODES = {"image/webp": 1, "image/jpeg": 2, "image/png": 3}
+_MIME_BY_CODE = {code: mime for mime, code in MIME_CODES.items()}
+
+_HEAD = struct.Struct("<4sBBH")
+_ENTRY = struct.Struct("<HHIIBBI")
+FLAG_NEAR_DUPLICATE = 1
+
+
+def _short_str(value: str, fmt: str = "<B") -> bytes:
+    raw = value.encode("utf-8")
+    return struct.pack(fmt, len(raw)) + raw
+
+
+def encode_page_frame(
+    node_id: str,
+    total: int,
+    offset: int,
+    selected: Sequence[str],
+    entries: Sequence[Dict[str, Any]],
+    blobs: Sequence[Tuple[bytes, str]],
+) -> bytes:
+    """
+    Pack a page: ``entries`` as returned by the list endpoint (id, w, h, width,
+    height, near_duplicate) and ``blobs`` as (encoded bytes, mime) per entry.
+    """
+    if len(entries) != len(blobs):
+        raise ValueError("encode_page_frame needs one blob per entry.")
+    parts: List[bytes] = [
+        _HEAD.pack(MAGIC, VERSION, OP_PAGE, 0),
+        _short_str(node_id, "<H"),
+        struct.pack("<II", int(total), int(offset)),
+        struct.pack("<B", min(len(selected), 255)),
+    ]
+    parts.extend(_short_str(d) for d in list(selected)[:255])
+    parts.append(struct.pack("<H", len(entries)))
+    for entry, (data, mime) in zip(entries, blobs):
+        parts.append(_short_str(entry["id"]))
+        flags = FLAG_NEAR_DUPLICATE if entry.get("near_duplicate") else 0
+        parts.append(_ENTRY.pack(
+            int(entry["w"]), int(entry["h"]), int(entry["width"]), int(entry["height"]),
+            flags, MIME_CODES.get(mime, MIME_CODES["image/png"]), len(data),
+        ))
+    parts.extend(data for data, _ in blobs)
+    return b"".join(parts)
+
+
+def decode_page_frame(frame: bytes) -> Dict[str, Any]:
+    """Inverse of ``encode_page_frame`` (mirrors the frontend decoder; used by tests and benchmarks)."""
+    view = memoryview(frame)
+    magic, version, op, _ = _HEAD.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a ComicVerse library frame.")
+    pos = _HEAD.size
+
+    def _read_str(fmt: str = "<B") -> str:
+        nonlocal pos
+        (length,) = struct.unpack_from(fmt, view, pos)
+        pos += struct.calcsize(fmt)
+        value = bytes(view[pos:pos + length]).decode("utf-8")
+        pos += length
+        return value
+
+    node_id = _read_str("<H")
+    total, offset = struct.unpack_from("<II", view, pos)
+    pos += 8
+    (n_selected,) = struct.unpack_from("<B", view, pos)
+    pos += 1
+    selected = [_read_str() for _ in range(n_selected)]
+    (n_entries,) = struct.unpack_from("<H", view, pos)
+    pos += 2
+    items = []
+    for _ in range(n_entries):
+        asset_id = _read_str()
+        w, h, width, height, flags, mime_code, length = _ENTRY.unpack_from(view, pos)
+        pos += _ENTRY.size
+        items.append({
+            "id": asset_id, "w": w, "h": h, "width": width, "height": height,
+            "near_duplicate": bool(flags & FLAG_NEAR_DUPLICATE),
+            "mime": _MIME_BY_CODE.get(mime_code, "image/png"), "length": length,
+        })
+    for item in items:
+        item["data"] = bytes(view[pos:pos + item.pop("length")])
+        pos += len(item["data"])
+    return {"op": op, "node_id": node_id, "total": total, "offset": offset, "selected": selected, "items": items}
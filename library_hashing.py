@@ -0,0 +1,173 @@
+"""
+Content hashing for the Comic Assets Library.
+
+The library de-duplicates incoming images by digest. Digests are computed
+directly over the image's pixel buffer instead of an encoded PNG, which keeps
+the hot path free of any image codec work.
+
+ComfyUI hands a node the very same cached upstream tensors when a prompt is
+re-queued, so ``batch_digests`` remembers the digests of recently seen batches
+by tensor identity and skips the pixels entirely for an unchanged batch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import struct
+import threading
+import weakref
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import torch
+
+# Digests are persisted content ids (disk store manifests, asset ids held by the
+# frontend), so the algorithm is fixed: it must not depend on optional packages.
+DIGEST_ALGORITHM = "blake2b-128"
+
+
+def _new_hasher():
+    return hashlib.blake2b(digest_size=16)
+
+
+def _quantize(image: torch.Tensor) -> torch.Tensor:
+    """Map a float image in [0, 1] to the 8-bit values the user actually sees."""
+    if image.dtype == torch.uint8:
+        return image
+    return (image.clamp(0, 1) * 255).to(torch.uint8)
+
+
+def image_digest(image: torch.Tensor, *, quantize: bool = True) -> str:
+    """
+    Return a hex digest for a single image tensor of shape [1,H,W,C] or [H,W,C].
+
+    With ``quantize`` (the default) the digest covers the 8-bit pixel values, so
+    two float tensors that only differ below 8-bit precision are duplicates,
+    exactly like the previous PNG-based digest. With ``quantize=False`` the raw
+    float buffer is hashed as-is.
+
+    The shape and dtype are mixed into the digest so that buffers of equal length
+    but different geometry never collide.
+    """
+    if image.dim() == 4:
+        if image.shape[0] != 1:
+            raise ValueError(f"image_digest expects a single image, got batch of {image.shape[0]}.")
+        image = image[0]
+    if image.dim() != 3:
+        raise ValueError(f"image_digest expects [H,W,C], got shape {tuple(image.shape)}.")
+
+    pixels = _quantize(image) if quantize else image
+    array = pixels.detach().cpu().contiguous().numpy()
+
+    h, w, c = array.shape
+    hasher = _new_hasher()
+    hasher.update(struct.pack("<III", h, w, c))
+    hasher.update(array.dtype.str.encode("ascii"))
+    hasher.update(memoryview(array).cast("B"))
+    return hasher.hexdigest()
+
+
+def legacy_png_digest(image: torch.Tensor) -> str:
+    """The original PNG-encode-then-SHA256 digest, kept for benchmarking."""
+    from io import BytesIO
+    from PIL import Image
+
+    c = image.shape[-1]
+    img_uint8 = (image.reshape(image.shape[-3:]).clamp(0, 1) * 255).byte().cpu().numpy()
+    img = Image.fromarray(img_uint8, mode="RGBA" if c == 4 else "RGB")
+    bio = BytesIO()
+    img.save(bio, format="PNG")
+    return hashlib.sha256(bio.getvalue()).hexdigest()
+
+
+_MemoKey = Tuple[int, int, Tuple[int, ...], Tuple[int, ...], str, str, bool]
+
+
+class DigestMemo:
+    """
+    Per-batch digest cache keyed on tensor identity.
+
+    The key is (storage pointer, storage offset, shape, stride, dtype, device,
+    quantize). An entry holds a weak reference to the tensor it was computed
+    for and that tensor's version counter: while the tensor is alive its storage
+    cannot be reused, and any in-place write bumps the version (shared by all
+    views), so a hit is only returned for the same, unmodified pixels.
+
+    Inference tensors (ComfyUI runs nodes under ``torch.inference_mode()``) have
+    no version counter. They are matched by identity alone: outside inference
+    mode they cannot be written in place, and ComfyUI nodes do not modify their
+    inputs.
+    """
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[_MemoKey, Tuple[weakref.ref, Optional[int], List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(images: torch.Tensor, quantize: bool) -> _MemoKey:
+        return (
+            images.untyped_storage().data_ptr(),
+            images.storage_offset(),
+            tuple(images.shape),
+            tuple(images.stride()),
+            str(images.dtype),
+            str(images.device),
+            quantize,
+        )
+
+    @staticmethod
+    def _version(images: torch.Tensor) -> Optional[int]:
+        return None if images.is_inference() else images._version
+
+    def lookup(self, images: torch.Tensor, quantize: bool = True) -> Optional[List[str]]:
+        key = self._key(images, quantize)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                ref, version, digests = entry
+                if ref() is not None and self._version(images) == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(digests)
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def store(self, images: torch.Tensor, digests: List[str], quantize: bool = True) -> None:
+        key = self._key(images, quantize)
+        try:
+            ref = weakref.ref(images)
+        except TypeError:  # pragma: no cover - tensors are weak-referenceable
+            return
+        with self._lock:
+            self._entries[key] = (ref, self._version(images), list(digests))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_DIGEST_MEMO = DigestMemo()
+
+
+def batch_digests(images: torch.Tensor, *, quantize: bool = True, memo: Optional[DigestMemo] = _DIGEST_MEMO) -> List[str]:
+    """
+    Return ``image_digest`` of every image in a [B,H,W,C] batch.
+
+    An unchanged batch tensor seen before returns its cached digests without
+    reading the pixels; pass ``memo=None`` to always hash.
+    """
+    if memo is not None:
+        cached = memo.lookup(images, quantize)
+        if cached is not None:
+            return cached
+    digests = [image_digest(images[i:i + 1], quantize=quantize) for i in range(images.shape[0])]
+    if memo is not None:
+        memo.store(images, digests, quantize)
+    return digests
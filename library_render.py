@@ -0,0 +1,186 @@
+"""
+Thumbnail / preview render pipeline for the Comic Assets Library.
+
+Library images are shown in the frontend as a 96px thumbnail and, on demand,
+a preview of up to 1024px. Both are served over HTTP by content hash, so the
+websocket event only describes assets and the encoded bytes are produced here
+on request. Resizing and WebP encoding happen in Pillow, which releases the
+GIL, so renders run on a small bounded thread pool; concurrent requests for the
+same image share one render.
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Dict, List, MutableMapping, NamedTuple, Optional, Sequence, Tuple
+
+import torch
+
+THUMB_WIDTH = 96
+PREVIEW_MAX_DIM = 1024
+VARIANTS = ("thumb", "preview")
+RENDER_WORKERS = max(1, min(4, (os.cpu_count() or 1)))
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+_PENDING: Dict[Tuple[str, str], Future] = {}
+_PENDING_LOCK = threading.Lock()
+
+_EMPTY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8/x8AAwMB/ee1GfUAAAAASUVORK5CYII="
+)
+
+
+class EncodedImage(NamedTuple):
+    data: bytes
+    mime: str
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="comicverse-render")
+    return _EXECUTOR
+
+
+def encode_image(img, *, prefer_webp: bool, jpeg_ok: bool, quality: int = 80) -> EncodedImage:
+    """
+    Encode PIL.Image to bytes. Prefer WebP when available; fall back to JPEG (if no alpha)
+    or PNG.
+    """
+    buffer = BytesIO()
+    mode = img.mode
+    has_alpha = mode in ("RGBA", "LA") or ("transparency" in img.info)
+    # Try WebP first if requested
+    if prefer_webp:
+        try:
+            img.save(buffer, format="WEBP", quality=quality, method=4)
+            return EncodedImage(buffer.getvalue(), "image/webp")
+        except Exception:
+            buffer = BytesIO()
+            # fall through to JPEG/PNG
+    # Try JPEG if allowed and no alpha
+    if jpeg_ok and not has_alpha:
+        try:
+            # Ensure RGB for JPEG
+            rgb = img.convert("RGB") if img.mode != "RGB" else img
+            rgb.save(buffer, format="JPEG", quality=quality, optimize=True)
+            return EncodedImage(buffer.getvalue(), "image/jpeg")
+        except Exception:
+            buffer = BytesIO()
+    # Fallback PNG (supports alpha, lossless)
+    try:
+        img.save(buffer, format="PNG")
+        return EncodedImage(buffer.getvalue(), "image/png")
+    except Exception:
+        # As a last resort, return an empty 1x1 PNG
+        return EncodedImage(_EMPTY_PNG, "image/png")
+
+
+def thumb_size(w: int, h: int) -> Tuple[int, int]:
+    return THUMB_WIDTH, max(1, int(h * (THUMB_WIDTH / float(w))))
+
+
+def preview_size(w: int, h: int) -> Tuple[int, int]:
+    if w > h:
+        preview_w = min(PREVIEW_MAX_DIM, w)
+        return preview_w, max(1, int(h * preview_w / w))
+    preview_h = min(PREVIEW_MAX_DIM, h)
+    return max(1, int(w * preview_h / h)), preview_h
+
+
+def render_variant(image: torch.Tensor, variant: str) -> EncodedImage:
+    """tensor -> uint8 -> PIL -> resize -> WebP for one ``variant`` ("thumb" or "preview")."""
+    from PIL import Image
+
+    h, w, c = image.shape[1:]
+    size = thumb_size(w, h) if variant == "thumb" else preview_size(w, h)
+    if hasattr(image, "to_uint8"):
+        # disk-backed library entry, already 8-bit
+        img_uint8 = image.to_uint8()
+    else:
+        img_uint8 = (image[0].clamp(0, 1) * 255).byte().cpu().numpy()
+    img = Image.fromarray(img_uint8, mode='RGBA' if c == 4 else 'RGB')
+    if size != (w, h):
+        img = img.resize(size, Image.BILINEAR)
+    return encode_image(img, prefer_webp=True, jpeg_ok=(c == 3), quality=80)
+
+
+def submit_render(
+    digest: str,
+    image: torch.Tensor,
+    variant: str,
+    cache: MutableMapping[str, EncodedImage],
+) -> Future:
+    """
+    Return a future for the encoded ``variant`` of ``image``.
+
+    Cached encodings resolve immediately. Otherwise the render is queued on the
+    shared pool, and callers asking for the same (digest, variant) while it is in
+    flight get the same future. The result is stored in ``cache``.
+    """
+    cached = cache.get(digest)
+    if cached is not None:
+        done: Future = Future()
+        done.set_result(cached)
+        return done
+
+    job_key = (digest, variant)
+    with _PENDING_LOCK:
+        pending = _PENDING.get(job_key)
+        if pending is not None:
+            return pending
+
+        def _job() -> EncodedImage:
+            try:
+                encoded = render_variant(image, variant)
+                cache[digest] = encoded
+                return encoded
+            finally:
+                with _PENDING_LOCK:
+                    _PENDING.pop(job_key, None)
+
+        future = _get_executor().submit(_job)
+        _PENDING[job_key] = future
+        return future
+
+
+def describe_entries(
+    images: Sequence[torch.Tensor],
+    digests: Sequence[Optional[str]],
+    indices: Sequence[int],
+) -> List[Dict[str, Any]]:
+    """
+    Build thumbnail payload entries for ``images[i]`` for every ``i`` in ``indices``.
+
+    Entries carry the asset id (content digest), the thumbnail size and the
+    original size; the frontend fetches the encoded images by id.
+    """
+    entries: List[Dict[str, Any]] = []
+    for i in indices:
+        h, w = images[i].shape[1:3]
+        thumb_w, thumb_h = thumb_size(w, h)
+        entries.append({
+            "id": digests[i] if i < len(digests) else None,
+            "w": thumb_w,
+            "h": thumb_h,
+            "width": int(w),
+            "height": int(h),
+        })
+    return entries
+
+
+def warm_thumbnails(
+    images: Sequence[torch.Tensor],
+    digests: Sequence[Optional[str]],
+    indices: Sequence[int],
+    cache: MutableMapping[str, EncodedImage],
+) -> List[Future]:
+    """Queue thumbnail renders for ``indices`` without waiting, so the browser's fetches hit the cache."""
+    return [submit_render(digests[i], images[i], "thumb", cache) for i in indices if i < len(digests) and digests[i]]
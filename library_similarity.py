@@ -0,0 +1,147 @@
+"""
+Near-duplicate detection for the Comic Assets Library.
+
+Images are reduced to 64-bit DCT perceptual hashes (computed for a whole batch
+at once with torch) and indexed in a BK-tree, so "is there an asset within N
+bits of this one?" is answered without comparing against every asset.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+
+HASH_BITS = 64
+_DCT_SIZE = 32
+_LOW_FREQ = 8
+_DCT_MATRICES: Dict[Tuple[str, torch.dtype], torch.Tensor] = {}
+
+
+def _dct_matrix(device: torch.device, dtype: torch.dtype) -> torch.Tensor:
+    """Orthonormal DCT-II basis of size 32, cached per device/dtype."""
+    cache_key = (str(device), dtype)
+    matrix = _DCT_MATRICES.get(cache_key)
+    if matrix is None:
+        n = torch.arange(_DCT_SIZE, dtype=torch.float64)
+        k = n.view(-1, 1)
+        matrix = torch.cos(math.pi * (2 * n + 1) * k / (2 * _DCT_SIZE)) * math.sqrt(2.0 / _DCT_SIZE)
+        matrix[0] /= math.sqrt(2.0)
+        matrix = matrix.to(device=device, dtype=dtype)
+        _DCT_MATRICES[cache_key] = matrix
+    return matrix
+
+
+def perceptual_hashes(images: torch.Tensor) -> List[int]:
+    """
+    Compute a 64-bit DCT perceptual hash for every image in a [B,H,W,C] batch.
+
+    The batch is converted to luminance, area-downscaled to 32x32, transformed
+    with a 2-D DCT and the lowest 8x8 frequencies are thresholded at their median.
+    """
+    if images.dim() != 4 or images.shape[3] not in (3, 4):
+        raise ValueError(f"perceptual_hashes expects [B,H,W,C] with C=3 or 4, got {tuple(images.shape)}.")
+
+    rgb = images[..., :3].detach().float()
+    luma = (rgb * rgb.new_tensor([0.299, 0.587, 0.114])).sum(dim=-1, keepdim=True)
+    small = F.interpolate(luma.permute(0, 3, 1, 2), size=(_DCT_SIZE, _DCT_SIZE), mode="area")[:, 0]
+
+    dct = _dct_matrix(small.device, small.dtype)
+    coeffs = dct @ small @ dct.T
+    low = coeffs[:, :_LOW_FREQ, :_LOW_FREQ].reshape(coeffs.shape[0], -1)
+    bits = low > low.median(dim=1, keepdim=True).values
+
+    weights = torch.ones(HASH_BITS, dtype=torch.int64, device=bits.device) << torch.arange(
+        HASH_BITS, dtype=torch.int64, device=bits.device
+    )
+    packed = (bits.to(torch.int64) * weights).sum(dim=1)
+    mask = (1 << HASH_BITS) - 1
+    return [int(v) & mask for v in packed.cpu().tolist()]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance.
+
+    Values (e.g. asset digests) are attached to each hash. Removal marks the node
+    dead and the tree is rebuilt once dead nodes outnumber live ones.
+    """
+
+    __slots__ = ("_root", "_nodes", "_dead")
+
+    def __init__(self) -> None:
+        # node layout: [hash, value, alive, {distance: child}]
+        self._root: Optional[list] = None
+        self._nodes: Dict[Hashable, list] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, value: Hashable) -> bool:
+        return value in self._nodes
+
+    def hash_of(self, value: Hashable) -> Optional[int]:
+        node = self._nodes.get(value)
+        return node[0] if node is not None else None
+
+    def add(self, key: int, value: Hashable) -> None:
+        if value in self._nodes:
+            self.discard(value)
+        node = [key, value, True, {}]
+        self._nodes[value] = node
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = hamming_distance(key, current[0])
+            child = current[3].get(distance)
+            if child is None:
+                current[3][distance] = node
+                return
+            current = child
+
+    def discard(self, value: Hashable) -> None:
+        node = self._nodes.pop(value, None)
+        if node is None:
+            return
+        node[2] = False
+        self._dead += 1
+        if self._dead > len(self._nodes):
+            self._rebuild()
+
+    def search(self, key: int, radius: int) -> List[Tuple[int, Hashable]]:
+        """Return (distance, value) pairs within ``radius`` bits, nearest first."""
+        if self._root is None or radius < 0:
+            return []
+        found: List[Tuple[int, Hashable]] = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(key, node[0])
+            if node[2] and distance <= radius:
+                found.append((distance, node[1]))
+            for child_distance, child in node[3].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, key: int, radius: int) -> Optional[Tuple[int, Hashable]]:
+        found = self.search(key, radius)
+        return found[0] if found else None
+
+    def _rebuild(self) -> None:
+        live = [(node[0], node[1]) for node in self._nodes.values()]
+        self._root = None
+        self._nodes = {}
+        self._dead = 0
+        for key, value in live:
+            self.add(key, value)
@@ -0,0 +1,189 @@
+"""
+Compact image storage for the Comic Assets Library.
+
+Library images are kept as 8-bit pixels rather than float tensors: in memory
+as ``CompactImage`` (a detached, contiguous uint8 tensor, 1/4 the size of
+float32) or on disk through ``DiskAssetStore``.
+
+On disk, each node (by ``unique_id``) gets a directory holding one ``.npy`` file per
+asset (uint8, [H,W,C]) plus a small ``manifest.json`` with the library order.
+Assets are opened as read-only memory maps and only turned into tensors when
+they are actually selected, so a library can hold thousands of images without
+resident memory growing with it, and it survives a ComfyUI restart.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _get_store_dir() -> Path:
+    """Root directory for persisted libraries (ComfyUI user dir when available)."""
+    try:
+        import folder_paths  # ComfyUI
+
+        return Path(folder_paths.get_user_directory()) / "comicverse" / "asset_library"
+    except Exception:
+        return Path(__file__).resolve().parent / "asset_library"
+
+
+def _safe_key(key: str) -> str:
+    return re.sub(r"[^\w\-.]", "_", key or "global")
+
+
+def _quantize_hwc(image: torch.Tensor) -> torch.Tensor:
+    """[1,H,W,C] or [H,W,C] image -> new contiguous uint8 [H,W,C] tensor on the CPU."""
+    if image.dim() == 4:
+        image = image[0]
+    image = image.detach()
+    if image.dtype != torch.uint8:
+        image = (image.clamp(0, 1) * 255).round().to(torch.uint8)
+    # clone so the stored pixels never keep the producer's batch storage alive
+    return image.cpu().contiguous().clone()
+
+
+def _to_uint8_hwc(image: torch.Tensor) -> np.ndarray:
+    return _quantize_hwc(image).numpy()
+
+
+class CompactImage:
+    """
+    A library image held in memory as uint8 [H,W,C] plus the source dtype.
+
+    Mirrors the parts of the tensor interface the library uses (``shape`` is
+    [1,H,W,C]); conversion back to float happens only for selected outputs.
+    """
+
+    __slots__ = ("pixels", "dtype")
+
+    def __init__(self, pixels: torch.Tensor, dtype: torch.dtype = torch.float32) -> None:
+        self.pixels = pixels
+        self.dtype = dtype
+
+    @classmethod
+    def from_tensor(cls, image: torch.Tensor) -> "CompactImage":
+        dtype = image.dtype if image.dtype.is_floating_point else torch.float32
+        return cls(_quantize_hwc(image), dtype)
+
+    @property
+    def shape(self) -> torch.Size:
+        return torch.Size((1, *self.pixels.shape))
+
+    @property
+    def nbytes(self) -> int:
+        return self.pixels.numel()
+
+    def to_uint8(self) -> np.ndarray:
+        return self.pixels.numpy()
+
+    def to_tensor(self, dtype: Optional[torch.dtype] = None, device: Optional[torch.device] = None) -> torch.Tensor:
+        out = self.pixels.to(device=device, dtype=dtype or self.dtype) / 255.0
+        return out.unsqueeze(0)
+
+
+class MappedImage:
+    """
+    A library image stored on disk as uint8 [H,W,C].
+
+    Mirrors the parts of the tensor interface the library uses (``shape`` is
+    [1,H,W,C]) and converts to a float tensor only on request.
+    """
+
+    __slots__ = ("path", "shape")
+
+    def __init__(self, path: Path, shape: Sequence[int]) -> None:
+        self.path = Path(path)
+        h, w, c = (int(v) for v in shape)
+        self.shape = torch.Size((1, h, w, c))
+
+    @property
+    def nbytes(self) -> int:
+        _, h, w, c = self.shape
+        return h * w * c
+
+    def to_uint8(self) -> np.ndarray:
+        """Read-only memory map of the pixels, [H,W,C] uint8."""
+        return np.load(self.path, mmap_mode="r")
+
+    def to_tensor(self, dtype: torch.dtype = torch.float32, device: Optional[torch.device] = None) -> torch.Tensor:
+        pixels = torch.from_numpy(np.array(self.to_uint8()))
+        return (pixels.to(device=device, dtype=dtype) / 255.0).unsqueeze(0)
+
+
+class DiskAssetStore:
+    """Persisted asset files + manifest for one node's library."""
+
+    def __init__(self, root: Path, key: str) -> None:
+        self.directory = Path(root) / _safe_key(key)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def _asset_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.npy"
+
+    def load(self) -> Tuple[List[MappedImage], List[str]]:
+        """Return (images, digests) in library order; missing or corrupt files are skipped."""
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return [], []
+        if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+            return [], []
+
+        images: List[MappedImage] = []
+        digests: List[str] = []
+        for record in manifest.get("assets", []):
+            try:
+                digest = str(record["digest"])
+                shape = record["shape"]
+            except (KeyError, TypeError):
+                continue
+            path = self._asset_path(digest)
+            if path.exists():
+                images.append(MappedImage(path, shape))
+                digests.append(digest)
+        return images, digests
+
+    def put(self, digest: str, image) -> MappedImage:
+        """Persist ``image`` (tensor, CompactImage or MappedImage) as uint8 and return its mapped handle."""
+        path = self._asset_path(digest)
+        if isinstance(image, MappedImage) and image.path == path:
+            return image
+        if hasattr(image, "to_uint8"):
+            pixels = np.asarray(image.to_uint8())
+        else:
+            pixels = _to_uint8_hwc(image)
+        if not path.exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, pixels)
+            os.replace(tmp, path)
+        return MappedImage(path, pixels.shape)
+
+    def remove(self, digest: str) -> None:
+        try:
+            self._asset_path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+    def save_manifest(self, images: Sequence[MappedImage], digests: Sequence[str]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        assets: List[Dict[str, object]] = [
+            {"digest": digest, "shape": list(image.shape[1:]), "dtype": "uint8"}
+            for image, digest in zip(images, digests)
+        ]
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "assets": assets}), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
@@ -8,19 +8,25 @@ a dropdown menu for selection.
 from __future__ import annotations
 
 import json
+import math
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Sequence
+from typing import Any, Dict, List, Sequence, Union
 
 
 class PromptLibraryLoaderError(Exception):
     """Custom error so callers can distinguish parsing failures."""
 
 
+# A prompt row: a list of prompts, or {"text": [...], "p": weight} when it
+# carries a sampling weight other than 1
+PromptRow = Union[List[str], Dict[str, Any]]
+
+
 # Cache parsed prompt files keyed by absolute path. The cached value stores the
 # file mtime and the parsed prompt rows so we only incur IO when the file
 # changes.
-_PROMPT_FILE_CACHE: Dict[str, tuple[float, List[List[str]]]] = {}
+_PROMPT_FILE_CACHE: Dict[str, tuple[float, List[PromptRow]]] = {}
 
 
 # Get the library directory path
@@ -43,16 +49,36 @@ def _scan_library_files() -> List[str]:
     return [f.stem for f in json_files]
 
 
-def _normalize_prompt_entries(entries: Sequence[Any], *, source: str) -> List[List[str]]:
+def _normalize_prompt_entries(entries: Sequence[Any], *, source: str) -> List[PromptRow]:
     """Ensure the parsed prompt entries are a list of list of strings.
 
     Each prompt record should be a sequence of strings (a "prompt group").
-    Empty strings are filtered out. Raises PromptLibraryLoaderError if the
-    format is invalid.
+    Records may also be objects ``{"text": ..., "p": 3}`` giving the row a
+    sampling weight for random rolls; they stay objects only when ``p`` is
+    not 1. Empty strings are filtered out. Raises PromptLibraryLoaderError if
+    the format is invalid.
     """
 
-    normalized: List[List[str]] = []
+    normalized: List[PromptRow] = []
     for idx, record in enumerate(entries):
+        if isinstance(record, dict):
+            weight = record.get("p", 1)
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not math.isfinite(weight) or weight < 0:
+                raise PromptLibraryLoaderError(
+                    f"Invalid weight 'p' in '{source}' at index {idx}: must be a non-negative number."
+                )
+            text = record.get("text", "")
+            if isinstance(text, (str, int, float)):
+                text = [text]
+            elif not isinstance(text, Sequence):
+                raise PromptLibraryLoaderError(
+                    f"Unsupported 'text' in '{source}' at index {idx}: {type(text).__name__}"
+                )
+            texts = [str(prompt).strip() for prompt in text if str(prompt).strip()]
+            if texts:
+                normalized.append(texts if weight == 1 else {"text": texts, "p": weight})
+            continue
+
         if isinstance(record, (str, int, float)):
             # Single literal treated as a group of one prompt.
             item = str(record).strip()
@@ -79,7 +105,7 @@ def _normalize_prompt_entries(entries: Sequence[Any], *, source: str) -> List[Li
     return normalized
 
 
-def _parse_prompt_file(path: Path) -> List[List[str]]:
+def _parse_prompt_file(path: Path) -> List[PromptRow]:
     """Parse a prompt JSON file into a list of prompt groups."""
 
     try:
@@ -107,7 +133,7 @@ def _parse_prompt_file(path: Path) -> List[List[str]]:
         data = json.loads(raw_text)
     except json.JSONDecodeError:
         # Attempt to interpret as newline separated JSON arrays
-        rows: List[List[str]] = []
+        rows: List[PromptRow] = []
         for segment in raw_text.splitlines():
             segment = segment.strip()
             if not segment:
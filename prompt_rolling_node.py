@@ -5,10 +5,23 @@ user-specified weights to build a formatted prompt string.
 
 from __future__ import annotations
 
+import hashlib
 import json
+import math
 import random
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class AliasTable(NamedTuple):
+    """Walker/Vose alias table: entry i is kept with probability prob[i], else alias[i] is drawn."""
+
+    prob: List[float]
+    alias: List[int]
 
 
 @dataclass
@@ -17,12 +30,61 @@ class PromptGroup:
     group_index: int
     name: str
     entries: List[List[str]]
+    alias: Optional[AliasTable] = None  # only for groups with non-uniform sampling weights
+
+
+@dataclass(frozen=True)
+class ParsedLibrary:
+    """A library payload's groups with their sizes and mixed-radix strides (last group fastest)."""
+
+    groups: Tuple[PromptGroup, ...]
+    sizes: Tuple[int, ...]
+    strides: Tuple[int, ...]
+    total: int
+    digest: str = ""
 
 
 class PromptRollingError(Exception):
     pass
 
 
+def _build_alias_table(weights: Sequence[float]) -> AliasTable:
+    """Vose's O(n) construction; ``weights`` are non-negative with a positive sum."""
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, w in enumerate(scaled) if w < 1.0]
+    large = [i for i, w in enumerate(scaled) if w >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    # leftovers are 1 up to rounding; zero weights must stay unreachable
+    for i in small:
+        if weights[i] == 0:
+            prob[i] = 0.0
+            alias[i] = next(j for j, w in enumerate(weights) if w > 0)
+    return AliasTable(prob, alias)
+
+
+def _draw_entry(group: PromptGroup, rng: random.Random) -> int:
+    """Entry index of ``group``: uniform, or O(1) through its alias table when weighted."""
+    if group.alias is None:
+        return rng.randrange(len(group.entries))
+    i = rng.randrange(len(group.entries))
+    return i if rng.random() < group.alias.prob[i] else group.alias.alias[i]
+
+
+def _entry_weight(entry: Dict[str, Any]) -> float:
+    weight = entry.get("p", 1)
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not math.isfinite(weight) or weight < 0:
+        raise ValueError
+    return float(weight)
+
+
 def _parse_library_payload(raw: Optional[str], index: int) -> List[PromptGroup]:
     if not raw:
         return []
@@ -51,17 +113,31 @@ def _parse_library_payload(raw: Optional[str], index: int) -> List[PromptGroup]:
             )
 
         normalized_entries: List[List[str]] = []
+        weights: List[float] = []
         for entry_idx, entry in enumerate(entries):
+            weight = 1.0
+            if isinstance(entry, dict):
+                # weighted row from the loader: {"text": [...], "p": 3}
+                try:
+                    weight = _entry_weight(entry)
+                except ValueError:
+                    raise PromptRollingError(
+                        f"Invalid weight in group '{name}' (input {index+1}, item {entry_idx})."
+                    ) from None
+                entry = entry.get("text", "")
+
             if isinstance(entry, (str, int, float)):
                 value = str(entry).strip()
                 if value:
                     normalized_entries.append([value])
+                    weights.append(weight)
                 continue
 
             if isinstance(entry, Sequence):
                 texts = [str(item).strip() for item in entry if str(item).strip()]
                 if texts:
                     normalized_entries.append(texts)
+                    weights.append(weight)
                     continue
 
             raise PromptRollingError(
@@ -73,18 +149,92 @@ def _parse_library_payload(raw: Optional[str], index: int) -> List[PromptGroup]:
                 f"Group '{name}' in input {index+1} has only empty entries."
             )
 
+        alias = None
+        if any(weight != 1.0 for weight in weights):
+            if not any(weights):
+                raise PromptRollingError(
+                    f"Group '{name}' in input {index+1} has only zero-weight entries."
+                )
+            alias = _build_alias_table(weights)
+
         parsed_groups.append(
             PromptGroup(
                 source_index=index,
                 group_index=group_idx,
                 name=str(name),
                 entries=normalized_entries,
+                alias=alias,
             )
         )
 
     return parsed_groups
 
 
+def _mixed_radix_strides(sizes: Sequence[int]) -> Tuple[Tuple[int, ...], int]:
+    """Strides of each digit (last one fastest) and the product of ``sizes``."""
+    strides = [1] * len(sizes)
+    total = 1
+    for i in range(len(sizes) - 1, -1, -1):
+        strides[i] = total
+        total *= sizes[i]
+    return tuple(strides), total
+
+
+# Parsed library payloads keyed by (input index, digest of the raw string); bounded LRU.
+# The input index is part of the key because it is baked into the groups and error messages.
+_PARSED_LIBRARIES: "OrderedDict[Tuple[int, str], ParsedLibrary]" = OrderedDict()
+_PARSED_LIBRARIES_LOCK = threading.Lock()
+_MAX_PARSED_LIBRARIES = 16
+# Last payload string object seen per input index and its cache key: ComfyUI hands the
+# same object to every run while the loader output is cached, which skips hashing megabytes
+_LAST_PAYLOAD_KEYS: Dict[int, Tuple[str, Tuple[int, str]]] = {}
+
+
+def _load_library(raw: str, index: int) -> ParsedLibrary:
+    """``_parse_library_payload`` memoized by payload digest; callers treat the result as read-only."""
+    last = _LAST_PAYLOAD_KEYS.get(index)
+    if last is not None and last[0] is raw:
+        key = last[1]
+    else:
+        key = (index, hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest())
+        _LAST_PAYLOAD_KEYS[index] = (raw, key)
+    with _PARSED_LIBRARIES_LOCK:
+        library = _PARSED_LIBRARIES.get(key)
+        if library is not None:
+            _PARSED_LIBRARIES.move_to_end(key)
+            return library
+
+    groups = tuple(_parse_library_payload(raw, index))
+    sizes = tuple(len(group.entries) for group in groups)
+    strides, total = _mixed_radix_strides(sizes)
+    library = ParsedLibrary(groups=groups, sizes=sizes, strides=strides, total=total, digest=key[1])
+    with _PARSED_LIBRARIES_LOCK:
+        _PARSED_LIBRARIES[key] = library
+        while len(_PARSED_LIBRARIES) > _MAX_PARSED_LIBRARIES:
+            _PARSED_LIBRARIES.popitem(last=False)
+    return library
+
+
+def _combine_libraries(
+    libraries: Sequence[Tuple[ParsedLibrary, float]],
+) -> Tuple[List[Tuple[PromptGroup, float]], List[int], List[int], int]:
+    """
+    Concatenate libraries in input order: (group, weight) pairs, sizes, global
+    strides and total combinations. O(groups): each library's local strides
+    are scaled by the combinations of the libraries after it.
+    """
+    all_groups: List[Tuple[PromptGroup, float]] = []
+    sizes: List[int] = []
+    strides: List[int] = []
+    total = 1
+    for library, weight in reversed(libraries):
+        all_groups[:0] = [(group, weight) for group in library.groups]
+        sizes[:0] = library.sizes
+        strides[:0] = [stride * total for stride in library.strides]
+        total *= library.total
+    return all_groups, sizes, strides, total
+
+
 def _parse_weights(raw: Optional[str]) -> Dict[str, float]:
     if not raw:
         return {}
@@ -122,10 +272,100 @@ def _parse_weights(raw: Optional[str]) -> Dict[str, float]:
     return weights
 
 
+def _decode_indices(indices: np.ndarray, strides: Sequence[int], sizes: Sequence[int], total: int) -> np.ndarray:
+    """
+    Mixed-radix digits of every combination index at once: [count] -> [count, groups].
+    Falls back to Python integers when the space does not fit in int64.
+    """
+    if total < 2 ** 62:
+        idx = indices.astype(np.int64)[:, None]
+        return (idx // np.asarray(strides, dtype=np.int64)) % np.asarray(sizes, dtype=np.int64)
+    idx = indices.astype(object)[:, None]
+    return (idx // np.asarray(strides, dtype=object)) % np.asarray(sizes, dtype=object)
+
+
+_SHUFFLE_ROUNDS = 6
+_U64 = (1 << 64) - 1
+
+
+def _shuffle_round_keys(libraries: Sequence[ParsedLibrary], epoch: int) -> List[int]:
+    """Round keys of the shuffle permutation: fixed per set of libraries, fresh for every pass."""
+    seed = hashlib.blake2b(digest_size=8 * _SHUFFLE_ROUNDS)
+    for library in libraries:
+        seed.update(library.digest.encode("ascii"))
+    seed.update(str(epoch).encode("ascii"))
+    raw = seed.digest()
+    return [int.from_bytes(raw[8 * i : 8 * i + 8], "little") for i in range(_SHUFFLE_ROUNDS)]
+
+
+def _mix64(values: np.ndarray, key: int) -> np.ndarray:
+    """splitmix64 finalizer of ``values ^ key`` (uint64 arrays, wrapping arithmetic)."""
+    z = values ^ np.uint64(key)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _feistel(values: np.ndarray, half_bits: int, keys: Sequence[int]) -> np.ndarray:
+    """Balanced Feistel network on ``2 * half_bits``-bit integers: a bijection for any round function."""
+    mask = (1 << half_bits) - 1
+    if half_bits <= 32:
+        x = values.astype(np.uint64)
+        shift, m = np.uint64(half_bits), np.uint64(mask)
+        left, right = x >> shift, x & m
+        for key in keys:
+            left, right = right, left ^ (_mix64(right, key) & m)
+        return ((left << shift) | right).astype(object)
+
+    # spaces beyond 2**64: Python integers, keyed hash as the round function
+    out = np.empty(len(values), dtype=object)
+    nbytes = (half_bits + 7) // 8
+    for i, value in enumerate(values):
+        left, right = int(value) >> half_bits, int(value) & mask
+        for key in keys:
+            digest = hashlib.blake2b(right.to_bytes(nbytes, "little"), digest_size=nbytes,
+                                     key=(key & _U64).to_bytes(8, "little")).digest()
+            left, right = right, left ^ (int.from_bytes(digest, "little") & mask)
+        out[i] = (left << half_bits) | right
+    return out
+
+
+def _shuffle_indices(positions: Sequence[int], total: int, libraries: Sequence[ParsedLibrary]) -> List[int]:
+    """
+    Map positions of the shuffled order to combination indices. Every pass of
+    ``total`` consecutive positions visits each combination exactly once; memory
+    is O(1) in ``total``. The permutation is a Feistel network on the smallest
+    even bit width covering ``total`` (under 4x larger), restricted to
+    [0, total) by cycle walking: values that land outside are permuted again.
+    """
+    half_bits = max(1, ((total - 1).bit_length() + 1) // 2)
+    result: List[int] = [0] * len(positions)
+    by_epoch: Dict[int, List[int]] = {}
+    for slot, position in enumerate(positions):
+        by_epoch.setdefault(position // total, []).append(slot)
+    for epoch, slots in by_epoch.items():
+        keys = _shuffle_round_keys(libraries, epoch)
+        values = np.asarray([positions[slot] % total for slot in slots], dtype=object)
+        pending = np.ones(len(values), dtype=bool)
+        while pending.any():
+            values[pending] = _feistel(values[pending], half_bits, keys)
+            pending = np.asarray([v >= total for v in values], dtype=bool)
+        for slot, value in zip(slots, values):
+            result[slot] = int(value)
+    return result
+
+
 def _format_prompts(prompts: Sequence[str]) -> str:
     return ", ".join(prompts)
 
 
+def _format_segment(entry: Sequence[str], weight: float) -> str:
+    text = _format_prompts(entry)
+    if abs(weight - 1.0) > 0.01:
+        return f"({text}:{weight:.1f})"
+    return text
+
+
 # Persistent state for sequential indices: unique_id -> current_index
 _ROLLING_STATE: Dict[str, int] = {}
 
@@ -136,8 +376,12 @@ class PromptRollingNode:
     def INPUT_TYPES(cls) -> Dict[str, Any]:
         required = {
             "mode": (
-                ["random", "sequential"],
-                {"default": "random", "tooltip": "Random: pick random entries. Sequential: cycle through all combinations."},
+                ["random", "sequential", "shuffle"],
+                {
+                    "default": "random",
+                    "tooltip": "Random: pick random entries. Sequential: cycle through all combinations. "
+                               "Shuffle: every combination exactly once per pass, in pseudo-random order.",
+                },
             ),
             "library_1": (
                 "STRING",
@@ -188,6 +432,17 @@ class PromptRollingNode:
                     "tooltip": f"Weight for library_{i} prompts (1.0 = normal)",
                 },
             )
+        # Last, so workflows saved before it existed keep their widget positions
+        optional["count"] = (
+            "INT",
+            {
+                "default": 1,
+                "min": 1,
+                "max": 10000,
+                "step": 1,
+                "tooltip": "Prompts per run: 'outputs' and 'indices' list this many consecutive (sequential) or seeded (random) rolls.",
+            },
+        )
 
         return {
             "required": required,
@@ -197,8 +452,9 @@ class PromptRollingNode:
             },
         }
 
-    RETURN_TYPES = ("STRING", "INT")
-    RETURN_NAMES = ("output", "current_index")
+    RETURN_TYPES = ("STRING", "INT", "STRING", "INT")
+    RETURN_NAMES = ("output", "current_index", "outputs", "indices")
+    OUTPUT_IS_LIST = (False, False, True, True)
     FUNCTION = "roll"
     CATEGORY = "ComicVerse/Prompt"
 
@@ -207,7 +463,9 @@ class PromptRollingNode:
         # Always re-run
         return float("nan")
 
-    def roll(self, mode: str, prompt_index: int = -1, unique_id: str = "", **kwargs: Any) -> Tuple[str, int]:
+    def roll(
+        self, mode: str, prompt_index: int = -1, unique_id: str = "", count: int = 1, **kwargs: Any
+    ) -> Tuple[str, int, List[str], List[int]]:
         # Collect connected libraries and their weights
         libraries_with_weights: List[Tuple[int, str, float]] = []
         
@@ -223,101 +481,50 @@ class PromptRollingNode:
         if not libraries_with_weights:
             raise PromptRollingError("No prompt libraries connected. Connect at least one loader output.")
 
-        # Parse all groups
-        all_groups: List[Tuple[PromptGroup, float]] = []
-        for idx, library_raw, weight in libraries_with_weights:
-            groups = _parse_library_payload(library_raw, idx)
-            for group in groups:
-                all_groups.append((group, weight))
+        # Parse all groups (cached per payload)
+        libraries = [(_load_library(library_raw, idx), weight) for idx, library_raw, weight in libraries_with_weights]
+        all_groups, group_sizes, strides, total_combinations = _combine_libraries(libraries)
 
-        formatted_segments = []
-        
-        # Unify index calculation for both modes
+        # Unify index calculation for all modes
         # This allows "random" mode to be deterministic based on the index
+        count = max(1, int(count))
         if prompt_index >= 0:
-            # Locked mode
+            # Locked mode; the state still advances in case the user switches back to auto
             current_index = prompt_index
-            # For sequential, we wrap around later. For random, we just use the index.
-            # Update state for next run if user switches back to auto
-            if mode == "sequential":
-                # Calculate total combinations for wrap-around logic
-                group_sizes = [len(g.entries) for g, _ in all_groups]
-                total_combinations = 1
-                for size in group_sizes:
-                    total_combinations *= size
-                if total_combinations > 0:
-                    _ROLLING_STATE[unique_id] = (current_index + 1) % total_combinations
-            else:
-                # For random, just increment
-                _ROLLING_STATE[unique_id] = current_index + 1
         else:
-            # Auto mode
             current_index = _ROLLING_STATE.get(unique_id, 0)
-            
-            if mode == "sequential":
-                group_sizes = [len(g.entries) for g, _ in all_groups]
-                total_combinations = 1
-                for size in group_sizes:
-                    total_combinations *= size
-                if total_combinations > 0:
-                    _ROLLING_STATE[unique_id] = (current_index + 1) % total_combinations
-            else:
-                 _ROLLING_STATE[unique_id] = current_index + 1
 
-        if mode == "random":
-            # Random Mode Logic
-            # Use current_index as seed for deterministic randomness
-            rng = random.Random(current_index)
-            
-            for group, weight in all_groups:
-                entry_index = rng.randrange(len(group.entries))
-                entry = group.entries[entry_index]
-                text = _format_prompts(entry)
-                
-                if abs(weight - 1.0) > 0.01:
-                    formatted = f"({text}:{weight:.1f})"
-                else:
-                    formatted = text
-                formatted_segments.append(formatted)
+        if mode == "sequential":
+            if total_combinations > 0:
+                _ROLLING_STATE[unique_id] = (current_index + count) % total_combinations
+        else:
+            _ROLLING_STATE[unique_id] = current_index + count
 
+        indices = list(range(current_index, current_index + count))
+        if mode == "random":
+            # Each index seeds its own draw, so a batch matches the same indices rolled one by one
+            rows = []
+            for index in indices:
+                rng = random.Random(index)
+                rows.append([_draw_entry(group, rng) for group, _ in all_groups])
         else:
             # Sequential Mode Logic (Cartesian Product)
-            group_sizes = [len(g.entries) for g, _ in all_groups]
-            total_combinations = 1
-            for size in group_sizes:
-                total_combinations *= size
-
             if total_combinations == 0:
-                return ("", 0)
-            
-            # Wrap index for sequential access
-            seq_index = current_index % total_combinations
-
-            # Calculate indices (Mixed Radix)
-            temp_index = seq_index
-            indices = []
-            for i in range(len(group_sizes)):
-                stride = 1
-                for size in group_sizes[i+1:]:
-                    stride *= size
-                group_idx = (temp_index // stride) % group_sizes[i]
-                indices.append(group_idx)
-
-            for i, (group_info, weight) in enumerate(all_groups):
-                group = group_info
-                entry_idx = indices[i]
-                entry = group.entries[entry_idx]
-                text = _format_prompts(entry)
-                
-                if abs(weight - 1.0) > 0.01:
-                    formatted = f"({text}:{weight:.1f})"
-                else:
-                    formatted = text
-                formatted_segments.append(formatted)
-
-        prompt_output = ", ".join(segment for segment in formatted_segments if segment)
-        
-        return (prompt_output, current_index)
+                return ("", 0, [], [])
+            if mode == "shuffle":
+                # Positions keep counting past the end; each pass gets a fresh order
+                indices = _shuffle_indices(indices, total_combinations, [library for library, _ in libraries])
+            else:
+                # Wrap indices, then decode them as mixed-radix numbers
+                indices = [index % total_combinations for index in indices]
+            rows = _decode_indices(np.asarray(indices, dtype=object), strides, group_sizes, total_combinations).tolist()
+
+        outputs = []
+        for row in rows:
+            segments = [_format_segment(group.entries[entry_idx], weight) for (group, weight), entry_idx in zip(all_groups, row)]
+            outputs.append(", ".join(segment for segment in segments if segment))
+
+        return (outputs[0], current_index, outputs, indices)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -0,0 +1,95 @@
+"""Tests for the streaming chapter builder."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chapter_builder
+import chapter_builder_node
+import layout_compositor
+import layout_templates
+from chapter_builder import build_chapter, iter_page_groups, parse_page_plan
+from chapter_builder_node import ChapterBuilderNode
+
+
+def _panels(folder, count):
+    folder.mkdir()
+    for i in range(count):
+        size = (60, 40) if i % 2 else (40, 60)
+        Image.fromarray(np.full((size[1], size[0], 3), 20 * i, dtype=np.uint8)).save(folder / f"{i:03d}.png")
+    (folder / "notes.txt").write_text("not a panel")
+    return folder
+
+
+def test_chapter_pages_follow_the_plan(tmp_path):
+    folder = _panels(tmp_path / "panels", 7)
+    out = tmp_path / "out"
+    pages = build_chapter(folder, out, "2横版, auto:3", width=120, height=90, margin=4)
+    assert not out.exists()  # nothing is composed until iterated
+
+    paths = list(pages)
+    assert [p.name for p in paths] == ["page_00001_.png", "page_00002_.png", "page_00003_.png"]  # 2 + 3 + 2 panels
+    first = np.asarray(Image.open(paths[0]))
+    assert first.shape == (90, 120, 3)
+    assert tuple(first[45, 30]) == (0, 0, 0) and tuple(first[45, 90]) == (20, 20, 20)
+    assert tuple(first[1, 1]) == (255, 255, 255)
+
+
+def test_panels_are_pulled_one_page_at_a_time():
+    pulled = []
+
+    def panels():
+        for i in range(10):
+            pulled.append(i)
+            yield torch.rand(1, 8, 8, 3)
+
+    plan = parse_page_plan("4格经典", 2, (255, 255, 255))
+    groups = iter_page_groups(panels(), plan, 64, 64, 2, (255, 255, 255))
+    next(groups)
+    assert len(pulled) == 4
+    assert [len(group) for _, group in groups] == [4, 2]
+
+
+def test_solved_pages_are_not_cached(tmp_path):
+    folder = _panels(tmp_path / "panels", 12)
+    compiled, parsed = len(layout_templates._COMPILED), len(layout_compositor._PARSED_CONFIGS)
+    paths = list(build_chapter(folder, tmp_path / "out", "auto:2, auto:3", width=81, height=77, margin=3))
+    assert len(paths) == 5
+    assert len(layout_templates._COMPILED) == compiled
+    assert len(layout_compositor._PARSED_CONFIGS) == parsed
+
+
+def test_bad_plans_fail_before_writing(tmp_path):
+    folder = _panels(tmp_path / "panels", 2)
+    with pytest.raises(ValueError):
+        build_chapter(folder, tmp_path / "out", "4格经典, no-such-template")
+    with pytest.raises(ValueError):
+        build_chapter(folder, tmp_path / "out", " , ")
+    assert not (tmp_path / "out").exists()
+
+
+def test_node_and_command_line(tmp_path, capsys, monkeypatch):
+    folder = _panels(tmp_path / "panels", 5)
+    monkeypatch.setattr(chapter_builder_node, "_output_root", lambda: tmp_path / "output")
+    node = ChapterBuilderNode()
+    out_dir, count = node.build(str(folder), "4格经典", "chapters/one", "p", 64, 96, 2, 255, 255, 255, "fit")
+    assert out_dir == os.fspath(tmp_path / "output" / "chapters" / "one")
+    assert count == 2 and sorted(os.listdir(out_dir)) == ["p_00001_.png", "p_00002_.png"]
+
+    # a rerun continues the numbering instead of overwriting the previous pages
+    node.build(str(folder), "4格经典", "chapters/one", "p", 64, 96, 2, 255, 255, 255, "fit")
+    assert sorted(os.listdir(out_dir))[-1] == "p_00004_.png"
+
+    for outside in (str(tmp_path / "elsewhere"), "../elsewhere", "chapters/../../elsewhere"):
+        with pytest.raises(ValueError):
+            node.build(str(folder), "4格经典", outside, "p", 64, 96, 2, 255, 255, 255, "fit")
+    assert not (tmp_path / "elsewhere").exists()
+
+    assert chapter_builder.main([str(folder), str(tmp_path / "cli"), "--plan", "auto:5", "--size", "200x100"]) == 0
+    assert capsys.readouterr().out.strip().endswith("page_00001_.png")
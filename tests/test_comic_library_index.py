@@ -11,17 +11,42 @@ from unittest.mock import MagicMock, patch
 import sys
 sys.modules['server'] = MagicMock()
 
-from comicverse_nodes import ComicAssetLibraryNode, _LIBRARY_CACHE, _LIBRARY_HASHES
+import comicverse_nodes
+from comicverse_nodes import (
+    ComicAssetLibraryNode,
+    _DISK_STORES,
+    _LIBRARY_CACHE,
+    _LIBRARY_CLUSTERS,
+    _LIBRARY_HASHES,
+    _LIBRARY_LAST_USED,
+    _LIBRARY_SELECTION,
+    _LIBRARY_SIMILARITY,
+    _LAST_OUTPUT,
+)
+from library_store import CompactImage, MappedImage
 
 
 @pytest.fixture(autouse=True)
 def clear_cache():
     """Clear global cache before each test."""
+    comicverse_nodes._PREVIEW_EVENTS.flush(5)
     _LIBRARY_CACHE.clear()
     _LIBRARY_HASHES.clear()
+    _LIBRARY_SIMILARITY.clear()
+    _LIBRARY_CLUSTERS.clear()
+    _DISK_STORES.clear()
+    _LIBRARY_LAST_USED.clear()
+    _LAST_OUTPUT.clear()
+    _LIBRARY_SELECTION.clear()
     yield
     _LIBRARY_CACHE.clear()
     _LIBRARY_HASHES.clear()
+    _LIBRARY_SIMILARITY.clear()
+    _LIBRARY_CLUSTERS.clear()
+    _DISK_STORES.clear()
+    _LIBRARY_LAST_USED.clear()
+    _LAST_OUTPUT.clear()
+    _LIBRARY_SELECTION.clear()
 
 
 def _create_test_images(count: int, start_value: float = 0.0):
@@ -215,6 +240,265 @@ def test_no_adjustment_when_no_deletion():
     assert torch.allclose(result1[1], result2[1]), "Second image should be identical"
 
 
+def _create_textured_images(count: int, size: int = 64):
+    """Create structurally different images (smooth random textures)."""
+    images = []
+    for i in range(count):
+        gen = torch.Generator().manual_seed(i + 1)
+        coarse = torch.rand(1, 3, 8, 8, generator=gen)
+        images.append(torch.nn.functional.interpolate(coarse, size=(size, size), mode="bilinear").permute(0, 2, 3, 1))
+    return images
+
+
+def test_near_duplicates_merged_when_threshold_set():
+    """Images differing by a few pixels are merged into the existing asset."""
+    node = ComicAssetLibraryNode()
+    originals = _create_textured_images(2)
+    node.run(output_count=1, image_input_a=torch.cat(originals), unique_id="sim1", similarity_threshold=6, near_duplicates="merge")
+
+    tweaked = originals[0].clone()
+    tweaked[0, :2, :2, :] = 1.0
+    node.run(output_count=1, image_input_a=tweaked, unique_id="sim1", similarity_threshold=6, near_duplicates="merge")
+    assert len(_LIBRARY_CACHE["sim1"]) == 2
+
+    # With detection disabled the tweaked copy is kept as a new asset
+    node.run(output_count=1, image_input_a=tweaked, unique_id="sim1", similarity_threshold=0)
+    assert len(_LIBRARY_CACHE["sim1"]) == 3
+
+
+def test_near_duplicates_flagged_into_cluster():
+    node = ComicAssetLibraryNode()
+    original = _create_textured_images(1)[0]
+    tweaked = original.clone()
+    tweaked[0, -2:, -2:, :] = 0.0
+    node.run(output_count=1, image_input_a=torch.cat([original, tweaked]), unique_id="sim2", similarity_threshold=6)
+
+    hashes = _LIBRARY_HASHES["sim2"]
+    clusters = _LIBRARY_CLUSTERS["sim2"]
+    assert len(hashes) == 2
+    assert clusters[hashes[0]] == hashes[0]
+    assert clusters[hashes[1]] == hashes[0]
+
+
+def test_removing_cluster_representative_repoints_members():
+    """Members of a removed representative's cluster move to a surviving member."""
+    node = ComicAssetLibraryNode()
+    original = _create_textured_images(1)[0]
+    first, second = original.clone(), original.clone()
+    first[0, -2:, -2:, :] = 0.0
+    second[0, :2, :2, :] = 0.0
+    node.run(output_count=1, image_input_a=torch.cat([original, first, second]), unique_id="sim3", similarity_threshold=6)
+    hashes = list(_LIBRARY_HASHES["sim3"])
+    clusters = _LIBRARY_CLUSTERS["sim3"]
+    assert clusters[hashes[1]] == clusters[hashes[2]] == hashes[0]
+
+    comicverse_nodes._delete_library_assets("sim3", [hashes[0]])
+    assert hashes[0] not in clusters
+    assert clusters[hashes[1]] == clusters[hashes[2]] == hashes[1]
+
+    # deleting through pending_deletions re-points the same way
+    node.run(output_count=1, image_input_a=original[:0], unique_id="sim3", similarity_threshold=6, pending_deletions=hashes[1])
+    assert clusters == {hashes[2]: hashes[2]}
+
+
+def test_disk_storage_warm_starts_after_restart(tmp_path, monkeypatch):
+    """Disk-backed libraries are restored from the manifest and loaded on demand."""
+    monkeypatch.setattr(comicverse_nodes, "_get_store_dir", lambda: tmp_path)
+    node = ComicAssetLibraryNode()
+    batch = torch.cat(_create_test_images(4))
+    node.run(output_count=1, image_input_a=batch, unique_id="disk1", storage="disk", pending_deletions="")
+    node.run(output_count=1, image_input_a=batch[:1], unique_id="disk1", storage="disk", pending_deletions="1")
+    assert all(isinstance(img, MappedImage) for img in _LIBRARY_CACHE["disk1"])
+    expected_hashes = list(_LIBRARY_HASHES["disk1"])
+
+    # Simulate a ComfyUI restart: all in-process state is gone
+    _LIBRARY_CACHE.clear()
+    _LIBRARY_HASHES.clear()
+    _DISK_STORES.clear()
+    _LIBRARY_LAST_USED.clear()
+    _LAST_OUTPUT.clear()
+    _LIBRARY_SELECTION.clear()
+
+    result = node.run(output_count=2, selected_indices="2,0", image_input_a=batch[:1], unique_id="disk1", storage="disk")
+    assert _LIBRARY_HASHES["disk1"] == expected_hashes
+    assert abs(_get_image_value(result[0]) - 0.3) < 0.01
+    assert abs(_get_image_value(result[1]) - 0.0) < 0.01
+    assert len(list((tmp_path / "disk1").glob("*.npy"))) == 3
+
+
+def test_library_stores_detached_uint8():
+    """Library entries are compact uint8 copies, not views into the upstream batch."""
+    node = ComicAssetLibraryNode()
+    batch = torch.cat(_create_test_images(3))
+    result = node.run(output_count=1, selected_indices="1", image_input_a=batch, unique_id="compact1")
+
+    stored = _LIBRARY_CACHE["compact1"]
+    assert all(isinstance(img, CompactImage) for img in stored)
+    assert all(img.pixels.dtype == torch.uint8 for img in stored)
+    assert stored[1].pixels.untyped_storage().data_ptr() != batch.untyped_storage().data_ptr()
+    assert result[0].dtype == torch.float32 and result[0].shape == (1, 64, 64, 3)
+    assert abs(_get_image_value(result[0]) - 0.1) < 0.01
+
+
+def test_max_assets_caps_library():
+    node = ComicAssetLibraryNode()
+    node.run(output_count=1, image_input_a=torch.cat(_create_test_images(8)), unique_id="cap1", max_assets=5)
+    assert len(_LIBRARY_CACHE["cap1"]) == 5
+
+
+def test_fifo_eviction_keeps_selected_asset():
+    node = ComicAssetLibraryNode()
+    node.run(output_count=1, image_input_a=torch.cat(_create_test_images(5)), unique_id="evict1", max_assets=5)
+    result = node.run(output_count=1, selected_indices="0", image_input_a=torch.cat(_create_test_images(2, 0.5)),
+                      unique_id="evict1", max_assets=5)
+    values = [round(img.pixels[0, 0, 0].item() / 255, 1) for img in _LIBRARY_CACHE["evict1"]]
+    # oldest unselected assets go first; the selected one stays and keeps its index
+    assert values == [0.0, 0.3, 0.4, 0.5, 0.6]
+    assert abs(_get_image_value(result[0]) - 0.0) < 0.01
+
+
+def test_memory_budget_eviction_drops_least_recently_selected():
+    node = ComicAssetLibraryNode()
+    node.run(output_count=1, selected_indices="0", image_input_a=torch.cat(_create_test_images(4)),
+             unique_id="evict2", max_assets=4, eviction="memory_budget")
+    node.run(output_count=1, selected_indices="1", image_input_a=_create_test_images(1)[0],
+             unique_id="evict2", max_assets=4, eviction="memory_budget")
+    result = node.run(output_count=1, selected_indices="1", image_input_a=torch.cat(_create_test_images(2, 0.5)),
+                      unique_id="evict2", max_assets=4, eviction="memory_budget")
+    values = [round(img.pixels[0, 0, 0].item() / 255, 1) for img in _LIBRARY_CACHE["evict2"]]
+    # 0.2 and 0.3 were never selected; 0.0 was selected before 0.1
+    assert values == [0.0, 0.1, 0.5, 0.6]
+    assert abs(_get_image_value(result[0]) - 0.1) < 0.01
+
+
+def test_selection_and_deletion_by_asset_id():
+    node = ComicAssetLibraryNode()
+    node.run(output_count=1, image_input_a=torch.cat(_create_test_images(4)), unique_id="ids1")
+    ids = list(_LIBRARY_HASHES["ids1"])
+    # select 0.3 then 0.1 while deleting 0.0 and 0.2: ids need no remapping
+    result = node.run(output_count=2, selected_indices=f"{ids[3]},{ids[1]}", pending_deletions=f"{ids[0]},{ids[2]}",
+                      image_input_a=_create_test_images(1, 0.5)[0], unique_id="ids1")
+    assert abs(_get_image_value(result[0]) - 0.3) < 0.01
+    assert abs(_get_image_value(result[1]) - 0.1) < 0.01
+    assert result[6] == 2
+    assert _LIBRARY_HASHES["ids1"][:2] == [ids[1], ids[3]]
+
+
+def test_preview_event_carries_count_and_selected_ids():
+    node = ComicAssetLibraryNode()
+    send = comicverse_nodes.PromptServer.instance.send_sync
+    node.run(output_count=1, image_input_a=torch.cat(_create_test_images(3)), unique_id="ids2")
+    ids = list(_LIBRARY_HASHES["ids2"])
+    assert comicverse_nodes._PREVIEW_EVENTS.flush(5)
+    assert send.call_args[0][1] == {"node_id": "ids2", "count": 3, "selected": [], "executed": True}
+
+    # a deletion and the eviction of the oldest unpinned asset: the grid reloads its pages
+    node.run(output_count=1, selected_indices=ids[2], pending_deletions=ids[0],
+             image_input_a=_create_test_images(1, 0.5)[0], unique_id="ids2", max_assets=2)
+    assert comicverse_nodes._PREVIEW_EVENTS.flush(5)
+    payload = send.call_args[0][1]
+    assert payload["count"] == 2
+    assert payload["selected"] == [ids[2]]
+
+
+def test_rest_mutations_apply_without_rerun():
+    node = ComicAssetLibraryNode()
+    send = comicverse_nodes.PromptServer.instance.send_sync
+    node.run(output_count=2, image_input_a=torch.cat(_create_test_images(4)), unique_id="rest1")
+    ids = list(_LIBRARY_HASHES["rest1"])
+    assert comicverse_nodes._PREVIEW_EVENTS.flush(5)
+
+    assert comicverse_nodes._select_library_assets("rest1", [ids[3], "0" * 32, ids[1]]) == [ids[3], ids[1]]
+    assert comicverse_nodes._delete_library_assets("rest1", [ids[1], ids[2]]) == [ids[1], ids[2]]
+    assert comicverse_nodes._reorder_library_assets("rest1", [ids[3]]) == [ids[3], ids[0]]
+    assert comicverse_nodes._PREVIEW_EVENTS.flush(5)
+    payload = send.call_args[0][1]
+    assert payload["selected"] == [ids[3]]
+    assert payload["count"] == 2
+    assert payload["executed"] is False
+    assert _LIBRARY_HASHES["rest1"] == [ids[3], ids[0]]
+    with pytest.raises(KeyError):
+        comicverse_nodes._delete_library_assets("missing", ids)
+
+    # the next execution reads the updated library
+    result = node.run(output_count=2, selected_indices=f"{ids[3]},{ids[0]}", image_input_a=_create_test_images(1)[0],
+                      unique_id="rest1")
+    assert abs(_get_image_value(result[0]) - 0.3) < 0.01
+    assert abs(_get_image_value(result[1]) - 0.0) < 0.01
+
+
+def test_only_selection_and_last_output_encodings_are_pinned():
+    node = ComicAssetLibraryNode()
+    node.run(output_count=1, image_input_a=torch.cat(_create_test_images(6)), unique_id="pins1", max_assets=100)
+    ids = list(_LIBRARY_HASHES["pins1"])
+    assert comicverse_nodes._THUMB_CACHE._pins["pins1"] <= {ids[0]}
+
+    comicverse_nodes._select_library_assets("pins1", [ids[4], ids[2]])
+    for cache in (comicverse_nodes._THUMB_CACHE, comicverse_nodes._PREVIEW_CACHE):
+        assert cache._pins["pins1"] == {ids[4], ids[2]} | _LAST_OUTPUT.get("pins1", set())
+        assert len(cache._pins["pins1"]) < len(ids)
+
+
+def test_run_under_inference_mode():
+    """ComfyUI executes nodes under torch.inference_mode(); inputs are inference tensors."""
+    node = ComicAssetLibraryNode()
+    with torch.inference_mode():
+        batch = torch.cat(_create_test_images(3))
+        node.run(output_count=1, image_input_a=batch, unique_id="infer1")
+        ids = list(_LIBRARY_HASHES["infer1"])
+        # re-queued with the same cached upstream tensor: no duplicates, selection by id works
+        result = node.run(output_count=1, selected_indices=ids[2], image_input_a=batch, unique_id="infer1")
+    assert _LIBRARY_HASHES["infer1"] == ids
+    assert abs(_get_image_value(result[0]) - 0.2) < 0.01
+
+
+def test_batch_output_mode():
+    node = ComicAssetLibraryNode()
+    images = [torch.full((1, 32, 48, 3), 0.2), torch.full((1, 64, 64, 3), 0.6)]
+    result = node.run(output_count=3, selected_indices="1,0", image_input_a=images[0], image_input_b=images[1],
+                      unique_id="batch1", output_mode="batch", batch_width=48, batch_height=32)
+    batch = result[0]
+    assert batch.shape == (2, 32, 48, 3)
+    assert abs(batch[0, 16, 24, 0].item() - 0.6) < 0.01
+    assert abs(batch[1, 16, 24, 0].item() - 0.2) < 0.01
+    assert result[6] == 2
+    # unused slots share one cached blank
+    assert result[1] is result[2] and result[1].abs().max() == 0
+
+
+def test_list_pages_newest_first_or_selected_first():
+    node = ComicAssetLibraryNode()
+    node.run(output_count=2, selected_indices="1,3", image_input_a=torch.cat(_create_test_images(5)), unique_id="page1")
+    ids = list(_LIBRARY_HASHES["page1"])
+
+    page = comicverse_nodes._list_library_assets("page1", offset=1, limit=2)
+    assert page["total"] == 5
+    assert [item["id"] for item in page["items"]] == [ids[3], ids[2]]
+    assert page["items"][0]["width"] == 64
+
+    page = comicverse_nodes._list_library_assets("page1", offset=0, limit=3, sort="selected")
+    assert [item["id"] for item in page["items"]] == [ids[1], ids[3], ids[4]]
+    assert page["selected"] == [ids[1], ids[3]]
+    assert comicverse_nodes._list_library_assets("page1", offset=10)["items"] == []
+    with pytest.raises(ValueError):
+        comicverse_nodes._list_library_assets("page1", sort="random")
+
+
+def test_list_page_as_binary_frame():
+    from library_frames import decode_page_frame
+
+    node = ComicAssetLibraryNode()
+    node.run(output_count=1, selected_indices="0", image_input_a=torch.cat(_create_test_images(3)), unique_id="frame1")
+    ids = list(_LIBRARY_HASHES["frame1"])
+
+    page = decode_page_frame(comicverse_nodes._list_library_frame("frame1", offset=0, limit=2))
+    assert page["total"] == 3 and page["selected"] == [ids[0]]
+    assert [item["id"] for item in page["items"]] == [ids[2], ids[1]]
+    json_page = comicverse_nodes._list_library_assets("frame1", offset=0, limit=2)
+    assert [item["w"] for item in page["items"]] == [item["w"] for item in json_page["items"]]
+    assert all(item["data"] for item in page["items"])
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
@@ -0,0 +1,71 @@
+"""Tests for the page compositor."""
+
+import json
+import os
+import sys
+
+import pytest
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comicverse_nodes import ComicPageCompositorNode, LayoutTemplateSelectorNode
+from layout_compositor import compose_pages
+from layout_templates import panel_rects
+
+
+def _template(name, margin=4, bg=(255, 255, 255)):
+    return LayoutTemplateSelectorNode().run(name, margin, *bg)[0]
+
+
+def test_panel_rects_leave_even_gutters():
+    cells = json.loads(_template("2横版"))["grid_info"]
+    (ax0, ay0, ax1, ay1), (bx0, by0, bx1, by1) = panel_rects(cells, 200, 100, 10)
+    assert (ax0, ay0, ay1) == (10, 10, 90)
+    assert bx0 - ax1 == 10 and bx1 == 190
+
+
+def test_pages_filled_in_template_order_with_background():
+    colors = torch.tensor([0.1, 0.3, 0.5, 0.7, 0.9])
+    images = colors.view(-1, 1, 1, 1).expand(5, 32, 32, 3)
+    pages = compose_pages(images, _template("4格经典", margin=8, bg=(255, 0, 0)), 128, 128)
+    assert pages.shape == (2, 128, 128, 3)
+    # panel centers: top-left, top-right, bottom-left, bottom-right
+    centers = [(34, 34), (34, 94), (94, 34), (94, 94)]
+    assert [round(pages[0, y, x, 0].item(), 3) for y, x in centers] == [0.1, 0.3, 0.5, 0.7]
+    assert abs(pages[1, 34, 34, 1].item() - 0.9) < 1e-5
+    # margins and the empty panels of the last page are background
+    assert pages[0, 2, 2].tolist() == [1.0, 0.0, 0.0]
+    assert pages[1, 94, 94].tolist() == [1.0, 0.0, 0.0]
+
+
+def test_fit_modes():
+    ramp = torch.linspace(0, 1, 80).view(1, 1, 80, 1)
+    wide = torch.cat([ramp.expand(1, 20, 80, 1), torch.rand(1, 20, 1, 1).expand(1, 20, 80, 1), 1 - ramp.expand(1, 20, 80, 1)], -1)
+    template = {"grid_info": [{"x": 0, "y": 0, "w": 1, "h": 1}], "margin": 0, "bg_color": (0, 0, 0)}
+    stretched = compose_pages(wide, template, 40, 40, "stretch")
+    expected = torch.nn.functional.interpolate(wide.permute(0, 3, 1, 2), size=(40, 40), mode="bilinear",
+                                               align_corners=False, antialias=True).permute(0, 2, 3, 1)
+    assert torch.allclose(stretched, expected, atol=0.02)
+    fitted = compose_pages(wide, template, 40, 40, "fit")
+    assert fitted[0, :14].abs().max() == 0 and fitted[0, 26:].abs().max() == 0  # letterboxed 40x10
+    filled = compose_pages(wide, template, 40, 40, "fill")
+    crop = torch.nn.functional.interpolate(wide[:, :, 30:50].permute(0, 3, 1, 2), size=(40, 40), mode="bilinear",
+                                           align_corners=False).permute(0, 2, 3, 1)
+    # center crop scaled up 2x (edge columns also blend in the cropped-away neighbours)
+    assert torch.allclose(filled[:, :, 1:-1], crop[:, :, 1:-1], atol=1e-4)
+
+
+def test_alpha_composited_on_background():
+    rgba = torch.zeros(1, 8, 8, 4)
+    rgba[..., 3] = 0.5
+    page = compose_pages(rgba, _template("自由网格", margin=1), 8, 8)
+    assert torch.allclose(page[0, 4, 4], torch.tensor([0.5, 0.5, 0.5]))
+
+
+def test_compositor_node_reports_page_count_and_bad_template():
+    node = ComicPageCompositorNode()
+    pages, count = node.run(_template("2竖版"), torch.rand(3, 16, 16, 3), 64, 96)
+    assert count == 2 and pages.shape == (2, 96, 64, 3)
+    with pytest.raises(ValueError):
+        node.run("{}", torch.rand(1, 16, 16, 3), 64, 64)
@@ -0,0 +1,64 @@
+"""Tests for the free-grid layout solver."""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comicverse_nodes import ComicPageCompositorNode, FreeGridLayoutNode
+from layout_solver import solve_free_grid
+from layout_templates import panel_rects, validate_cells
+
+
+def _aspects(solved, width, height, margin):
+    return [(x1 - x0) / (y1 - y0) for x0, y0, x1, y1 in panel_rects(solved["grid_info"], width, height, margin)]
+
+
+def test_exact_layouts_have_no_crop():
+    solved = solve_free_grid([1, 1, 1], 300, 100)
+    assert solved["crop_loss"] < 1e-9 and solved["orientation"] == "rows"
+    assert [round(a, 3) for a in _aspects(solved, 300, 100, 0)] == [1.0, 1.0, 1.0]
+
+    # 2:1 on top of two squares fills the page exactly, with 10px gutters
+    solved = solve_free_grid([2, 1, 1], 410, 415, 10)
+    assert solved["crop_loss"] < 1e-6
+    assert [round(a, 2) for a in _aspects(solved, 410, 415, 10)] == [2.0, 1.0, 1.0]
+
+
+def test_tall_panels_use_columns_in_reading_order():
+    solved = solve_free_grid([0.25, 0.5, 0.5], 200, 400)
+    assert solved["orientation"] == "columns"
+    cells = solved["grid_info"]
+    assert cells[0]["x"] == 0 and cells[1]["x"] == cells[2]["x"] > 0 and cells[2]["y"] > cells[1]["y"]
+
+
+def test_cells_validate_and_tile_the_page():
+    solved = solve_free_grid([1.5, 0.7, 1, 1, 2, 0.5, 1, 1.3], 1024, 1448, 8)
+    cells = validate_cells(solved["grid_info"], source="solver")
+    assert solved["grid_count"] == 8
+    assert sum(c["w"] * c["h"] for c in cells) == pytest.approx(1.0)
+
+
+def test_twenty_panels_solve_quickly():
+    start = time.perf_counter()
+    solved = solve_free_grid([1.0 + 0.05 * i for i in range(20)], 1024, 1448, 5)
+    assert time.perf_counter() - start < 0.25
+    assert solved["grid_count"] == 20 and solved["crop_loss"] < 0.2
+
+
+def test_free_grid_node_feeds_the_compositor():
+    images = torch.rand(3, 40, 80, 3)
+    config, crop = FreeGridLayoutNode().run(images, 400, 300, 4, 0, 0, 0)
+    assert json.loads(config)["grid_count"] == 3 and 0 <= crop < 0.5
+    pages, count = ComicPageCompositorNode().run(config, images, 400, 300)
+    assert count == 1 and pages.shape == (1, 300, 400, 3)
+
+    config, _ = FreeGridLayoutNode().run(images, 400, 300, 4, 0, 0, 0, aspect_ratios="16:9, 1, 3/4, 1")
+    assert json.loads(config)["grid_count"] == 4
+    with pytest.raises(ValueError):
+        FreeGridLayoutNode().run(images, 400, 300, 4, 0, 0, 0, aspect_ratios="wide")
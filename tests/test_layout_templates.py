@@ -0,0 +1,111 @@
+"""Tests for the layout template registry and compiled layouts."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import layout_templates
+from layout_templates import compile_layout, load_templates, template_stamp, validate_template
+
+
+def _write(path, name, cells, order=0):
+    path.write_text(json.dumps({"name": name, "order": order, "grid_info": cells}), encoding="utf-8")
+    return path
+
+
+def test_bundled_templates_in_order():
+    templates = load_templates()
+    assert list(templates) == ["2横版", "2竖版", "4格经典", "3格斜切", "自由网格"]
+    assert templates["4格经典"]["grid_count"] == 4
+
+
+def test_registry_reloads_changed_files_only(tmp_path):
+    half = [{"x": 0, "y": 0, "w": 0.5, "h": 1}, {"x": 0.5, "y": 0, "w": 0.5, "h": 1}]
+    path = _write(tmp_path / "a.json", "A", half)
+    _write(tmp_path / "b.json", "B", half[:1], order=-1)
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+
+    templates = load_templates(tmp_path)
+    assert list(templates) == ["B", "A"]  # by order; the broken file is skipped
+    assert load_templates(tmp_path)["A"] is templates["A"]  # unchanged file: cached object
+
+    _write(path, "A", half[:1] + [{"x": 0.5, "y": 0, "w": 0.5, "h": 0.5}])
+    os.utime(path, ns=(1, template_stamp("A", tmp_path) + 10**9))
+    assert load_templates(tmp_path)["A"]["grid_info"][1]["h"] == 0.5
+
+    path.unlink()
+    assert list(load_templates(tmp_path)) == ["B"]
+    assert template_stamp("A", tmp_path) is None
+
+
+def test_validation_rejects_cells_outside_the_page():
+    with pytest.raises(ValueError):
+        validate_template({"name": "x", "grid_info": [{"x": 0.5, "y": 0, "w": 0.6, "h": 1}]}, source="t")
+    with pytest.raises(ValueError):
+        validate_template({"name": "x", "grid_info": []}, source="t")
+
+
+def test_compiled_layouts_and_samplings_are_memoized():
+    cells = load_templates()["4格经典"]["grid_info"]
+    layout = compile_layout(cells, 400, 300, 10)
+    assert compile_layout(cells, 400, 300, 10) is layout
+    assert compile_layout(cells, 400, 300, 12) is not layout
+    assert layout.rects[0] == (10, 10, 195, 145) and layout.rects[3] == (205, 155, 390, 290)
+    assert layout.masks == (None,) * 4
+
+    sampling = layout.sampling(64, 64, "fit")
+    assert layout.sampling(64, 64, "fit") is sampling
+    assert sampling[0].rect == (35, 10, 170, 145)  # letterboxed square inside 185x135
+    assert sampling[0].grid.shape == (1, 135, 135, 2)
+    assert len(layout_templates._COMPILED) <= layout_templates._MAX_COMPILED
+
+
+def test_one_off_layouts_and_panel_samplings_are_not_memoized():
+    cells = load_templates()["4格经典"]["grid_info"]
+    compiled = len(layout_templates._COMPILED)
+    layout = compile_layout(cells, 401, 301, 10, memoize=False)
+    assert compile_layout(cells, 401, 301, 10, memoize=False) is not layout
+    assert len(layout_templates._COMPILED) == compiled
+
+    panel = layout.panel_sampling(2, 64, 48, "fit")
+    expected = layout.sampling(64, 48, "fit")[2]
+    layout._samplings.clear()
+    assert panel.slot == 2 and panel.rect == expected.rect and panel.scale == expected.scale
+    assert panel.grid.shape == (1, panel.rect[3] - panel.rect[1], panel.rect[2] - panel.rect[0], 2)
+    assert layout.panel_sampling(2, 64, 48, "fit") is not panel
+    assert not layout._samplings
+
+
+def test_polygon_cells_get_cached_antialiased_masks():
+    cells = load_templates()["3格斜切"]["grid_info"]
+    assert all("polygon" in cell for cell in cells)
+    assert cells[2]["x"] == 0.5 and cells[2]["w"] == 0.5  # bounding box of the polygon
+
+    layout = compile_layout(cells, 400, 600, 10)
+    assert compile_layout(cells, 400, 600, 10).masks[0] is layout.masks[0]
+    for mask, (x0, y0, x1, y1) in zip(layout.masks, layout.rects):
+        assert mask.shape == (y1 - y0, x1 - x0)
+        assert mask.max() == 1 and mask.min() == 0
+        assert ((mask > 0) & (mask < 1)).any()  # anti-aliased slanted edges
+
+    # along a row, the slanted gutter between the left panels and the right panel is ~margin wide
+    def covered_columns(k, y):
+        x0, y0, _, _ = layout.rects[k]
+        return (layout.masks[k][y - y0] >= 0.5).nonzero().flatten() + x0
+
+    left_end = int(covered_columns(0, 200).max())  # row 200 crosses the top-left and right panels
+    right_start = int(covered_columns(2, 200).min())
+    assert 10 <= right_start - left_end - 1 <= 12
+
+
+def test_polygon_validation():
+    with pytest.raises(ValueError):  # not convex
+        validate_template({"name": "x", "grid_info": [{"polygon": [[0, 0], [1, 0], [0.2, 0.2], [0, 1]]}]}, source="t")
+    with pytest.raises(ValueError):
+        validate_template({"name": "x", "grid_info": [{"polygon": [[0, 0], [1, 0]]}]}, source="t")
+    template = validate_template({"name": "x", "grid_info": [{"polygon": [[0, 1], [1, 1], [0.5, 0]]}]}, source="t")
+    assert template["grid_info"][0]["h"] == 1.0
@@ -0,0 +1,43 @@
+"""Tests for the batched output helpers."""
+
+import os
+import sys
+
+import torch
+import torch.nn.functional as F
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_batch import blank_image, fit_batch
+
+
+def _interpolate(image, size):
+    return F.interpolate(image.permute(0, 3, 1, 2), size=size, mode="bilinear", align_corners=False).permute(0, 2, 3, 1)
+
+
+def test_stretch_matches_interpolate():
+    images = [torch.rand(1, 30, 50, 3), torch.rand(1, 64, 20, 3)]
+    out = fit_batch(images, (40, 60), "stretch")
+    assert out.shape == (2, 40, 60, 3)
+    for i, img in enumerate(images):
+        assert torch.allclose(out[i:i + 1], _interpolate(img, (40, 60)), atol=1e-5)
+
+
+def test_letterbox_centers_content_with_black_bars():
+    tall = torch.rand(1, 80, 40, 3)
+    out = fit_batch([torch.rand(1, 40, 60, 3), tall], (40, 60))
+    # 80x40 scaled by 0.5 -> 40x20, centered horizontally
+    assert torch.allclose(out[1, :, 20:40], _interpolate(tall, (40, 20))[0], atol=1e-5)
+    assert out[1, :, :20].abs().max() == 0 and out[1, :, 40:].abs().max() == 0
+
+
+def test_same_size_is_stacked_and_alpha_added():
+    rgb, rgba = torch.rand(1, 8, 8, 3), torch.rand(1, 8, 8, 4)
+    out = fit_batch([rgb, rgba], (8, 8))
+    assert out.shape == (2, 8, 8, 4)
+    assert torch.equal(out[0, ..., :3], rgb[0]) and torch.all(out[0, ..., 3] == 1)
+
+
+def test_blank_image_is_cached():
+    assert blank_image((1, 8, 8, 3)) is blank_image((1, 8, 8, 3))
+    assert blank_image((1, 8, 8, 3)) is not blank_image((1, 8, 8, 4))
@@ -0,0 +1,45 @@
+"""
+Tests for the byte-budgeted encoded image cache.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_cache import EncodedImageCache
+
+
+def test_lru_eviction_respects_byte_budget():
+    cache = EncodedImageCache(max_bytes=30)
+    cache["a"] = "x" * 10
+    cache["b"] = "x" * 10
+    cache["c"] = "x" * 10
+    assert cache.get("a") is not None  # a is now most recently used
+
+    cache["d"] = "x" * 10
+    assert "b" not in cache
+    assert {"a", "c", "d"} <= {k for k in ("a", "b", "c", "d") if k in cache}
+    assert cache.current_bytes == 30
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["evictions"]) == (1, 1)
+
+
+def test_pinned_entries_survive_eviction():
+    cache = EncodedImageCache(max_bytes=20)
+    cache["a"] = "x" * 10
+    cache["b"] = "x" * 10
+    cache.pin("node1", ["a"])
+
+    cache["c"] = "x" * 10
+    assert "a" in cache and "b" not in cache
+
+    # Pinned entries may exceed the budget; unpinning lets them go
+    cache.pin("node1", ["a", "c"])
+    cache["d"] = "x" * 10
+    assert "a" in cache and "c" in cache and "d" not in cache
+    cache.unpin("node1")
+    assert cache.current_bytes <= 20
+    assert cache.get("zzz") is None
+    assert cache.stats()["misses"] == 1
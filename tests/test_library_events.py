@@ -0,0 +1,61 @@
+"""Tests for the background preview event dispatcher."""
+
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_events import PreviewDispatcher
+
+
+def test_sends_in_background():
+    sent = []
+    dispatcher = PreviewDispatcher(lambda event, payload: sent.append((event, payload)), "evt")
+    dispatcher.submit("node1", lambda: {"n": 1})
+    assert dispatcher.flush(5)
+    assert sent == [("evt", {"n": 1})]
+    assert dispatcher.stats()["sent"] == 1
+
+
+def test_coalesces_queued_updates_per_node():
+    sent = []
+    started, gate = threading.Event(), threading.Event()
+
+    def send(event, payload):
+        started.set()
+        gate.wait(5)
+        sent.append(payload)
+
+    dispatcher = PreviewDispatcher(send, "evt")
+    dispatcher.submit("a", lambda: {"v": 0})  # blocks the worker until the gate opens
+    assert started.wait(5)
+    for v in range(1, 5):
+        dispatcher.submit("a", lambda v=v: {"v": v})
+    dispatcher.submit("b", lambda: {"v": "b"})
+    gate.set()
+    assert dispatcher.flush(5)
+
+    # the first payload was already in flight; of the queued ones only the latest per node is sent
+    assert sent[0] == {"v": 0}
+    assert sorted(map(str, (p["v"] for p in sent[1:]))) == ["4", "b"]
+    assert dispatcher.stats()["coalesced"] == 3
+
+
+def test_failures_are_counted_and_dispatcher_keeps_running():
+    sent = []
+
+    def send(event, payload):
+        if payload["n"] < 3:
+            raise ConnectionError("socket closed")
+        sent.append(payload)
+
+    dispatcher = PreviewDispatcher(send, "evt")
+    dispatcher.submit("node1", lambda: {"n": 1})
+    assert dispatcher.flush(5)
+    dispatcher.submit("node1", lambda: {"n": 2})
+    assert dispatcher.flush(5)
+    dispatcher.submit("node1", lambda: {"n": 3})
+    assert dispatcher.flush(5)
+    assert dispatcher.stats()["failed"] == 2
+    assert sent == [{"n": 3}]
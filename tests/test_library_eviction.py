@@ -0,0 +1,39 @@
+"""Tests for the asset library eviction policies."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_eviction import AssetStats, ByteBudgetPolicy, CountLimitPolicy, make_policy
+
+
+def _assets(*last_used, nbytes=100):
+    return [AssetStats(nbytes=nbytes, last_used=t) for t in last_used]
+
+
+def test_count_limit_is_fifo_and_skips_pinned():
+    policy = CountLimitPolicy(max_items=3)
+    assert policy.select(_assets(1, 2, 3, 4, 5), pinned=set()) == [0, 1]
+    assert policy.select(_assets(1, 2, 3, 4, 5), pinned={0}) == [1, 2]
+    assert policy.select(_assets(1, 2), pinned=set()) == []
+
+
+def test_byte_budget_evicts_least_recently_used_until_under_budget():
+    policy = ByteBudgetPolicy(max_bytes=250, max_items=100)
+    # last_used ticks: index 2 is the stalest, then 0
+    assert policy.select(_assets(5, 9, 1, 7), pinned=set()) == [0, 2]
+    assert policy.select(_assets(5, 9, 1, 7), pinned={2}) == [0, 3]
+
+
+def test_byte_budget_never_evicts_pinned_even_when_over_budget():
+    policy = ByteBudgetPolicy(max_bytes=0, max_items=100)
+    assert policy.select(_assets(1, 2, 3), pinned={0, 1, 2}) == []
+
+
+def test_make_policy_rejects_unknown_names():
+    assert isinstance(make_policy("fifo", max_items=3, max_bytes=0), CountLimitPolicy)
+    with pytest.raises(ValueError):
+        make_policy("random", max_items=3, max_bytes=0)
@@ -0,0 +1,38 @@
+"""Tests for the binary library page frames."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_frames import MAGIC, decode_page_frame, encode_page_frame
+
+
+def _entry(asset_id, near_duplicate=False):
+    return {"id": asset_id, "w": 96, "h": 64, "width": 1536, "height": 1024, "near_duplicate": near_duplicate}
+
+
+def test_frame_round_trip():
+    entries = [_entry("a" * 32), _entry("b" * 32, near_duplicate=True)]
+    blobs = [(b"RIFF....WEBP", "image/webp"), (b"\xff\xd8jpeg", "image/jpeg")]
+    frame = encode_page_frame("17", 40, 30, ["b" * 32], entries, blobs)
+    assert frame.startswith(MAGIC)
+
+    page = decode_page_frame(frame)
+    assert (page["node_id"], page["total"], page["offset"]) == ("17", 40, 30)
+    assert page["selected"] == ["b" * 32]
+    assert [item["data"] for item in page["items"]] == [b"RIFF....WEBP", b"\xff\xd8jpeg"]
+    assert [item["mime"] for item in page["items"]] == ["image/webp", "image/jpeg"]
+    assert [item["near_duplicate"] for item in page["items"]] == [False, True]
+    assert page["items"][0]["width"] == 1536 and page["items"][0]["h"] == 64
+
+
+def test_empty_page_and_bad_frames():
+    page = decode_page_frame(encode_page_frame("global", 0, 0, [], [], []))
+    assert page["items"] == [] and page["total"] == 0
+    with pytest.raises(ValueError):
+        encode_page_frame("1", 1, 0, [], [_entry("a" * 32)], [])
+    with pytest.raises(ValueError):
+        decode_page_frame(b"JUNK" + bytes(16))
@@ -0,0 +1,81 @@
+"""
+Tests for the raw-buffer digests used by the Comic Assets Library.
+"""
+
+import os
+import sys
+
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_hashing import DigestMemo, batch_digests, image_digest
+
+
+def test_digest_ignores_sub_8bit_noise():
+    base = torch.full((1, 32, 32, 3), 0.5)
+    noisy = base + 1e-4
+    assert image_digest(base) == image_digest(noisy)
+    assert image_digest(base, quantize=False) != image_digest(noisy, quantize=False)
+
+
+def test_digest_distinguishes_shape_with_same_buffer():
+    flat = torch.zeros((1, 16, 64, 3))
+    tall = torch.zeros((1, 64, 16, 3))
+    assert image_digest(flat) != image_digest(tall)
+
+
+def test_digest_accepts_batch_slice_views():
+    batch = torch.rand(4, 24, 24, 4)
+    assert image_digest(batch[2:3]) == image_digest(batch[2].clone())
+
+
+def test_batch_digests_memoized_by_identity(monkeypatch):
+    import library_hashing
+
+    memo = DigestMemo()
+    batch = torch.rand(3, 16, 16, 3)
+    first = batch_digests(batch, memo=memo)
+    assert first == [image_digest(batch[i:i + 1]) for i in range(3)]
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("pixels were hashed again")
+
+    monkeypatch.setattr(library_hashing, "image_digest", _fail)
+    assert batch_digests(batch, memo=memo) == first
+    assert memo.hits == 1
+
+
+def test_batch_digests_memo_invalidated_by_inplace_write():
+    memo = DigestMemo()
+    batch = torch.rand(2, 16, 16, 3)
+    first = batch_digests(batch, memo=memo)
+    batch[1].fill_(0.0)  # in-place through a view bumps the shared version counter
+    second = batch_digests(batch, memo=memo)
+    assert second[0] == first[0] and second[1] != first[1]
+    assert memo.hits == 0
+    # a different view of the same storage has its own key
+    assert batch_digests(batch[1:], memo=memo) == second[1:]
+
+
+def test_batch_digests_memo_accepts_inference_tensors():
+    memo = DigestMemo()
+    with torch.inference_mode():
+        batch = torch.rand(2, 16, 16, 3)
+        first = batch_digests(batch, memo=memo)
+        assert batch_digests(batch, memo=memo) == first
+    assert batch_digests(batch, memo=memo) == first
+    assert memo.hits == 2
+
+
+def test_digest_algorithm_is_pinned():
+    # persisted asset ids must not change with the installed packages
+    import hashlib
+    import struct
+
+    image = torch.zeros(1, 2, 3, 3, dtype=torch.uint8)
+    expected = hashlib.blake2b(digest_size=16)
+    expected.update(struct.pack("<III", 2, 3, 3))
+    expected.update(b"|u1")
+    expected.update(bytes(18))
+    assert image_digest(image) == expected.hexdigest()
@@ -0,0 +1,41 @@
+"""
+Tests for the library thumbnail / preview render pipeline.
+"""
+
+import os
+import sys
+
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_cache import EncodedImageCache
+from library_render import describe_entries, submit_render, warm_thumbnails
+
+
+def test_describe_entries_carries_ids_and_sizes_only():
+    images = [torch.zeros((1, 40 + 10 * i, 60, 3)) for i in range(3)]
+    entries = describe_entries(images, ["d0", "d1", "d2"], [2, 0])
+
+    assert entries == [
+        {"id": "d2", "w": 96, "h": int(60 * 96 / 60), "width": 60, "height": 60},
+        {"id": "d0", "w": 96, "h": int(40 * 96 / 60), "width": 60, "height": 40},
+    ]
+
+
+def test_renders_are_cached_by_digest():
+    images = [torch.full((1, 300, 200, 3), i / 10) for i in range(4)]
+    digests = [f"d{i}" for i in range(4)]
+    thumbs = EncodedImageCache(max_bytes=1 << 20)
+
+    for future in warm_thumbnails(images, digests, range(4), thumbs):
+        future.result(timeout=30)
+    assert all(d in thumbs for d in digests)
+
+    encoded = thumbs.get("d1")
+    assert encoded.mime in ("image/webp", "image/jpeg", "image/png")
+    assert submit_render("d1", images[1], "thumb", thumbs).result() is encoded
+
+    previews = EncodedImageCache(max_bytes=1 << 20)
+    preview = submit_render("d1", images[1], "preview", previews).result(timeout=30)
+    assert len(preview.data) > 0 and "d1" in previews
@@ -0,0 +1,43 @@
+"""
+Tests for perceptual hashing and the BK-tree near-duplicate index.
+"""
+
+import os
+import random
+import sys
+
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_similarity import BKTree, hamming_distance, perceptual_hashes
+
+
+def test_perceptual_hash_stable_under_small_edits():
+    torch.manual_seed(0)
+    image = torch.nn.functional.interpolate(torch.rand(1, 3, 8, 8), size=(128, 128), mode="bilinear").permute(0, 2, 3, 1)
+    edited = image.clone()
+    edited[0, 10:13, 10:13, :] += 0.2
+    other = image.flip(1)
+
+    h_image, h_edited, h_other = perceptual_hashes(torch.cat([image, edited, other]))
+    assert hamming_distance(h_image, h_edited) <= 4
+    assert hamming_distance(h_image, h_other) > 10
+
+
+def test_bktree_matches_linear_scan():
+    rng = random.Random(1)
+    keys = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for i, key in enumerate(keys):
+        tree.add(key, i)
+    for i in range(0, 500, 3):
+        tree.discard(i)
+
+    probe = keys[1] ^ 0b1011
+    expected = sorted(
+        (hamming_distance(probe, key), i) for i, key in enumerate(keys) if i % 3 and hamming_distance(probe, key) <= 20
+    )
+    assert sorted(tree.search(probe, 20)) == expected
+    assert tree.nearest(probe, 3) == (3, 1)
+    assert len(tree) == len([i for i in range(500) if i % 3])
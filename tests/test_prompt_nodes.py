@@ -1,14 +1,25 @@
 import json
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from prompt_loader_node import (
     PromptLibraryLoaderError,
     PromptLibraryLoaderNode,
+    _normalize_prompt_entries,
     _parse_prompt_file,
 )
-from prompt_rolling_node import PromptRollingNode, PromptRollingError, _parse_library_payload
+import prompt_rolling_node
+from prompt_rolling_node import (
+    PromptRollingNode,
+    PromptRollingError,
+    _build_alias_table,
+    _decode_indices,
+    _load_library,
+    _parse_library_payload,
+    _shuffle_indices,
+)
 from text_preview_node import TextPreviewNode
 
 
@@ -96,6 +107,148 @@ def test_prompt_rolling_requires_library():
         node.roll(seed=-1)
 
 
+def _two_group_payload(camera=("35mm", "fish eye", "85mm"), lighting=("soft", "hard")) -> str:
+    return json.dumps({
+        "groups": [
+            {"name": "camera", "entries": [[c] for c in camera]},
+            {"name": "lighting", "entries": [[light] for light in lighting]},
+        ]
+    })
+
+
+def test_load_library_is_cached_by_payload(monkeypatch):
+    payload = _two_group_payload()
+    library = _load_library(payload, 0)
+    assert library.sizes == (3, 2)
+    assert library.strides == (2, 1)
+    assert library.total == 6
+
+    def fail(*args, **kwargs):
+        raise AssertionError("payload should not be parsed again")
+
+    monkeypatch.setattr(prompt_rolling_node, "_parse_library_payload", fail)
+    # an equal string (not the same object) hits the cache
+    assert _load_library("".join(list(payload)), 0) is library
+
+
+def test_prompt_rolling_sequential_walks_all_combinations():
+    node = PromptRollingNode()
+    library_1 = _two_group_payload()
+    library_2 = json.dumps({"groups": [{"name": "mood", "entries": ["calm", "tense"]}]})
+
+    seen = [
+        node.roll(mode="sequential", prompt_index=i, unique_id="seq-test", library_1=library_1, library_2=library_2)[0]
+        for i in range(12)
+    ]
+    assert seen[0] == "35mm, soft, calm"
+    assert seen[1] == "35mm, soft, tense"
+    assert seen[2] == "35mm, hard, calm"
+    assert seen[11] == "85mm, hard, tense"
+    assert len(set(seen)) == 12
+
+
+def test_prompt_rolling_batch_matches_single_rolls():
+    node = PromptRollingNode()
+    library_1 = _two_group_payload()
+
+    for mode in ("sequential", "random"):
+        output, current, outputs, indices = node.roll(
+            mode=mode, prompt_index=4, unique_id=f"batch-{mode}", count=5, library_1=library_1
+        )
+        singles = [node.roll(mode=mode, prompt_index=i, unique_id="single", library_1=library_1)[0] for i in range(4, 9)]
+        assert outputs == singles
+        assert output == outputs[0] and current == 4
+        # sequential indices wrap around the 6 combinations; random ones are seeds
+        assert indices == ([4, 5, 0, 1, 2] if mode == "sequential" else [4, 5, 6, 7, 8])
+
+
+def test_prompt_rolling_count_is_the_last_optional_widget():
+    """Saved workflows restore widgets by position; count must not shift the older ones."""
+    inputs = PromptRollingNode.INPUT_TYPES()
+    assert "count" not in inputs["required"]
+    assert list(inputs["optional"])[-1] == "count"
+    assert inputs["optional"]["count"][1]["default"] == 1
+
+
+def test_prompt_rolling_batch_advances_state():
+    node = PromptRollingNode()
+    library_1 = _two_group_payload()
+
+    first = node.roll(mode="sequential", unique_id="advance", count=4, library_1=library_1)
+    second = node.roll(mode="sequential", unique_id="advance", count=4, library_1=library_1)
+    assert first[3] == [0, 1, 2, 3]
+    assert second[3] == [4, 5, 0, 1]
+
+
+def test_prompt_rolling_shuffle_visits_every_combination_once():
+    node = PromptRollingNode()
+    library_1 = _two_group_payload(camera=[f"cam{i}" for i in range(7)], lighting=[f"light{i}" for i in range(5)])
+
+    first_pass = node.roll(mode="shuffle", unique_id="shuffle", count=35, library_1=library_1)
+    assert sorted(first_pass[3]) == list(range(35))
+    assert first_pass[3] != list(range(35))
+    assert len(set(first_pass[2])) == 35
+
+    # the next pass is again complete, in a different order; single rolls continue it
+    second_pass = node.roll(mode="shuffle", unique_id="shuffle", count=34, library_1=library_1)
+    last = node.roll(mode="shuffle", unique_id="shuffle", library_1=library_1)
+    assert sorted(second_pass[3] + last[3]) == list(range(35))
+    assert second_pass[3] != first_pass[3][:34]
+    assert last[1] == 69
+
+
+def test_shuffle_indices_huge_space():
+    library = _load_library(_two_group_payload(), 0)
+    total = 50000 ** 8
+    picks = _shuffle_indices(list(range(1000)), total, [library])
+    assert len(set(picks)) == 1000
+    assert all(0 <= pick < total for pick in picks)
+
+
+def test_normalize_weighted_entries():
+    rows = _normalize_prompt_entries(
+        [{"text": "rain", "p": 3}, {"text": ["snow", " "], "p": 1}, ["fog"], {"text": "", "p": 2}],
+        source="weather",
+    )
+    assert rows == [{"text": ["rain"], "p": 3}, ["snow"], ["fog"]]
+
+    with pytest.raises(PromptLibraryLoaderError):
+        _normalize_prompt_entries([{"text": "hail", "p": -1}], source="weather")
+
+
+def test_alias_table_matches_weights():
+    weights = [0.0, 1.0, 3.0, 6.0, 0.0]
+    table = _build_alias_table(weights)
+    # exact probability of each entry under the alias draw
+    n = len(weights)
+    mass = [0.0] * n
+    for i in range(n):
+        mass[i] += table.prob[i] / n
+        mass[table.alias[i]] += (1.0 - table.prob[i]) / n
+    assert mass == pytest.approx([w / sum(weights) for w in weights])
+
+
+def test_prompt_rolling_weighted_random_draws():
+    library = json.dumps({
+        "groups": [{"name": "weather", "entries": [{"text": ["rain"], "p": 9}, ["sun"], {"text": ["hail"], "p": 0}]}]
+    })
+    node = PromptRollingNode()
+    outputs = node.roll(mode="random", prompt_index=0, unique_id="weighted", count=2000, library_1=library)[2]
+    assert "hail" not in outputs
+    assert 0.85 < outputs.count("rain") / len(outputs) < 0.95
+
+    # sequential enumerates every entry regardless of weight
+    assert node.roll(mode="sequential", prompt_index=0, count=3, library_1=library)[2] == ["rain", "sun", "hail"]
+
+
+def test_decode_indices_beyond_int64():
+    sizes = [50000] * 5
+    strides = [50000 ** (4 - i) for i in range(5)]
+    total = 50000 ** 5
+    digits = _decode_indices(np.asarray([total - 1, 12345], dtype=object), strides, sizes, total)
+    assert digits.tolist() == [[49999] * 5, [0, 0, 0, 0, 12345]]
+
+
 def test_text_preview_basic():
     """Test that Text Preview node returns both output and UI data"""
     node = TextPreviewNode()
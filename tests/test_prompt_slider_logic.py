@@ -55,5 +55,55 @@ def test_prompt_slider_zero_weight():
 
     print("\nAll tests passed!")
 
+
+def _strengths(**values):
+    return json.dumps(dict(values, __prompts__=list(values)))
+
+
+def test_prompt_slider_sweep_grid():
+    slider = PromptStrengthSlider()
+    strengths_json = _strengths(cat=1.2, dog=1.0, bird=0.0)
+
+    output, variants = slider.apply_strengths("cat, dog, bird", strengths_json, "cat=0.5:1.5:0.25\ndog: 0:1:0.5")
+
+    assert output == "(cat:1.2),(dog:1.0)"
+    # cat: 0.5, 0.8 (0.75), 1.0, 1.2 (1.25), 1.5 -> 5 values; dog: 0 (dropped), 0.5, 1.0 -> 3 values
+    assert len(variants) == 15
+    assert variants[0] == "(cat:0.5)"
+    assert variants[1] == "(cat:0.5),(dog:0.5)"
+    assert variants[-1] == "(cat:1.5),(dog:1.0)"
+    assert len(set(variants)) == 15
+    assert all("bird" not in v for v in variants)
+
+
+def test_prompt_slider_sweep_large_grid_and_cache():
+    slider = PromptStrengthSlider()
+    names = {f"p{i}": 1.0 for i in range(3)}
+    strengths_json = _strengths(**names)
+    sweep = "p0=0.1:1.0\np1=0.1:1.0\np2=1:2:0.2"
+
+    first = slider.apply_strengths("", strengths_json, sweep)
+    assert len(first[1]) == 10 * 10 * 6
+
+    # served from the compiled cache: equal, and the returned list is a fresh copy
+    first[1].clear()
+    second = slider.apply_strengths("", strengths_json, sweep)
+    assert len(second[1]) == 600
+    assert second[0] == "(p0:1.0),(p1:1.0),(p2:1.0)"
+
+
+def test_prompt_slider_sweep_errors():
+    slider = PromptStrengthSlider()
+    strengths_json = _strengths(cat=1.0)
+
+    assert slider.apply_strengths("cat", strengths_json, "")[1] == ["(cat:1.0)"]
+    for bad in ("horse=0:1", "cat=1:0", "cat=0:1:0", "cat"):
+        try:
+            slider.apply_strengths("cat", strengths_json, bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"sweep {bad!r} should be rejected")
+
+
 if __name__ == "__main__":
     test_prompt_slider_zero_weight()